@@ -1,109 +1,240 @@
-from foem import SqlTest
+from foem import SqlTest, get_db_connection
+from foem.dataset import (CheckpointJournal, DatasetManifest, assign_shards, latest_dataset, load_timings,
+                          merge_shards, save_timings)
+from foem.dataset_store import DatasetStore
+from foem.output import DatasetWriter, ParquetSink, jsonl_to_json, read_items
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
 import os
-import json
+import sys
 import time
-from decimal import Decimal
-from sqlalchemy.engine import Row
 
 
-class DecimalEncoder(json.JSONEncoder):
-    """Custom JSON encoder that handles Decimal objects and SQLAlchemy Row objects"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            # Convert Decimal to int if it has no decimal places, else to float
-            return int(obj) if obj % 1 == 0 else float(obj)
-        if isinstance(obj, Row):
-            # Convert SQLAlchemy Row to tuple
-            return tuple(obj)
-        return super().default(obj)
+OUTPUT_DIR = os.path.join(os.getcwd(), "output")
+DATASET_PATH = os.path.join(OUTPUT_DIR, "dataset.json")
+DATASET_JSONL_PATH = os.path.join(OUTPUT_DIR, "dataset.jsonl")
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "manifest.json")
+CHECKPOINT_PATH = os.path.join(OUTPUT_DIR, "checkpoint.jsonl")
+PARQUET_PREFIX = os.path.join(OUTPUT_DIR, "dataset")
+SQLITE_PATH = os.path.join(OUTPUT_DIR, "dataset.sqlite")
+TIMINGS_PATH = os.path.join(OUTPUT_DIR, "timings.json")
 
+# Test functions left out of a default run (every other registered function runs, in template id order)
+DISABLED_FUNCTIONS = {
+    "patients_2drugs_or",  # drug_era
+    "patients_4drugs_and_time",
+    "patients_4drugs_and",
+    "patients_4drugs_or",
+    "patients_3drugs_and_time",
+    "patients_3drugs_or",  # drug_era
+    "patients_4conditions_and_time",
+    "patients_4conditions_and",
+    "patients_4conditions_or",
+    "patients_3conditions_and_time",
+    "patients_3conditions_or",
+}
 
-def write_output(data):
-    output_dir = os.path.join(os.getcwd(), "output")
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    out_path = os.path.join(output_dir, "dataset.json")
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False, cls=DecimalEncoder)
+def set_output_dir(output_dir):
+    """Write all run outputs (dataset, manifest, checkpoint, timings) to another directory."""
+    global OUTPUT_DIR, DATASET_PATH, DATASET_JSONL_PATH, MANIFEST_PATH, CHECKPOINT_PATH, PARQUET_PREFIX, TIMINGS_PATH
+    OUTPUT_DIR = output_dir
+    DATASET_PATH = os.path.join(OUTPUT_DIR, "dataset.json")
+    DATASET_JSONL_PATH = os.path.join(OUTPUT_DIR, "dataset.jsonl")
+    MANIFEST_PATH = os.path.join(OUTPUT_DIR, "manifest.json")
+    CHECKPOINT_PATH = os.path.join(OUTPUT_DIR, "checkpoint.jsonl")
+    PARQUET_PREFIX = os.path.join(OUTPUT_DIR, "dataset")
+    TIMINGS_PATH = os.path.join(OUTPUT_DIR, "timings.json")
+
+
+def parse_shard(value):
+    """Parse a --shard value "i/N" into (i, N), with 1 <= i <= N."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def read_output():
+    """Iterate over the items of the most recently written dataset (none if there is none)."""
+    path = latest_dataset(OUTPUT_DIR)
+    return read_items(path) if path else iter(())
+
+
+def run_function(func):
+    """Run one test function and return its results with the elapsed time."""
+    start_time = time.time()
+    result = func()
+    end_time = time.time()
+    return result, end_time - start_time
+
+
+def run_functions(funcs, on_complete, workers=1):
+    """
+    Run test functions, calling on_complete(name, items, seconds) as each one finishes.
+
+    With workers > 1 the functions run concurrently on a thread pool, each
+    thread using its own pooled connection, and complete in any order.
+    Results are not kept, so memory use does not grow with the dataset.
+    """
+    if workers <= 1:
+        for i, func in enumerate(funcs, 1):
+            print(f"[{i}/{len(funcs)}] Executing {func.__name__}...")
+            result, execution_time = run_function(func)
+            if result:
+                print(f"  -> Generated {len(result)} result(s) in {execution_time:.3f} seconds")
+            on_complete(func.__name__, result or [], execution_time)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_function, func): i for i, func in enumerate(funcs)}
+            for future in as_completed(futures):
+                i = futures[future]
+                result, execution_time = future.result()
+                if result:
+                    print(f"[{i + 1}/{len(funcs)}] {funcs[i].__name__} -> Generated {len(result)} result(s) in {execution_time:.3f} seconds")
+                on_complete(funcs[i].__name__, result or [], execution_time)
+
+
+def reusable_items(tester):
+    """
+    Items of the previous dataset whose test functions are unchanged since
+    the run recorded in the manifest (see foem.dataset). Nothing is reusable
+    when result_limit or the database fingerprint changed.
+    """
+    manifest = DatasetManifest.load(MANIFEST_PATH)
+    return manifest.reusable_items(read_output(), tester) if manifest else {}
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the foem SQL test dataset")
+    subparsers = parser.add_subparsers(dest="command")
+    merge_parser = subparsers.add_parser("merge", help="Merge the outputs of all shards into one dataset")
+    merge_parser.add_argument("shards", nargs="+", help="Shard output directories (e.g. output/shard-*-of-4)")
+    merge_parser.add_argument("--output", default=OUTPUT_DIR, help=f"Output directory (default: {OUTPUT_DIR})")
+    merge_parser.add_argument("--no-json", action="store_true", help="Only write the JSONL dataset")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of test functions to run concurrently (default: 1)")
+    parser.add_argument("--row-workers", type=int, default=int(os.getenv("FOEM_ROW_WORKERS", 1)),
+                        help="Number of template executions per test function to run concurrently "
+                             "(default: FOEM_ROW_WORKERS or 1)")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("FOEM_BATCH_SIZE", 0)),
+                        help="Send up to N template parameter sets per statement "
+                             "(default: FOEM_BATCH_SIZE or 0, one statement per row)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-run test functions whose template/query files changed since the last run "
+                             "and merge their items into the existing dataset")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted run: skip the test functions recorded in "
+                             "output/checkpoint.jsonl")
+    parser.add_argument("--compress", action="store_true",
+                        help="Write output/dataset.jsonl.zst instead of output/dataset.jsonl (requires zstandard)")
+    parser.add_argument("--no-json", action="store_true",
+                        help="Only write the JSONL dataset, not output/dataset.json")
+    parser.add_argument("--parquet", action="store_true",
+                        help="Also write output/dataset.parquet and output/dataset_results.parquet "
+                             "(requires pyarrow)")
+    parser.add_argument("--sqlite", nargs="?", const=SQLITE_PATH, metavar="PATH",
+                        help=f"Also record the run in a SQLite dataset store (default PATH: {SQLITE_PATH})")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N",
+                        help="Only run shard i of N (balanced by the runtimes in --timings) and write its "
+                             "output to output/shard-i-of-N; combine the shards with 'merge'")
+    parser.add_argument("--select", action="append", metavar="PATTERN",
+                        help="Only run the matching test functions: a template/query id (F0013), a glob over "
+                             "method names (patients_*drugs*) or tag:<placeholder kind> (tag:drug); repeat or "
+                             "separate with commas. Selected functions run even if disabled by default")
+    parser.add_argument("--timings", default=TIMINGS_PATH,
+                        help=f"Per-function runtimes used to balance shards (default: {TIMINGS_PATH})")
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        try:
+            manifest = merge_shards(args.shards, args.output, write_json=not args.no_json)
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        print(f"Merged {len(args.shards)} shard(s), {sum(entry['items'] for entry in manifest.functions)} "
+              f"item(s) into {args.output}")
+        sys.exit(0)
+
     print("Initializing SQL test generator...")
-    test_generator = SqlTest(result_limit=10) # Default: returns 1 result per query, change with result_limit=1
-    funcs = [test_generator.patients_group_by_gender_and_ethn,
-             test_generator.patients_group_by_race,
-             test_generator.patients_2drugs_and_time,
-             test_generator.patients_2drugs_and,
-            #  test_generator.patients_2drugs_or (drug_era),
-            #  test_generator.patients_4drugs_and_time /,
-            #  test_generator.patients_4drugs_and /,
-            #  test_generator.patients_4drugs_or /,
-            #  test_generator.patients_3drugs_and_time /,
-             test_generator.patients_3drugs_and,
-            #  test_generator.patients_3drugs_or (drug_era),
-             test_generator.patients_2conditions_and_time,
-             test_generator.patients_2conditions_and,
-             test_generator.patients_2conditions_or,
-            #  test_generator.patients_4conditions_and_time /,
-            #  test_generator.patients_4conditions_and /,
-            #  test_generator.patients_4conditions_or /,
-            #  test_generator.patients_3conditions_and_time /,
-             test_generator.patients_3conditions_and,
-            #  test_generator.patients_3conditions_or /,
-             test_generator.patients_distribution_by_birth,
-             test_generator.patients_condition_followed_condition,
-             test_generator.patients_condition_time_condition,
-             test_generator.patients_condition_age,
-             test_generator.patients_condition_race,
-             test_generator.patients_condition_state,
-             test_generator.patients_condition_year,
-             test_generator.patients_drug_time_drug,
-             test_generator.patients_drug_followed_drug,
-             test_generator.patients_condition_ethnicity,
-             test_generator.patients_drug_year,
-             test_generator.patients_drug_after_condition,
-             test_generator.patients_drug_time_after_condition,
-             test_generator.patients_gender_condition,
-             test_generator.patients_year,
-             test_generator.patients_gender_state,
-             test_generator.patients_group_by_ethnicity_location,
-             test_generator.patients_group_by_ethnicity_birth,
-             test_generator.patients_group_by_ethnicity,
-             test_generator.patients_group_by_gender,
-             test_generator.patients_group_by_race_ethnicity,
-             test_generator.patients_grouped_by_race_gender,
-             test_generator.patients_group_by_race_location,
-             test_generator.patients_group_by_race_birth,
-             test_generator.patients_group_by_location,
-             test_generator.patients_group_by_birth_gender,
-             test_generator.patients_group_by_birth_location,
-             test_generator.patients_count,
-             test_generator.patients_count_by_ethnicity,
-             test_generator.patients_count_by_race,
-             test_generator.patients_count_by_gender,
-             test_generator.patients_drug,
-             test_generator.patients_condition,
-             test_generator.patients_count_by_location,
-             test_generator.patients_condition_group_by_year,
-             test_generator.patients_drug_group_by_year
-             ]
-
-    # funcs = [
-    #             test_generator.patients_4drugs_and
-    #          ]
-
-    print(f"Running {len(funcs)} test function(s)...")
-    results = []
-    for i, func in enumerate(funcs, 1):
-        print(f"[{i}/{len(funcs)}] Executing {func.__name__}...")
-        start_time = time.time()
-        result = func()
-        end_time = time.time()
-        execution_time = end_time - start_time
-        if result:
-            results.extend(result)
-            print(f"  -> Generated {len(result)} result(s) in {execution_time:.3f} seconds")
-
-    print(f"\nWriting {len(results)} total result(s) to output/dataset.json...")
-    write_output(results)
-    print("Done!")
+    conn = None
+    if (args.workers > 1 or args.row_workers > 1) and not os.getenv("DB_POOL_SIZE"):
+        # One pooled connection per worker thread
+        conn = get_db_connection(pool_size=args.workers + args.row_workers)
+    test_generator = SqlTest(conn=conn, result_limit=10, row_workers=args.row_workers,
+                             batch_size=args.batch_size) # Default: returns 1 result per query, change with result_limit=1
+    try:
+        try:
+            if args.select:
+                names = test_generator.registry.select(pattern for value in args.select for pattern in value.split(","))
+            else:
+                names = [name for name in test_generator.registry.functions() if name not in DISABLED_FUNCTIONS]
+            test_generator.registry.check(names)
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        missing = [name for name in names if not callable(getattr(test_generator, name, None))]
+        if missing:
+            sys.exit(f"Error: No test method for: {', '.join(missing)}")
+        funcs = [getattr(test_generator, name) for name in names]
+
+        shard = None
+        if args.shard:
+            index, count = args.shard
+            assigned = set(assign_shards([func.__name__ for func in funcs], load_timings(args.timings), count)[index - 1])
+            shard = {"index": index, "count": count, "functions": [func.__name__ for func in funcs]}
+            funcs = [func for func in funcs if func.__name__ in assigned]
+            set_output_dir(os.path.join(OUTPUT_DIR, f"shard-{index}-of-{count}"))
+            print(f"Shard {index}/{count}: {len(funcs)} test function(s), writing to {OUTPUT_DIR}")
+
+        # Every completed function is journaled, so an interrupted run can be resumed
+        journal = CheckpointJournal(CHECKPOINT_PATH)
+        done = {}
+        if args.resume:
+            done = journal.load()
+            print(f"Resuming: {len(done)} test function(s) already completed")
+        else:
+            journal.remove()
+        if args.incremental:
+            # Read before the dataset is overwritten below
+            reusable = {name: items for name, items in reusable_items(test_generator).items() if name not in done}
+            for name, items in reusable.items():
+                journal.append(name, items)
+            done.update(reusable)
+            print(f"Incremental run: {len(reusable)} test function(s) unchanged")
+        pending = [func for func in funcs if func.__name__ not in done]
+
+        timings = load_timings(TIMINGS_PATH)
+
+        def on_complete(name, items, seconds):
+            journal.append(name, items)
+            writer.add(name, items)
+            timings[name] = round(seconds, 3)
+
+        jsonl_path = DATASET_JSONL_PATH + (".zst" if args.compress else "")
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        print(f"Running {len(pending)} test function(s) with {args.workers} worker(s), writing to {jsonl_path}...")
+        sinks = []
+        if args.parquet:
+            sinks.append(ParquetSink(PARQUET_PREFIX, template_ids=test_generator.template_map))
+        if args.sqlite:
+            store = DatasetStore(args.sqlite, template_ids=test_generator.template_map)
+            store.start_run(test_generator.result_limit, test_generator.db_fingerprint(), resume=args.resume)
+            sinks.append(store)
+        with DatasetWriter(jsonl_path, [func.__name__ for func in funcs], sinks=sinks) as writer:
+            for name in list(done):
+                writer.add(name, done.pop(name))
+            run_functions(pending, on_complete, workers=args.workers)
+
+        print(f"\nWrote {sum(writer.counts.values())} total result(s) to {jsonl_path}")
+        if not args.no_json:
+            print("Writing output/dataset.json...")
+            jsonl_to_json(jsonl_path, DATASET_PATH)
+        DatasetManifest.build(test_generator, writer.counts.items(), shard=shard).save(MANIFEST_PATH)
+        save_timings(TIMINGS_PATH, timings)
+        journal.remove()
+        print("Done!")
+    finally:
+        # Returns the pooled connections and closes the vocabulary snapshot, also on errors
+        test_generator.close()
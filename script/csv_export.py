@@ -2,14 +2,28 @@ import json
 import csv
 import argparse
 
-def export_to_csv(json_file_path, csv_file_path):
+def load_sqlite_entries(db_path, function=None, template_id=None, last_runs=1):
+    """
+    Load a slice of a SQLite dataset store (see foem.dataset_store) instead
+    of a whole dataset.json.
+    """
+    from foem.dataset_store import DatasetStore
+
+    store = DatasetStore(db_path)
+    try:
+        return list(store.items(function=function, template_id=template_id, last_runs=last_runs))
+    finally:
+        store.close()
+
+def export_to_csv(json_file_path, csv_file_path, data=None):
     """
     Export dataset.json to CSV format.
     Uses execution_result instead of expected_output.
     """
     # Read the JSON file
-    with open(json_file_path, 'r') as f:
-        data = json.load(f)
+    if data is None:
+        with open(json_file_path, 'r') as f:
+            data = json.load(f)
 
     # Open CSV file for writing
     with open(csv_file_path, 'w', newline='', encoding='utf-8') as csvfile:
@@ -43,13 +57,14 @@ def export_to_csv(json_file_path, csv_file_path):
 
     print(f"Successfully exported {len(data)} entries to {csv_file_path}")
 
-def export_expected_output_to_csv(json_file_path, csv_file_path):
+def export_expected_output_to_csv(json_file_path, csv_file_path, data=None):
     """
     Export dataset.json to CSV format using the expected_output field.
     """
     # Read the JSON file
-    with open(json_file_path, 'r') as f:
-        data = json.load(f)
+    if data is None:
+        with open(json_file_path, 'r') as f:
+            data = json.load(f)
 
     # Open CSV file for writing
     with open(csv_file_path, 'w', newline='', encoding='utf-8') as csvfile:
@@ -91,10 +106,23 @@ if __name__ == "__main__":
                         help='Path to input JSON file (default: output/dataset.json)')
     parser.add_argument('--output', default='output/dataset.csv',
                         help='Path to output CSV file (default: output/dataset.csv)')
+    parser.add_argument('--sqlite',
+                        help='Read from a SQLite dataset store (e.g. output/dataset.sqlite) instead of --input')
+    parser.add_argument('--function',
+                        help='With --sqlite: only export items of this test function')
+    parser.add_argument('--template-id',
+                        help='With --sqlite: only export items of this template (e.g. F0013)')
+    parser.add_argument('--last-runs', type=int, default=1,
+                        help='With --sqlite: export items of the N most recent runs (default: 1)')
 
     args = parser.parse_args()
 
+    data = None
+    if args.sqlite:
+        data = load_sqlite_entries(args.sqlite, function=args.function, template_id=args.template_id,
+                                   last_runs=args.last_runs)
+
     if args.type == 'execution':
-        export_to_csv(args.input, args.output)
+        export_to_csv(args.input, args.output, data)
     else:
-        export_expected_output_to_csv(args.input, args.output)
+        export_expected_output_to_csv(args.input, args.output, data)
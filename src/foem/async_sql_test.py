@@ -0,0 +1,211 @@
+"""
+asyncio variant of SqlTest, built on SQLAlchemy's asyncio extension (asyncpg).
+
+Requires the optional dependencies: pip install "foem[async]"
+"""
+
+import asyncio
+import os
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from .config import get_async_db_connection
+from .result_cache import ResultCache
+from .sql_test import FINGERPRINT_MAX_IDS_QUERY, FINGERPRINT_VOCABULARY_QUERY, SqlTest
+
+# Vocabulary modes that don't need synchronous database access at startup
+ASYNC_VOCAB_MODES = ("lazy", "shared")
+
+
+class AsyncSqlTest(SqlTest):
+    """
+    SqlTest whose test functions are coroutines.
+
+    Every test function of SqlTest is available and returns a coroutine,
+    e.g. ``await tester.patients_drug()``. Candidate queries, name lookups
+    and per-row template executions all run on the event loop; at most
+    `concurrency` statements are in flight at any time.
+
+    Usage:
+        tester = AsyncSqlTest(result_limit=10)
+        results = await tester.run([tester.patients_drug, tester.patients_count])
+        await tester.close()
+    """
+
+    def __init__(self, conn=None, result_limit=1, vocab_mode=None, vocab_shm=None, batch_size=None,
+                 result_cache=None, concurrency=None):
+        vocab_mode = (vocab_mode or os.getenv("FOEM_VOCAB_MODE", "lazy")).lower()
+        if vocab_mode not in ASYNC_VOCAB_MODES:
+            raise ValueError(f"AsyncSqlTest supports vocab_mode {ASYNC_VOCAB_MODES}, not {vocab_mode}")
+
+        owns_engine = conn is None
+        super().__init__(conn=conn or get_async_db_connection(), result_limit=result_limit,
+                         vocab_mode=vocab_mode, vocab_shm=vocab_shm, batch_size=batch_size,
+                         result_cache=result_cache)
+        self._owns_engine = owns_engine
+        self.concurrency = int(concurrency or os.getenv("FOEM_ASYNC_CONCURRENCY", 8))
+        self._semaphore = None
+        # The fingerprint computation all concurrent callers of db_fingerprint() wait for
+        self._db_fingerprint_task = None
+
+    async def close(self) -> None:
+        """Dispose of the engine (if AsyncSqlTest created it) and release the vocabulary."""
+        try:
+            if self._vocab_snapshot:
+                self._vocab_snapshot.close()
+                self._vocab_snapshot = None
+            if self.conn and self._owns_engine:
+                await self.conn.dispose()
+        finally:
+            self.conn = None
+
+    async def run(self, funcs) -> list:
+        """
+        Run test functions concurrently and return their results in the order
+        of funcs, the same as a sequential run.
+        """
+        outcomes = await asyncio.gather(*(func() for func in funcs))
+        return [item for result in outcomes if result for item in result]
+
+    async def _execute(self, statement, params=None) -> list:
+        """Execute a statement on a pooled connection, within the concurrency limit."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            async with self.conn.connect() as conn:
+                result = await conn.execute(statement, params or {})
+                return result.fetchall()
+
+    async def _fetch(self, query: str, params=None) -> list:
+        """Execute a %(param)s query and fetch all results."""
+        return await self._execute(self._text(query, params), params)
+
+    async def _cached_fetch(self, query: str, params=None) -> list:
+        """Async version of SqlTest._cached_fetch."""
+        key = await self._result_key(query, params)
+        rows = self.result_cache.get(key) if key else None
+        if rows is None:
+            rows = await self._fetch(query, params)
+            if key:
+                self.result_cache.put(key, rows)
+        return rows
+
+    async def _result_key(self, query: str, params=None):
+        """Async version of SqlTest._result_key."""
+        if self.result_cache is None:
+            return None
+        return ResultCache.key(query, params, self.conn.dialect.name, await self.db_fingerprint())
+
+    async def db_fingerprint(self) -> str:
+        """
+        Async version of SqlTest.db_fingerprint; its queries run
+        concurrently. Callers that arrive while it is being computed wait for
+        the same computation instead of starting their own.
+        """
+        if self._db_fingerprint is None:
+            if self._db_fingerprint_task is None:
+                self._db_fingerprint_task = asyncio.ensure_future(self._query_db_fingerprint())
+            try:
+                # Shielded, so a cancelled caller doesn't cancel it for the others
+                self._db_fingerprint = await asyncio.shield(self._db_fingerprint_task)
+            except Exception:
+                # Let a later call try again
+                self._db_fingerprint_task = None
+                raise
+        return self._db_fingerprint
+
+    async def _query_db_fingerprint(self) -> str:
+        try:
+            source = await self._fetch("SELECT * FROM cdm_source")
+        except SQLAlchemyError:
+            source = []
+        versions, max_ids = await asyncio.gather(self._fetch(FINGERPRINT_VOCABULARY_QUERY),
+                                                 self._fetch(FINGERPRINT_MAX_IDS_QUERY))
+        return self._make_fingerprint(source, versions, max_ids[0])
+
+    def find_code_by_name(self, name: str, vocab_dict: dict = None):
+        """
+        Same as SqlTest.find_code_by_name, but never queries the database:
+        in lazy mode, names must be resolved with ``await resolve_names()`` first.
+        """
+        if vocab_dict is None or vocab_dict is self._vocab_dict:
+            if self.vocab_mode == "lazy" and name not in self._resolved_names and name.lower() not in self._name_index:
+                raise RuntimeError(f"Concept name not resolved yet: {name!r}; await resolve_names() first")
+        return super().find_code_by_name(name, vocab_dict)
+
+    async def resolve_names(self, names) -> None:
+        """Async version of SqlTest.resolve_names; chunks are looked up concurrently."""
+        if self.vocab_mode != "lazy":
+            return
+        chunks = self._pending_name_chunks(names)
+        lookups = await asyncio.gather(*(self._execute(*self._name_lookup(chunk)) for chunk in chunks))
+        for chunk, rows in zip(chunks, lookups):
+            self._index_resolved_names(chunk, rows)
+
+    async def _run_query(self, query: str, params=None):
+        """Helper to execute a query and fetch all results."""
+        return await self._cached_fetch(self._maybe_transpile(query), params)
+
+    async def _execute_query_and_process(self, method_name, text_template, *args):
+        """Async version of SqlTest._execute_query_and_process."""
+        # Transpiled before formatting, so the transpiled query is the same for every result_limit
+        query = self._maybe_transpile(self._read_query(method_name), format_fields=True)
+        results = await self._cached_fetch(query.format(self=self))
+        await self.resolve_names(val for row in results for val in row if isinstance(val, str))
+        return await self._process_results(results, text_template, method_name, *args)
+
+    async def _process_results(self, results, text_template, template_method_name, *args):
+        """Async version of SqlTest._process_results; template runs are scheduled concurrently."""
+        query, _ = self._read_template(template_method_name)
+        query = self._maybe_transpile(query)
+
+        texts = [text_template.format(*row) for row in results]
+        plan = self.registry.binding_plan(template_method_name)
+        param_sets = [plan.bind(row, self.find_code_by_name, args) for row in results]
+        if self.batch_size > 1 and len(param_sets) > 1 and self._batchable(template_method_name, query):
+            executed = await self._execute_template_batched(query, param_sets)
+        else:
+            executed = await asyncio.gather(*(self._execute_template(query, params) for params in param_sets))
+
+        output = []
+        for idx, (text, (sql, query_result)) in enumerate(zip(texts, executed)):
+            output.append({
+                "id": self._item_id(template_method_name, idx),
+                "input": text,
+                "expected_output": sql,
+                "execution_result": query_result
+            })
+        return output
+
+    async def _execute_template(self, query: str, params: dict):
+        """Async version of SqlTest._execute_template."""
+        return self._display_sql(query, params), await self._cached_fetch(query, params)
+
+    async def _execute_template_batched(self, query: str, param_sets: list) -> list:
+        """Async version of SqlTest._execute_template_batched."""
+        executed = [(self._display_sql(query, params), []) for params in param_sets]
+        keys = [await self._result_key(query, params) for params in param_sets]
+        pending = self._fill_cached(executed, keys)
+
+        async def run_batch(start):
+            indexes = pending[start:start + self.batch_size]
+            batch_query, batch_params = self._batch_query(query, [param_sets[idx] for idx in indexes])
+            return indexes, await self._fetch(batch_query, batch_params)
+
+        batches = await asyncio.gather(*(run_batch(start) for start in range(0, len(pending), self.batch_size)))
+        self._split_batches(executed, keys, batches)
+        return executed
+
+    async def _add_result(self, text, query, params, method_name):
+        """Async version of SqlTest._add_result."""
+        query = self._maybe_transpile(query)
+        sql, query_result = await self._execute_template(query, params)
+
+        result = {
+            "id": self._item_id(method_name, 0),
+            "input": text,
+            "expected_output": sql,
+            "execution_result": query_result
+        }
+
+        return [result]
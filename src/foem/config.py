@@ -5,7 +5,7 @@ from sqlalchemy.engine import Engine
 
 load_dotenv()
 
-def get_db_connection() -> Engine:
+def get_db_connection(**engine_options) -> Engine:
     """
     Get database connection based on DB_TYPE environment variable.
 
@@ -13,24 +13,79 @@ def get_db_connection() -> Engine:
     - PostgreSQL (default): DB_TYPE=postgresql or not set
     - Databricks: DB_TYPE=databricks
 
+    Connection pool settings are read from the environment (see
+    _pool_options) and can be overridden with keyword arguments, which are
+    passed on to create_engine (e.g. pool_size=8).
+
     Returns:
         SQLAlchemy Engine object
     """
     db_type = os.getenv("DB_TYPE", "postgresql").lower()
+    options = {**_pool_options(), **engine_options}
 
     if db_type == "databricks":
-        return _get_databricks_engine()
+        return _get_databricks_engine(**options)
     else:
-        return _get_postgresql_engine()
+        return _get_postgresql_engine(**options)
+
+
+def get_async_db_connection(**engine_options):
+    """
+    Get an asyncio database engine (SQLAlchemy asyncio extension + asyncpg).
+
+    Only PostgreSQL is supported: DB_CONNECTION_STRING is used with the
+    postgresql+asyncpg driver. Pool settings work as in get_db_connection.
+    Requires the optional dependencies: pip install "foem[async]"
+
+    Returns:
+        SQLAlchemy AsyncEngine object
+    """
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    db_type = os.getenv("DB_TYPE", "postgresql").lower()
+    if db_type != "postgresql":
+        raise ValueError(f"Async execution is only supported for PostgreSQL, not DB_TYPE={db_type}")
+
+    db_url = make_url(os.getenv("DB_CONNECTION_STRING")).set(drivername="postgresql+asyncpg")
+    return create_async_engine(db_url, **{**_pool_options(), **engine_options})
+
+
+def _pool_options() -> dict:
+    """
+    Read connection pool settings from environment variables.
+
+    Optional:
+    - DB_POOL_SIZE: Connections kept open in the pool (SQLAlchemy default: 5)
+    - DB_MAX_OVERFLOW: Extra connections allowed above the pool size (default: 10)
+    - DB_POOL_TIMEOUT: Seconds to wait for a free connection (default: 30)
+    - DB_POOL_RECYCLE: Recycle connections older than this many seconds (default: never)
+    - DB_POOL_PRE_PING: Test connections on checkout, true/false (default: false)
+    """
+    options = {}
+    for env_var, option in (
+        ("DB_POOL_SIZE", "pool_size"),
+        ("DB_MAX_OVERFLOW", "max_overflow"),
+        ("DB_POOL_TIMEOUT", "pool_timeout"),
+        ("DB_POOL_RECYCLE", "pool_recycle"),
+    ):
+        value = os.getenv(env_var)
+        if value:
+            options[option] = int(value)
+
+    pre_ping = os.getenv("DB_POOL_PRE_PING")
+    if pre_ping:
+        options["pool_pre_ping"] = pre_ping.lower() in ("1", "true", "yes", "on")
+    return options
 
 
-def _get_postgresql_engine() -> Engine:
+def _get_postgresql_engine(**engine_options) -> Engine:
     """Get PostgreSQL engine using SQLAlchemy."""
     db_url = os.getenv("DB_CONNECTION_STRING")
-    return create_engine(db_url)
+    return create_engine(db_url, **engine_options)
 
 
-def _get_databricks_engine() -> Engine:
+def _get_databricks_engine(**engine_options) -> Engine:
     """
     Get Databricks engine using SQLAlchemy with databricks-sql-connector.
 
@@ -62,4 +117,4 @@ def _get_databricks_engine() -> Engine:
         f"http_path={http_path}&catalog={catalog}&schema={schema}"
     )
 
-    return create_engine(connection_string)
\ No newline at end of file
+    return create_engine(connection_string, **engine_options)
\ No newline at end of file
@@ -0,0 +1,344 @@
+"""
+Bookkeeping for (re)generating output/dataset.json.
+
+DatasetManifest: a manifest next to the dataset records, for every test
+function in dataset order, the content hashes of the template/query files and
+method source it depends on, and how many items it produced. A later run
+re-executes only the functions whose hashes changed (or all of them when
+result_limit or the database fingerprint changed) and reuses the other items
+from the dataset.
+
+CheckpointJournal: completed test functions are appended to a JSONL journal
+as they finish, so an interrupted run can resume where it stopped.
+
+Sharding: assign_shards splits the test functions over N shards, balanced by
+historical runtimes, and merge_shards combines the shard outputs into one
+validated dataset.
+"""
+
+import hashlib
+import heapq
+import inspect
+import json
+import os
+import threading
+from itertools import islice
+from pathlib import Path
+from statistics import median
+from typing import Dict, Iterable, List, Optional
+
+from .output import DatasetWriter, encode_item, jsonl_to_json, read_items
+
+MANIFEST_VERSION = 1
+
+
+def function_hashes(tester, method_name: str) -> Dict[str, str]:
+    """
+    Content hashes of the local inputs of a test function: its template and
+    query files, plus its TEST_FUNCTIONS entry (question text and arguments)
+    or, for a hand-written method, the method source.
+    """
+    hashes = {path.name: hashlib.sha256(path.read_bytes()).hexdigest() for path in tester.source_files(method_name)}
+    method = getattr(type(tester), method_name)
+    function = getattr(method, "test_function", None)
+    source = repr(function) if function is not None else inspect.getsource(method)
+    hashes["source"] = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    return hashes
+
+
+class DatasetManifest:
+    """What produced the current dataset, per test function."""
+
+    def __init__(self, result_limit: int, fingerprint: str, functions: Optional[List[dict]] = None,
+                 shard: Optional[dict] = None):
+        self.result_limit = result_limit
+        self.fingerprint = fingerprint
+        # [{"name": ..., "hashes": {...}, "items": count}, ...] in dataset order
+        self.functions: List[dict] = functions or []
+        # For shard outputs: {"index": i, "count": N, "functions": [all method names, in order]}
+        self.shard = shard
+
+    @classmethod
+    def build(cls, tester, counts, shard: Optional[dict] = None) -> "DatasetManifest":
+        """
+        Create the manifest for a finished run.
+
+        Args:
+            tester: The SqlTest that ran the functions
+            counts: (method name, item count) pairs in dataset order
+            shard: Shard description, for the output of one shard
+        """
+        functions = [
+            {"name": name, "hashes": function_hashes(tester, name), "items": count}
+            for name, count in counts
+        ]
+        return cls(tester.result_limit, tester.db_fingerprint(), functions, shard)
+
+    @classmethod
+    def load(cls, path) -> Optional["DatasetManifest"]:
+        """Read a manifest, or return None if there is no usable one."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"Warning: Ignoring unreadable manifest {path}: {e}")
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(data["result_limit"], data["fingerprint"], data["functions"], data.get("shard"))
+
+    def save(self, path) -> None:
+        """Write the manifest atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        data = {
+            "version": MANIFEST_VERSION,
+            "result_limit": self.result_limit,
+            "fingerprint": self.fingerprint,
+            "functions": self.functions,
+        }
+        if self.shard:
+            data["shard"] = self.shard
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def reusable_items(self, items: Iterable[dict], tester) -> Dict[str, list]:
+        """
+        Split the items of the existing dataset by test function and return
+        those of the functions that are still up to date. Items are consumed
+        one function at a time; only the reusable ones are kept.
+
+        Args:
+            items: The existing dataset, as written by the run this manifest describes
+            tester: The SqlTest of the current run
+
+        Returns:
+            Dict of method name to its items
+        """
+        if self.result_limit != tester.result_limit or self.fingerprint != tester.db_fingerprint():
+            return {}
+
+        items = iter(items)
+        reusable = {}
+        for entry in self.functions:
+            name, count = entry["name"], entry["items"]
+            chunk = list(islice(items, count))
+            if len(chunk) < count:
+                break
+            if hasattr(tester, name) and entry["hashes"] == function_hashes(tester, name):
+                reusable[name] = chunk
+        else:
+            if next(items, None) is None:
+                return reusable
+
+        print("Warning: Dataset does not match its manifest, regenerating everything")
+        return {}
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of completed test functions, one
+    {"function": name, "items": [...]} record per line. Every record is
+    flushed and fsynced before append() returns.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, list]:
+        """
+        Return the items of every completed function by method name.
+        A torn last record (from a crash mid-write) is dropped from the file.
+        """
+        completed = {}
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return completed
+
+        with f:
+            valid_size = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                completed[record["function"]] = record["items"]
+                valid_size += len(line)
+
+        if valid_size < self.path.stat().st_size:
+            print(f"Warning: Dropping incomplete record at the end of {self.path}")
+            os.truncate(self.path, valid_size)
+        return completed
+
+    def append(self, name: str, items: list) -> None:
+        """Durably record that a test function completed with items."""
+        line = encode_item({"function": name, "items": items})
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def remove(self) -> None:
+        """Delete the journal, e.g. once the dataset has been written."""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+def latest_dataset(output_dir) -> Optional[Path]:
+    """The most recently written dataset in output_dir (dataset.jsonl, .jsonl.zst or .json), if any."""
+    paths = [Path(output_dir) / name for name in ("dataset.jsonl", "dataset.jsonl.zst", "dataset.json")]
+    paths = [path for path in paths if path.exists()]
+    return max(paths, key=lambda path: path.stat().st_mtime) if paths else None
+
+
+def load_timings(path) -> Dict[str, float]:
+    """Read per-function runtimes in seconds (empty if there are none yet)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"Warning: Ignoring unreadable timings {path}: {e}")
+        return {}
+
+
+def save_timings(path, timings: Dict[str, float]) -> None:
+    """Write per-function runtimes atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(timings, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def assign_shards(names: List[str], timings: Dict[str, float], count: int) -> List[List[str]]:
+    """
+    Split test functions over count shards with the longest-processing-time
+    rule: functions are taken longest first and each goes to the shard with
+    the least total runtime so far (ties go to the shard with fewer
+    functions). Functions without a recorded runtime count as the median
+    one. The result only depends on the arguments, so every shard computes
+    the same assignment from the same timings.
+
+    Returns:
+        Method names per shard, each in the order of names
+    """
+    default = median(timings.values()) if timings else 1.0
+    cost = {name: timings.get(name, default) for name in names}
+    position = {name: idx for idx, name in enumerate(names)}
+
+    loads = [(0.0, 0, shard) for shard in range(count)]
+    assigned = [[] for _ in range(count)]
+    for name in sorted(names, key=lambda name: (-cost[name], position[name])):
+        load, size, shard = heapq.heappop(loads)
+        assigned[shard].append(name)
+        heapq.heappush(loads, (load + cost[name], size + 1, shard))
+    return [sorted(shard_names, key=position.get) for shard_names in assigned]
+
+
+def _shard_chunks(manifest: DatasetManifest, items, position: Dict[str, int]):
+    """Yield (dataset position, method name, items) for each function of a shard, in order."""
+    items = iter(items)
+    for entry in manifest.functions:
+        chunk = list(islice(items, entry["items"]))
+        if len(chunk) < entry["items"]:
+            raise ValueError(f"Shard {manifest.shard['index']} has fewer items than its manifest lists")
+        yield position[entry["name"]], entry["name"], chunk
+    if next(items, None) is not None:
+        raise ValueError(f"Shard {manifest.shard['index']} has more items than its manifest lists")
+
+
+def merge_shards(shard_dirs, output_dir, write_json: bool = True) -> DatasetManifest:
+    """
+    Merge the outputs of all shards of a run into output_dir.
+
+    Checks that every shard 1..N of the same run (same function list,
+    result_limit and database fingerprint) is present, that every test
+    function was produced by exactly one shard and that item ids are unique.
+    Items are streamed in the order of the full function list, so the
+    merged dataset is identical to an unsharded run. The shards' timings
+    are merged into output_dir/timings.json for the next assignment.
+
+    Returns:
+        The manifest of the merged dataset (also saved in output_dir)
+
+    Raises:
+        ValueError: If the shards are inconsistent or incomplete
+    """
+    shards = []
+    for shard_dir in shard_dirs:
+        manifest = DatasetManifest.load(Path(shard_dir) / "manifest.json")
+        if manifest is None or not manifest.shard:
+            raise ValueError(f"No shard manifest in {shard_dir}")
+        dataset = latest_dataset(shard_dir)
+        if dataset is None:
+            raise ValueError(f"No dataset in {shard_dir}")
+        shards.append((manifest, dataset))
+
+    first = shards[0][0]
+    names = first.shard["functions"]
+    count = first.shard["count"]
+    for manifest, _ in shards:
+        if (manifest.shard["functions"], manifest.shard["count"]) != (names, count):
+            raise ValueError("Shards were generated from different function lists or shard counts")
+        if (manifest.result_limit, manifest.fingerprint) != (first.result_limit, first.fingerprint):
+            raise ValueError("Shards were generated with different result_limit or database contents")
+    indexes = sorted(manifest.shard["index"] for manifest, _ in shards)
+    if indexes != list(range(1, count + 1)):
+        raise ValueError(f"Expected shards 1..{count}, got {indexes}")
+
+    entries = {}
+    for manifest, _ in shards:
+        for entry in manifest.functions:
+            if entry["name"] in entries:
+                raise ValueError(f"{entry['name']} was generated by more than one shard")
+            entries[entry["name"]] = entry
+    missing = [name for name in names if name not in entries]
+    if missing:
+        raise ValueError(f"Missing from all shards: {', '.join(missing)}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jsonl_path = output_dir / "dataset.jsonl"
+    position = {name: idx for idx, name in enumerate(names)}
+    seen_ids = set()
+    with DatasetWriter(jsonl_path, names) as writer:
+        streams = [_shard_chunks(manifest, read_items(dataset), position) for manifest, dataset in shards]
+        for _, name, items in heapq.merge(*streams, key=lambda chunk: chunk[0]):
+            for item in items:
+                if item["id"] in seen_ids:
+                    raise ValueError(f"Duplicate item id {item['id']}")
+                seen_ids.add(item["id"])
+            writer.add(name, items)
+
+    if write_json:
+        jsonl_to_json(jsonl_path, output_dir / "dataset.json")
+    merged = DatasetManifest(first.result_limit, first.fingerprint, [entries[name] for name in names])
+    merged.save(output_dir / "manifest.json")
+
+    timings = load_timings(output_dir / "timings.json")
+    for shard_dir in shard_dirs:
+        timings.update(load_timings(Path(shard_dir) / "timings.json"))
+    save_timings(output_dir / "timings.json", timings)
+    return merged
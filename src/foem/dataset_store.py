@@ -0,0 +1,214 @@
+"""
+SQLite store of generated datasets, one database across many runs.
+
+Tables:
+    runs               run_id, started_at, finished_at, result_limit, fingerprint
+    sql_text           sql_id, sha256, sql (expected_output, deduplicated)
+    items              run_id, item_id, position, function, template_id, input, sql_id
+    execution_results  run_id, item_id, result (JSON array of rows)
+
+Items are indexed by function, template id and run, so slices like "all items
+of patients_condition_age from the last three runs" are a single indexed
+query instead of a full parse of dataset.json.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+
+from .output import encode_item
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    result_limit INTEGER,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS sql_text (
+    sql_id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    sql TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    item_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    function TEXT NOT NULL,
+    template_id TEXT,
+    input TEXT,
+    sql_id INTEGER REFERENCES sql_text(sql_id),
+    PRIMARY KEY (run_id, item_id)
+);
+CREATE TABLE IF NOT EXISTS execution_results (
+    run_id INTEGER NOT NULL,
+    item_id TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (run_id, item_id)
+);
+CREATE INDEX IF NOT EXISTS idx_items_function ON items (function, run_id);
+CREATE INDEX IF NOT EXISTS idx_items_template ON items (template_id, run_id);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class DatasetStore:
+    """
+    Read and write datasets in a SQLite database.
+
+    Writing follows the sink interface of foem.output.DatasetWriter:
+    write(name, items) buffers items and upserts them batch_size at a time,
+    each batch in one transaction; close() flushes and marks the run finished
+    (unless it is incomplete, so that start_run(resume=True) picks it up).
+
+    Usage:
+        store = DatasetStore("output/dataset.sqlite")
+        for item in store.items(function="patients_condition_age", last_runs=3):
+            ...
+    """
+
+    def __init__(self, path, template_ids: Optional[Dict[str, str]] = None, batch_size: int = 1000):
+        self.path = path
+        self.template_ids = template_ids or {}
+        self.batch_size = batch_size
+        self.run_id: Optional[int] = None
+        self._buffer = []
+        # Position of the next item in the dataset, for ordering
+        self._position = 0
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+
+    def start_run(self, result_limit: Optional[int] = None, fingerprint: Optional[str] = None,
+                  resume: bool = False) -> int:
+        """
+        Start recording a run, or with resume=True continue the last unfinished
+        one (items already stored are overwritten by upserts).
+
+        Returns:
+            The run id
+        """
+        if resume:
+            row = self._db.execute(
+                "SELECT run_id FROM runs WHERE finished_at IS NULL ORDER BY run_id DESC LIMIT 1"
+            ).fetchone()
+            if row:
+                self.run_id = row[0]
+                return self.run_id
+
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT INTO runs (started_at, result_limit, fingerprint) VALUES (?, ?, ?)",
+                (_now(), result_limit, fingerprint),
+            )
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def write(self, name: str, items: list) -> None:
+        """Add the items of one test function."""
+        if self.run_id is None:
+            self.start_run()
+        for item in items:
+            self._buffer.append((self._position, name, item))
+            self._position += 1
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+
+        sql_rows = {}
+        item_rows = []
+        result_rows = []
+        for position, name, item in self._buffer:
+            sql = item.get("expected_output") or ""
+            digest = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+            sql_rows[digest] = sql
+            item_rows.append((self.run_id, item["id"], position, name, self.template_ids.get(name), item.get("input"),
+                              digest))
+            result_rows.append((self.run_id, item["id"], encode_item(item.get("execution_result") or [])))
+
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO sql_text (sha256, sql) VALUES (?, ?)", sql_rows.items()
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO items (run_id, item_id, position, function, template_id, input, sql_id) "
+                "SELECT ?, ?, ?, ?, ?, ?, sql_id FROM sql_text WHERE sha256 = ?",
+                item_rows,
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO execution_results (run_id, item_id, result) VALUES (?, ?, ?)",
+                result_rows,
+            )
+        self._buffer = []
+
+    def close(self, complete: bool = True) -> None:
+        """Flush buffered items, mark the run finished if complete and close the database."""
+        if self._db is None:
+            return
+        self._flush()
+        if complete and self.run_id is not None:
+            with self._db:
+                self._db.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (_now(), self.run_id))
+        self._db.close()
+        self._db = None
+
+    def items(self, function: Optional[str] = None, template_id: Optional[str] = None,
+              run_id: Optional[int] = None, last_runs: Optional[int] = 1) -> Iterator[dict]:
+        """
+        Iterate over stored items in dataset format, ordered by run and dataset position.
+
+        Args:
+            function: Only items of this test function
+            template_id: Only items of this template (e.g. "F0013")
+            run_id: Only items of this run (overrides last_runs)
+            last_runs: Only items of the N most recent finished runs (None: all runs)
+
+        Returns:
+            Iterator of {"id", "input", "expected_output", "execution_result",
+            "function", "run_id"} dicts
+        """
+        conditions = []
+        params = []
+        if function is not None:
+            conditions.append("i.function = ?")
+            params.append(function)
+        if template_id is not None:
+            conditions.append("i.template_id = ?")
+            params.append(template_id)
+        if run_id is not None:
+            conditions.append("i.run_id = ?")
+            params.append(run_id)
+        elif last_runs is not None:
+            conditions.append(
+                "i.run_id IN (SELECT run_id FROM runs WHERE finished_at IS NOT NULL "
+                "ORDER BY run_id DESC LIMIT ?)"
+            )
+            params.append(last_runs)
+
+        query = (
+            "SELECT i.run_id, i.item_id, i.function, i.input, s.sql, r.result "
+            "FROM items i "
+            "LEFT JOIN sql_text s ON s.sql_id = i.sql_id "
+            "LEFT JOIN execution_results r ON r.run_id = i.run_id AND r.item_id = i.item_id"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY i.run_id, i.position"
+
+        for run, item_id, name, text, sql, result in self._db.execute(query, params):
+            yield {
+                "id": item_id,
+                "input": text,
+                "expected_output": sql,
+                "execution_result": json.loads(result) if result else [],
+                "function": name,
+                "run_id": run,
+            }
@@ -0,0 +1,249 @@
+"""
+Streaming dataset output.
+
+Items are written to a JSONL file (one JSON object per line) as soon as their
+test function finishes, so memory use does not grow with the dataset and
+progress is visible while a run is going. Paths ending in .zst are
+zstd-compressed, which needs the optional zstandard package. The classic
+dataset.json (a JSON array with indent=2) can be produced from the JSONL
+file with jsonl_to_json(), and ParquetSink writes a columnar copy next to it.
+
+Usage:
+    python -m foem.output output/dataset.jsonl.zst output/dataset.json
+"""
+
+import argparse
+import io
+import json
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy.engine import Row
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """Custom JSON encoder that handles Decimal objects and SQLAlchemy Row objects"""
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            # Convert Decimal to int if it has no decimal places, else to float
+            return int(obj) if obj % 1 == 0 else float(obj)
+        if isinstance(obj, Row):
+            # Convert SQLAlchemy Row to tuple
+            return tuple(obj)
+        return super().default(obj)
+
+
+# One shared compact encoder: json.dumps(cls=...) would build a new encoder
+# for every item, this one goes straight to the C encoder
+_ENCODER = DecimalEncoder(ensure_ascii=False)
+
+
+def encode_item(item: dict) -> str:
+    """Encode one dataset item as a single line of JSON."""
+    return _ENCODER.encode(item)
+
+
+def open_text(path, mode: str = "r"):
+    """Open a text file for reading ("r") or writing ("w"), zstd-compressed if path ends in .zst."""
+    path = str(path)
+    if not path.endswith(".zst"):
+        return open(path, mode, encoding="utf-8")
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Compressed output requires the zstandard package: pip install zstandard")
+    if mode == "w":
+        stream = zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+    else:
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def read_items(path) -> Iterator[dict]:
+    """Iterate over the items of a dataset, either JSONL (optionally .zst) or a dataset.json array."""
+    path = str(path)
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+
+    with open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def jsonl_to_json(src, dst) -> int:
+    """
+    Convert a JSONL dataset to a dataset.json array, one item at a time.
+    The output is identical to json.dump(items, f, indent=2, ensure_ascii=False).
+
+    Returns:
+        Number of items written
+    """
+    count = 0
+    with open(dst, "w", encoding="utf-8") as f:
+        f.write("[")
+        for item in read_items(src):
+            f.write(",\n  " if count else "\n  ")
+            f.write(json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+class DatasetWriter:
+    """
+    Stream test function results to a JSONL dataset in a fixed function order.
+
+    Functions may finish in any order (e.g. with --workers); their items are
+    held back until every earlier function has been written, so the file is
+    the same as for a sequential run.
+    Numbered items are also passed on to sinks (e.g. ParquetSink), in order;
+    close(complete) tells them whether every function made it.
+    """
+
+    def __init__(self, path, names: List[str], sinks=()):
+        self.path = path
+        self.counts: Dict[str, int] = {}
+        self._names = names
+        self._sinks = list(sinks)
+        self._pending: Dict[str, list] = {}
+        self._next = 0
+        self._file = open_text(path, "w")
+
+    def add(self, name: str, items: list) -> None:
+        """Hand over the items of a finished test function."""
+        self._pending[name] = items or []
+        while self._next < len(self._names) and self._names[self._next] in self._pending:
+            next_name = self._names[self._next]
+            next_items = self._pending.pop(next_name)
+            for item in next_items:
+                self._file.write(encode_item(item))
+                self._file.write("\n")
+            for sink in self._sinks:
+                sink.write(next_name, next_items)
+            self.counts[next_name] = len(next_items)
+            self._next += 1
+        self._file.flush()
+
+    def close(self) -> None:
+        complete = self._next == len(self._names)
+        if self._file:
+            self._file.close()
+            self._file = None
+        for sink in self._sinks:
+            sink.close(complete)
+        self._sinks = []
+        if not complete:
+            print(f"Warning: {len(self._names) - self._next} test function(s) missing from {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetSink:
+    """
+    Columnar copy of the dataset in two Parquet files, written in row groups
+    of row_group_size items so memory stays flat:
+
+        <prefix>.parquet          id, function, template_id, input,
+                                  expected_output, result_rows
+        <prefix>_results.parquet  item_id, row_idx, col_idx, int_value,
+                                  float_value, text_value
+
+    execution_result values go to the typed column matching their type
+    (Decimals follow DecimalEncoder; anything else is stored as text).
+    Requires the optional pyarrow package.
+
+    Usage:
+        pq.read_table("output/dataset.parquet", columns=["id", "input"])
+    """
+
+    def __init__(self, prefix, template_ids: Optional[Dict[str, str]] = None, row_group_size: int = 10_000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires the pyarrow package: pip install pyarrow")
+
+        self._pa = pa
+        self.template_ids = template_ids or {}
+        self.row_group_size = row_group_size
+        self.items_schema = pa.schema([
+            ("id", pa.string()),
+            ("function", pa.string()),
+            ("template_id", pa.string()),
+            ("input", pa.string()),
+            ("expected_output", pa.string()),
+            ("result_rows", pa.int32()),
+        ])
+        self.results_schema = pa.schema([
+            ("item_id", pa.string()),
+            ("row_idx", pa.int32()),
+            ("col_idx", pa.int32()),
+            ("int_value", pa.int64()),
+            ("float_value", pa.float64()),
+            ("text_value", pa.string()),
+        ])
+        self._items_writer = pq.ParquetWriter(f"{prefix}.parquet", self.items_schema)
+        self._results_writer = pq.ParquetWriter(f"{prefix}_results.parquet", self.results_schema)
+        self._items = {name: [] for name in self.items_schema.names}
+        self._results = {name: [] for name in self.results_schema.names}
+        self._buffered = 0
+
+    def write(self, name: str, items: list) -> None:
+        """Add the items of one test function."""
+        for item in items:
+            rows = item.get("execution_result") or []
+            self._items["id"].append(item["id"])
+            self._items["function"].append(name)
+            self._items["template_id"].append(self.template_ids.get(name))
+            self._items["input"].append(item.get("input"))
+            self._items["expected_output"].append(item.get("expected_output"))
+            self._items["result_rows"].append(len(rows))
+            for row_idx, row in enumerate(rows):
+                for col_idx, value in enumerate(row):
+                    self._add_value(item["id"], row_idx, col_idx, value)
+            self._buffered += 1
+            if self._buffered >= self.row_group_size:
+                self._flush()
+
+    def _add_value(self, item_id: str, row_idx: int, col_idx: int, value) -> None:
+        if isinstance(value, Decimal):
+            value = int(value) if value % 1 == 0 else float(value)
+        int_value = float_value = text_value = None
+        if isinstance(value, (bool, int)):
+            int_value = int(value)
+        elif isinstance(value, float):
+            float_value = value
+        elif value is not None:
+            text_value = str(value)
+        for column, column_value in zip(self.results_schema.names, (item_id, row_idx, col_idx, int_value, float_value, text_value)):
+            self._results[column].append(column_value)
+
+    def _flush(self) -> None:
+        if self._buffered:
+            self._items_writer.write_table(self._pa.table(self._items, schema=self.items_schema))
+            self._results_writer.write_table(self._pa.table(self._results, schema=self.results_schema))
+        for columns in (self._items, self._results):
+            for values in columns.values():
+                values.clear()
+        self._buffered = 0
+
+    def close(self, complete: bool = True) -> None:
+        self._flush()
+        self._items_writer.close()
+        self._results_writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a JSONL dataset to a dataset.json array")
+    parser.add_argument("src", help="JSONL dataset (.jsonl or .jsonl.zst)")
+    parser.add_argument("dst", help="Output JSON file")
+    args = parser.parse_args()
+    print(f"Wrote {jsonl_to_json(args.src, args.dst)} item(s) to {args.dst}")
@@ -0,0 +1,398 @@
+"""
+Registry of the SQL files behind SqlTest's test functions.
+
+TEST_FUNCTIONS lists every test function: its template and candidate query
+ids, question text and extra arguments. SqlTest gets one method per entry,
+so adding a test function is one line here plus its SQL files.
+
+template/F*.sql hold the question header and the template SQL, query/Q*.sql
+the candidate queries that pick parameter values. The registry scans both
+directories once and keeps every file parsed: the description header with
+its <ARG-KIND><n> placeholders, the SQL body and the %(name)s parameters.
+Each template's parameters are compiled into a BindingPlan that maps the
+values of a candidate row to them. The registry also selects test functions
+by template/query id, name glob or tag.
+
+Usage:
+    registry = TemplateRegistry(template_dir, query_dir)
+    registry.template("patients_condition_age").placeholders
+    registry.select(["F0013", "patients_*drugs*", "tag:condition"])
+"""
+
+import re
+from fnmatch import fnmatchcase
+from pathlib import Path
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Test functions: method name -> (template id, candidate query id or None, question text, *extra arguments).
+# With a candidate query the question's {n} fields are filled from each candidate row, and the extra
+# arguments are bound as the template's days; without one the template runs once as is.
+TEST_FUNCTIONS = {
+    "patients_group_by_gender_and_ethn": ("F0001", None, "Number of patients grouped by gender and ethnicity."),
+    "patients_group_by_race": ("F0002", None, "Count of patients grouped by race."),
+    "patients_2drugs_and_time": ("F0003", "Q0001", "Counts of patients taking drug {0} and {1} within 30 days.", 30),
+    "patients_2drugs_and": ("F0004", "Q0002", "Counts of patients taking drug {0} and {1}."),
+    "patients_2drugs_or": ("F0005", "Q0003", "Counts of patients taking drug {0} or {1}."),
+    "patients_4drugs_and_time": (
+        "F0006", "Q0004",
+        "Counts of patients taking drug {0}, {1}, {2} and {3} within 30 days.", 30,
+    ),
+    "patients_4drugs_and": ("F0007", "Q0005", "Counts of patients taking drug {0}, {1}, {2} and {3}."),
+    "patients_4drugs_or": ("F0008", "Q0006", "Counts of patients taking drug {0}, {1}, {2} or {3}."),
+    "patients_3drugs_and_time": (
+        "F0009", "Q0007",
+        "Counts of patients taking drug {0}, {1} and {2} within 30 days.", 30,
+    ),
+    "patients_3drugs_and": ("F0010", "Q0008", "Counts of patients taking drug {0}, {1} and {2}."),
+    "patients_3drugs_or": ("F0011", "Q0009", "Counts of patients taking drug {0}, {1} or {2}."),
+    "patients_2conditions_and_time": (
+        "F0012", "Q0010",
+        "Counts of patients with condition {0} and {1} within 30 days.", 30,
+    ),
+    "patients_2conditions_and": ("F0013", "Q0011", "Counts of patients with condition {0} and {1}."),
+    "patients_2conditions_or": ("F0014", "Q0012", "Counts of patients with condition {0} or {1}."),
+    "patients_4conditions_and_time": (
+        "F0015", "Q0013",
+        "Counts of patients with condition {0}, {1}, {2} and {3} within 1000 days.", 1000,
+    ),
+    "patients_4conditions_and": ("F0016", "Q0014", "Counts of patients with condition {0}, {1}, {2} and {3}."),
+    "patients_4conditions_or": ("F0017", "Q0015", "Counts of patients with condition {0}, {1}, {2} or {3}."),
+    "patients_3conditions_and_time": (
+        "F0018", "Q0016",
+        "Counts of patients with condition {0}, {1} and {2} within 300 days.", 300,
+    ),
+    "patients_3conditions_and": ("F0019", "Q0017", "Counts of patients with condition {0}, {1} and {2}."),
+    "patients_3conditions_or": ("F0020", "Q0018", "Counts of patients with condition {0}, {1} or {2}."),
+    "patients_distribution_by_birth": ("F0021", None, "Distribution of patients by year of birth."),
+    "patients_condition_followed_condition": (
+        "F0022", "Q0019",
+        "How many people have condition {0} followed by condition {1}?",
+    ),
+    "patients_condition_time_condition": (
+        "F0023", "Q0020",
+        "How many people have condition {1} more than 30 days after diagnosed by condition {0}?", 30,
+    ),
+    "patients_condition_age": ("F0024", "Q0021", "How many people have condition {0} at age {1}?"),
+    "patients_condition_race": ("F0025", "Q0022", "How many people have condition {0} in the cohort of race {1}?"),
+    "patients_condition_state": ("F0026", "Q0023", "How many people have condition {0} in the state {1}?"),
+    "patients_condition_year": ("F0027", "Q0024", "How many people were diagnosed with condition {0} in year {1}?"),
+    "patients_drug_time_drug": (
+        "F0028", "Q0025",
+        "How many people have treated by drug {1} after more than 30 days of starting with drug {0}?", 30,
+    ),
+    "patients_drug_followed_drug": ("F0029", "Q0026", "How many people have treated by drug {0} followed by drug {1}?"),
+    "patients_condition_ethnicity": (
+        "F0030", "Q0027",
+        "How many people have condition {0} in the cohort of ethnicity {1}?",
+    ),
+    "patients_drug_year": ("F0031", "Q0028", "How many people were taking drug {0} in year {1}."),
+    "patients_drug_after_condition": (
+        "F0032", "Q0029",
+        "How many people took drug {1} after being diagnosed with condition {0}?",
+    ),
+    "patients_drug_time_after_condition": (
+        "F0033", "Q0030",
+        "How many people were treated by drug {1} more than 30 days after being diagnosed with condition {0}?", 30,
+    ),
+    "patients_gender_condition": ("F0034", "Q0031", "Number of {0} patients with {1}."),
+    "patients_year": ("F0035", "Q0032", "Number of patients born in year {0}."),
+    "patients_gender_state": ("F0036", None, "Number of patients by gender and state."),
+    "patients_group_by_ethnicity_location": (
+        "F0037", None,
+        "Number of patients grouped by ethnicity and residence state location.",
+    ),
+    "patients_group_by_ethnicity_birth": ("F0038", None, "Number of patients grouped by ethnicity and year of birth."),
+    "patients_group_by_ethnicity": ("F0039", None, "Number of patients grouped by ethnicity."),
+    "patients_group_by_gender": ("F0040", None, "Number of patients grouped by gender."),
+    "patients_group_by_race_ethnicity": ("F0041", None, "Number of patients grouped by race and ethnicity."),
+    "patients_grouped_by_race_gender": ("F0042", None, "Number of patients grouped by race and gender."),
+    "patients_group_by_race_location": (
+        "F0043", None,
+        "Number of patients grouped by race and residence state location.",
+    ),
+    "patients_group_by_race_birth": ("F0044", None, "Number of patients grouped by race and year of birth."),
+    "patients_group_by_location": ("F0045", None, "Number of patients grouped by residence state location."),
+    "patients_group_by_birth_gender": ("F0046", None, "Number of patients grouped by year of birth and gender."),
+    "patients_group_by_birth_location": (
+        "F0047", None,
+        "Number of patients grouped by year of birth and residence state location.",
+    ),
+    "patients_count": ("F0048", None, "Number of patients in the dataset."),
+    "patients_count_by_ethnicity": ("F0049", "Q0033", "Number of patients of ethnicity {0}."),
+    "patients_count_by_race": ("F0050", "Q0034", "Number of patients of race {0}."),
+    "patients_count_by_gender": ("F0051", "Q0035", "Number of patients of specific gender {0}."),
+    "patients_drug": ("F0052", "Q0036", "Number of patients taking {0}."),
+    "patients_condition": ("F0053", "Q0037", "Number of patients with {0}."),
+    "patients_count_by_location": ("F0054", "Q0038", "Number of patients with residence state location at {0}."),
+    "patients_condition_group_by_year": (
+        "F0055", "Q0039",
+        "Counts of patients with condition {0} grouped by year of diagnosis.",
+    ),
+    "patients_drug_group_by_year": (
+        "F0056", "Q0040",
+        "Counts of patients taking drug {0} grouped by year of prescription.",
+    ),
+}
+
+# Mapping from test method names to template file ids
+FUNCTION_TEMPLATES = {name: function[0] for name, function in TEST_FUNCTIONS.items()}
+
+# Mapping from test method names to candidate query file ids
+FUNCTION_QUERIES = {name: function[1] for name, function in TEST_FUNCTIONS.items() if function[1]}
+
+# Placeholder in a template header, e.g. <ARG-CONDITION><0>
+_PLACEHOLDER = re.compile(r"<ARG-([A-Z]+)><(\d+)>")
+_ARG = re.compile(r"<ARG-[^>]*>(?:<[^>]*>)?")
+
+# Named parameter in template SQL, e.g. %(c_id1)s
+_PARAMETER = re.compile(r"%\((\w+)\)s")
+
+# Parameters bound to the first string value of a row that is not a concept name
+LABEL_PARAMS = ("race", "ethnicity", "state", "location")
+
+# Parameters bound to the last number of a row (or the test function's argument)
+NUMBER_PARAMS = ("age", "year")
+
+
+def split_sql_file(content: str) -> Tuple[str, str]:
+    """Split a SQL file into its description (first comment line) and the SQL without comment lines."""
+    description = ""
+    sql_lines = []
+    for line in content.split('\n'):
+        if line.strip().startswith('--'):
+            if not description:
+                description = line.strip()[2:].strip()
+        else:
+            sql_lines.append(line)
+    return description, '\n'.join(sql_lines).strip()
+
+
+class SqlFile:
+    """A parsed template or query file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.id = path.stem
+        self.description, self.sql = split_sql_file(path.read_text(encoding='utf-8'))
+        # [(kind, index), ...] in header order, e.g. [("condition", 0), ("condition", 1)]
+        self.placeholders: List[Tuple[str, int]] = [
+            (kind.lower(), int(index)) for kind, index in _PLACEHOLDER.findall(self.description)
+        ]
+        # Parameter names in order of first use
+        self.params: List[str] = list(dict.fromkeys(_PARAMETER.findall(self.sql)))
+        self.tags = {kind for kind, _ in self.placeholders}
+        # Header <ARG-...> markers that are not a well-formed placeholder, e.g. "<ARG-GENDER><O>"
+        self.malformed: List[str] = [arg for arg in _ARG.findall(self.description) if not _PLACEHOLDER.fullmatch(arg)]
+
+    def __repr__(self):
+        return f"SqlFile({self.id!r})"
+
+
+class BindingPlan:
+    """
+    How the values of a candidate row bind to a template's parameters,
+    compiled once from the parameter names:
+
+    - v_idN with the N-th concept code parameter (c_idN/d_idN, in order of
+      first use): the concepts the row's strings resolve to, in row order
+    - race, ethnicity, state, location: the first string that is not a concept
+    - gender: the first string
+    - age, year: the last number, else the function's argument
+    - days: the function's argument
+
+    Demographic values can be concept names too (e.g. "MALE"), so templates
+    that also take one use the last concepts of the row; templates mixing
+    condition and drug codes use the first ones. Otherwise the row has to
+    resolve to exactly one concept per slot.
+    """
+
+    def __init__(self, params: List[str]):
+        vocab_params = [name for name in params if re.fullmatch(r"v_id\d+", name)]
+        code_params = [name for name in params if re.fullmatch(r"[cd]_id\d+", name)]
+        self.concepts: List[Tuple[str, str]] = list(zip(vocab_params, code_params))
+        self.labels = [name for name in params if name in LABEL_PARAMS]
+        self.gender = "gender" in params
+        self.number = next((name for name in params if name in NUMBER_PARAMS), None)
+        self.days = "days" in params
+        if self.labels or self.gender:
+            self.concept_order = "last"
+        elif len({name[0] for _, name in self.concepts}) > 1:
+            self.concept_order = "first"
+        else:
+            self.concept_order = "all"
+        # Whether row strings have to be looked up at all
+        self.resolves = bool(self.concepts or self.labels)
+
+    def bind(self, row, resolve: Callable[[str], list], args=()) -> dict:
+        """
+        Bind one candidate row.
+
+        Args:
+            row: Values of the candidate row
+            resolve: Looks a name up, returning its [(vocabulary_id, concept_code)] matches
+            args: Extra arguments of the test function (e.g. the days threshold)
+
+        Returns:
+            Template parameters
+
+        Raises:
+            ValueError: If the row does not resolve to the concepts the template needs
+        """
+        concepts, labels, strings, numbers = [], [], [], []
+        for value in row:
+            if isinstance(value, str):
+                strings.append(value)
+                if self.resolves:
+                    matches = resolve(value)
+                    if matches:
+                        concepts.extend(matches)
+                    else:
+                        labels.append(value)
+            elif isinstance(value, (int, float, Decimal)):
+                numbers.append(value)
+
+        params = {}
+        if self.concepts:
+            slots = len(self.concepts)
+            if len(concepts) < slots or (self.concept_order == "all" and len(concepts) > slots):
+                raise ValueError(f"Expected {slots} concept(s) in row {row!r}, found {len(concepts)}")
+            if self.concept_order == "last":
+                concepts = concepts[-slots:]
+            for (vocab_param, code_param), (vocab_id, code_id) in zip(self.concepts, concepts):
+                params[vocab_param] = vocab_id
+                params[code_param] = code_id
+
+        if labels:
+            for name in self.labels:
+                params[name] = labels[0]
+        if self.gender and strings:
+            params["gender"] = strings[0]
+        if self.number:
+            if numbers:
+                params[self.number] = int(numbers[-1])
+            elif args:
+                params[self.number] = args[0]
+        if self.days and args:
+            params["days"] = args[0]
+        return params
+
+
+class TemplateRegistry:
+    """Parsed template and query files, and the test functions that use them."""
+
+    def __init__(self, template_dir, query_dir, function_templates: Optional[Dict[str, str]] = None,
+                 function_queries: Optional[Dict[str, str]] = None):
+        self.template_dir = Path(template_dir)
+        self.query_dir = Path(query_dir)
+        self.function_templates = function_templates if function_templates is not None else FUNCTION_TEMPLATES
+        self.function_queries = function_queries if function_queries is not None else FUNCTION_QUERIES
+        self.templates: Dict[str, SqlFile] = self._scan(self.template_dir, "F*.sql")
+        self.queries: Dict[str, SqlFile] = self._scan(self.query_dir, "Q*.sql")
+        self.binding_plans: Dict[str, BindingPlan] = {
+            file_id: BindingPlan(template.params) for file_id, template in self.templates.items()
+        }
+
+    @staticmethod
+    def _scan(directory: Path, pattern: str) -> Dict[str, SqlFile]:
+        return {path.stem: SqlFile(path) for path in sorted(directory.glob(pattern))}
+
+    def template(self, method_name: str) -> SqlFile:
+        """The template file of a test function."""
+        file_id = self.function_templates.get(method_name)
+        if not file_id:
+            raise ValueError(f"No template file found for method: {method_name}")
+        if file_id not in self.templates:
+            raise FileNotFoundError(f"Template file not found: {self.template_dir / f'{file_id}.sql'}")
+        return self.templates[file_id]
+
+    def binding_plan(self, method_name: str) -> BindingPlan:
+        """The binding plan of a test function's template."""
+        return self.binding_plans[self.template(method_name).id]
+
+    def query(self, method_name: str) -> SqlFile:
+        """The candidate query file of a test function."""
+        file_id = self.function_queries.get(method_name)
+        if not file_id:
+            raise ValueError(f"No query file found for method: {method_name}")
+        if file_id not in self.queries:
+            raise FileNotFoundError(f"Query file not found: {self.query_dir / f'{file_id}.sql'}")
+        return self.queries[file_id]
+
+    def files(self, method_name: str) -> List[SqlFile]:
+        """Template and query files of a test function (the ones that exist)."""
+        files = [self.templates.get(self.function_templates.get(method_name)),
+                 self.queries.get(self.function_queries.get(method_name))]
+        return [file for file in files if file is not None]
+
+    def functions(self) -> List[str]:
+        """Test functions with a template file, in template id order."""
+        names = [name for name, file_id in self.function_templates.items() if file_id in self.templates]
+        return sorted(names, key=self.function_templates.get)
+
+    def check(self, method_names: Optional[Iterable[str]] = None):
+        """
+        Check that the function maps and the SQL files agree.
+
+        Every mapped template and query id must have a file, every file must
+        be mapped by some function (a dropped map entry leaves its file
+        orphaned) and every header placeholder must be well-formed.
+
+        Args:
+            method_names: Functions that must have a template (default: all mapped ones)
+
+        Raises:
+            ValueError: Listing every problem found
+        """
+        problems = []
+        for kind, mapping, files in (("template", self.function_templates, self.templates),
+                                     ("query", self.function_queries, self.queries)):
+            for name, file_id in mapping.items():
+                if file_id not in files:
+                    problems.append(f"{name}: {kind} file {file_id}.sql not found")
+            for file_id in sorted(set(files) - set(mapping.values())):
+                problems.append(f"{kind} file {file_id}.sql is not mapped to any test function")
+        for name in method_names or ():
+            if name not in self.function_templates:
+                problems.append(f"{name}: no template file mapped")
+        for file in list(self.templates.values()) + list(self.queries.values()):
+            for arg in file.malformed:
+                problems.append(f"{file.id}.sql: malformed placeholder {arg}")
+        if problems:
+            raise ValueError("Template registry is inconsistent:\n  " + "\n  ".join(problems))
+
+    def tags(self, method_name: str) -> set:
+        """Tags of a test function: the placeholder kinds of its template (e.g. "drug", "timedays")."""
+        return set().union(*(file.tags for file in self.files(method_name)))
+
+    def select(self, patterns: Iterable[str], names: Optional[List[str]] = None) -> List[str]:
+        """
+        Select test functions, in template id order.
+
+        Args:
+            patterns: Each one is a template or query id ("F0013", "Q0003"),
+                "tag:<kind>" (e.g. "tag:drug") or a glob over method names
+                ("patients_*drugs_or")
+            names: Functions to select from (default: all of them)
+
+        Returns:
+            Method names matching any pattern
+
+        Raises:
+            ValueError: If a pattern matches no function
+        """
+        names = self.functions() if names is None else names
+        selected = set()
+        for pattern in patterns:
+            if pattern.startswith("tag:"):
+                tag = pattern[4:].lower()
+                matches = {name for name in names if tag in self.tags(name)}
+            elif re.fullmatch(r"[FQ]\d+", pattern):
+                matches = {name for name in names
+                           if pattern in (self.function_templates.get(name), self.function_queries.get(name))}
+            else:
+                matches = {name for name in names if fnmatchcase(name, pattern)}
+            if not matches:
+                raise ValueError(f"No test function matches {pattern!r}")
+            selected |= matches
+        return [name for name in names if name in selected]
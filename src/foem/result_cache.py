@@ -0,0 +1,112 @@
+"""
+Content-addressed on-disk cache of query results.
+
+Entries are keyed by a hash of (final SQL, bound parameters, backend,
+database fingerprint), so any change to a template, its parameters or the
+data behind it produces a different key and stale entries simply age out.
+The cache is bounded in size and evicts least recently used entries.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+# Fraction of max_bytes to shrink to when the cache overflows
+_EVICT_TO = 0.9
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of fetched rows, stored as one pickle file per entry.
+
+    Reads refresh the entry's modification time, which is what eviction
+    orders by, so several processes can share a cache directory.
+    """
+
+    def __init__(self, directory, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = sum(path.stat().st_size for path in self._entries())
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultCache"]:
+        """
+        Create the cache configured by the environment, if any.
+
+        - FOEM_RESULT_CACHE_DIR: Cache directory (cache disabled when unset)
+        - FOEM_RESULT_CACHE_MAX_MB: Size bound in megabytes (default: 1024)
+        """
+        directory = os.getenv("FOEM_RESULT_CACHE_DIR")
+        if not directory:
+            return None
+        max_mb = int(os.getenv("FOEM_RESULT_CACHE_MAX_MB", 1024))
+        return cls(Path(directory).expanduser(), max_bytes=max_mb * 1024 * 1024)
+
+    @staticmethod
+    def key(sql: str, params: Optional[dict], backend: str, fingerprint: str) -> str:
+        """Content hash identifying a query execution."""
+        payload = json.dumps([sql, params or {}, backend, fingerprint], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def _entries(self):
+        return self.directory.glob("*/*.pkl")
+
+    def get(self, key: str) -> Optional[List[tuple]]:
+        """Return the cached rows for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                rows = pickle.load(f)
+            os.utime(path)
+            return rows
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # Truncated or unreadable entry: treat as a miss, it gets rewritten
+            return None
+
+    def put(self, key: str, rows) -> None:
+        """Store rows (as plain tuples) under key, evicting old entries if needed."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = pickle.dumps([tuple(row) for row in rows], protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache is below its bound."""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = self.max_bytes * _EVICT_TO
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+                size -= entry_size
+            except FileNotFoundError:
+                continue
+        self._size = size
@@ -1,197 +1,211 @@
 from .config import get_db_connection
+from .registry import FUNCTION_QUERIES, FUNCTION_TEMPLATES, TEST_FUNCTIONS, TemplateRegistry
+from .result_cache import ResultCache
 from .transpiler import transpile_query
-from typing import Dict
+from .vocab_snapshot import VocabSnapshot, pack_vocab
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
-from sqlalchemy import text as sql_text
+from sqlalchemy import bindparam, text as sql_text
+from sqlalchemy.exc import SQLAlchemyError
+import hashlib
+import json
 import re
 import os
+import sqlglot
+import threading
+
+# Standard vocabularies used to resolve concept names, per domain
+VOCABULARIES = {
+    "Drug": ["RxNorm", "ATC", "SPL"],
+    "Condition": ["SNOMED", "ICD10CM"],
+}
+VOCABULARY_IDS = [vocab for vocab_list in VOCABULARIES.values() for vocab in vocab_list]
+
+# Vocabulary resolution modes:
+# - eager: load every standard concept of VOCABULARIES up front
+# - lazy: resolve only the names returned by candidate queries, in batches
+# - snapshot: memory-map a local snapshot keyed by vocabulary versions,
+#   rebuilding it from the concept table when the versions change
+# - shared: attach to a snapshot published in shared memory by a parent
+#   process (see SqlTest.publish_vocab)
+VOCAB_MODES = ("eager", "lazy", "snapshot", "shared")
+
+# Maximum number of names per batched concept_name lookup in lazy mode
+RESOLVE_CHUNK_SIZE = 1000
+
+# Named bind parameters (:name), matched the same way SQLAlchemy text() does
+_BIND_PARAM = re.compile(r'(?<![:\w\\]):(\w+)(?![:\w])')
+
+# Clinical tables and their primary keys: the highest id of each identifies the data for the
+# database fingerprint (an index lookup, where COUNT(*) would scan the table)
+FINGERPRINT_KEYS = {
+    "person": "person_id",
+    "location": "location_id",
+    "observation_period": "observation_period_id",
+    "condition_occurrence": "condition_occurrence_id",
+    "drug_exposure": "drug_exposure_id",
+}
+
+# The database fingerprint queries besides cdm_source: the vocabulary versions (for the concept,
+# concept_relationship and concept_ancestor tables) and the highest id of each FINGERPRINT_KEYS table
+FINGERPRINT_VOCABULARY_QUERY = "SELECT vocabulary_id, vocabulary_version FROM vocabulary ORDER BY vocabulary_id"
+FINGERPRINT_MAX_IDS_QUERY = "SELECT " + ", ".join(
+    f"(SELECT MAX({key}) FROM {table}) AS {table}" for table, key in FINGERPRINT_KEYS.items()
+)
+
 
 class SqlTest:
 
-    def __init__(self, conn=None, result_limit=1):
+    def __init__(self, conn=None, result_limit=1, vocab_mode=None, vocab_shm=None, row_workers=None,
+                 batch_size=None, result_cache=None):
+        self._owns_engine = conn is None
         self.conn = conn or get_db_connection()
+        # One connection per worker thread, held for the whole run (see _cursor)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Template executions per candidate query that may run concurrently
+        self.row_workers = int(row_workers or os.getenv("FOEM_ROW_WORKERS", 1))
+        self._row_executor = None
+        # Parameter sets sent per statement in batched mode (0 or 1: one statement per row)
+        self.batch_size = int(batch_size or os.getenv("FOEM_BATCH_SIZE", 0))
+        # Whether each template's rows can be batched (see _batchable)
+        self._batchable_templates: Dict[str, bool] = {}
+        # On-disk cache of query results (disabled unless FOEM_RESULT_CACHE_DIR is set)
+        self.result_cache: Optional[ResultCache] = result_cache if result_cache is not None else ResultCache.from_env()
+        self._db_fingerprint = None
         self.template_dir = Path(__file__).parent.parent.parent / "template"
         self.query_dir = Path(__file__).parent.parent.parent / "query"
-        self.vocab_dict = self.__build_vocab_dict()
-        self._id = 1
+        self.vocab_mode = (vocab_mode or os.getenv("FOEM_VOCAB_MODE", "eager")).lower()
+        if self.vocab_mode not in VOCAB_MODES:
+            raise ValueError(f"Unsupported vocab_mode: {self.vocab_mode} (expected one of {VOCAB_MODES})")
+
+        self.vocab_snapshot_dir = Path(os.getenv("FOEM_VOCAB_SNAPSHOT_DIR", Path.home() / ".cache" / "foem")).expanduser()
+        self._vocab_snapshot = None
+
+        if self.vocab_mode == "lazy":
+            self._vocab_dict = {vocab: {} for vocab in VOCABULARY_IDS}
+            self._name_index: Dict[str, List[Tuple[str, str]]] = {}
+        elif self.vocab_mode in ("snapshot", "shared"):
+            if self.vocab_mode == "shared":
+                vocab_shm = vocab_shm or os.getenv("FOEM_VOCAB_SHM")
+                if not vocab_shm:
+                    raise ValueError("vocab_mode='shared' requires vocab_shm or the FOEM_VOCAB_SHM environment variable")
+                self._vocab_snapshot = VocabSnapshot.attach(vocab_shm)
+            else:
+                self._vocab_snapshot = self.__load_vocab_snapshot()
+            self._vocab_dict = None
+            self._name_index = self._vocab_snapshot
+        else:
+            self._vocab_dict = self.__build_vocab_dict()
+            self._name_index = self.__build_name_index(self._vocab_dict)
+        self._resolved_names: Dict[str, List[Tuple[str, str]]] = {}
         self.result_limit = result_limit
 
-        # Mapping from template method names to SQL file numbers
-        self.template_map = {
-            "patients_group_by_gender_and_ethn": "F0001",
-            "patients_group_by_race": "F0002",
-            "patients_2drugs_and_time": "F0003",
-            "patients_2drugs_and": "F0004",
-            "patients_2drugs_or": "F0005",
-            "patients_4drugs_and_time": "F0006",
-            "patients_4drugs_and": "F0007",
-            "patients_4drugs_or": "F0008",
-            "patients_3drugs_and_time": "F0009",
-            "patients_3drugs_and": "F0010",
-            "patients_3drugs_or": "F0011",
-            "patients_2conditions_and_time": "F0012",
-            "patients_2conditions_and": "F0013",
-            "patients_2conditions_or": "F0014",
-            "patients_4conditions_and_time": "F0015",
-            "patients_4conditions_and": "F0016",
-            "patients_4conditions_or": "F0017",
-            "patients_3conditions_and_time": "F0018",
-            "patients_3conditions_and": "F0019",
-            "patients_3conditions_or": "F0020",
-            "patients_distribution_by_birth": "F0021",
-            "patients_condition_followed_condition": "F0022",
-            "patients_condition_time_condition": "F0023",
-            "patients_condition_age": "F0024",
-            "patients_condition_race": "F0025",
-            "patients_condition_state": "F0026",
-            "patients_condition_year": "F0027",
-            "patients_drug_time_drug": "F0028",
-            "patients_drug_followed_drug": "F0029",
-            "patients_condition_ethnicity": "F0030",
-            "patients_drug_year": "F0031",
-            "patients_drug_after_condition": "F0032",
-            "patients_drug_time_after_condition": "F0033",
-            "patients_gender_condition": "F0034",
-            "patients_year": "F0035",
-            "patients_gender_state": "F0036",
-            "patients_group_by_ethnicity_location": "F0037",
-            "patients_group_by_ethnicity_birth": "F0038",
-            "patients_group_by_ethnicity": "F0039",
-            "patients_group_by_gender": "F0040",
-            "patients_group_by_race_ethnicity": "F0041",
-            "patients_grouped_by_race_gender": "F0042",
-            "patients_group_by_race_location": "F0043",
-            "patients_group_by_race_birth": "F0044",
-            "patients_group_by_location": "F0045",
-            "patients_group_by_birth_gender": "F0046",
-            "patients_group_by_birth_location": "F0047",
-            "patients_count": "F0048",
-            "patients_count_by_ethnicity": "F0049",
-            "patients_count_by_race": "F0050",
-            "patients_count_by_gender": "F0051",
-            "patients_drug": "F0052",
-            "patients_condition": "F0053",
-            "patients_count_by_location": "F0054",
-            "patients_condition_group_by_year": "F0055",
-            "patients_drug_group_by_year": "F0056",
-        }
-
-        # Mapping from query method names to SQL file numbers
-        self.query_map = {
-            "patients_2drugs_and_time": "Q0001",
-            "patients_2drugs_and": "Q0002",
-            "patients_2drugs_or": "Q0003",
-            "patients_4drugs_and_time": "Q0004",
-            "patients_4drugs_and": "Q0005",
-            "patients_4drugs_or": "Q0006",
-            "patients_3drugs_and_time": "Q0007",
-            "patients_3drugs_and": "Q0008",
-            "patients_3drugs_or": "Q0009",
-            "patients_2conditions_and_time": "Q0010",
-            "patients_2conditions_and": "Q0011",
-            "patients_2conditions_or": "Q0012",
-            "patients_4conditions_and_time": "Q0013",
-            "patients_4conditions_and": "Q0014",
-            "patients_4conditions_or": "Q0015",
-            "patients_3conditions_and_time": "Q0016",
-            "patients_3conditions_and": "Q0017",
-            "patients_3conditions_or": "Q0018",
-            "patients_condition_followed_condition": "Q0019",
-            "patients_condition_time_condition": "Q0020",
-            "patients_condition_age": "Q0021",
-            "patients_condition_race": "Q0022",
-            "patients_condition_state": "Q0023",
-            "patients_condition_year": "Q0024",
-            "patients_drug_time_drug": "Q0025",
-            "patients_drug_followed_drug": "Q0026",
-            "patients_condition_ethnicity": "Q0027",
-            "patients_drug_year": "Q0028",
-            "patients_drug_after_condition": "Q0029",
-            "patients_drug_time_after_condition": "Q0030",
-            "patients_gender_condition": "Q0031",
-            "patients_year": "Q0032",
-            "patients_count_by_ethnicity": "Q0033",
-            "patients_count_by_race": "Q0034",
-            "patients_count_by_gender": "Q0035",
-            "patients_drug": "Q0036",
-            "patients_condition": "Q0037",
-            "patients_count_by_location": "Q0038",
-            "patients_condition_group_by_year": "Q0039",
-            "patients_drug_group_by_year": "Q0040",
-        }
+        # Mapping from method names to template/query file ids
+        self.template_map = dict(FUNCTION_TEMPLATES)
+        self.query_map = dict(FUNCTION_QUERIES)
+        self._registry = None
     
+    @property
+    def registry(self) -> TemplateRegistry:
+        """Parsed template and query files, scanned once on first use."""
+        if self._registry is None:
+            self._registry = TemplateRegistry(self.template_dir, self.query_dir, self.template_map, self.query_map)
+        return self._registry
+
+    @property
+    def vocab_dict(self) -> dict:
+        """
+        Nested {vocabulary_id: {concept_code: concept_name}} dict.
+        Unpacked from the snapshot on first access in snapshot mode.
+        """
+        if self._vocab_dict is None:
+            self._vocab_dict = self._vocab_snapshot.to_vocab_dict()
+        return self._vocab_dict
+
+    def publish_vocab(self, name=None):
+        """
+        Publish this instance's vocabulary in a read-only shared memory segment.
+
+        Worker processes then create SqlTest(vocab_mode="shared", vocab_shm=shm.name)
+        and look names up in the segment without building or copying the vocabulary.
+        The caller owns the returned SharedMemory: keep it open while workers run,
+        then close() and unlink() it.
+
+        Args:
+            name: Optional segment name (generated when omitted)
+
+        Returns:
+            multiprocessing.shared_memory.SharedMemory
+        """
+        if self.vocab_mode == "lazy":
+            raise ValueError("Cannot publish a lazily resolved vocabulary; use eager or snapshot mode")
+        snapshot = self._vocab_snapshot
+        if snapshot is None:
+            snapshot = VocabSnapshot(pack_vocab(self._vocab_dict, self.__vocab_version_key()))
+        return snapshot.publish(name)
+
     def close(self) -> None:
-        """Close the database connection."""
+        """Close the database connections (and the engine, if SqlTest created it)."""
         try:
-            if self.conn:
-                self.conn.close()
+            if self._vocab_snapshot:
+                self._vocab_snapshot.close()
+                self._vocab_snapshot = None
+            if self._row_executor:
+                self._row_executor.shutdown()
+                self._row_executor = None
+            with self._connections_lock:
+                connections, self._connections = self._connections, []
+            for connection in connections:
+                connection.close()
+            if self.conn and self._owns_engine:
+                self.conn.dispose()
         finally:
             self.conn = None
 
     def _read_template(self, method_name: str):
-        """Read SQL template from template folder based on method name."""
-        file_id = self.template_map.get(method_name)
-        if not file_id:
-            raise ValueError(f"No template file found for method: {method_name}")
-
-        file_path = self.template_dir / f"{file_id}.sql"
-        if not file_path.exists():
-            raise FileNotFoundError(f"Template file not found: {file_path}")
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Extract the description (first comment line) and SQL
-        lines = content.split('\n')
-        description = ""
-        sql_lines = []
-
-        for line in lines:
-            if line.strip().startswith('--'):
-                if not description:
-                    description = line.strip()[2:].strip()
-            else:
-                sql_lines.append(line)
-
-        sql = '\n'.join(sql_lines).strip()
-        return sql, description
+        """Return the SQL and description of a method's template (parsed once by the registry)."""
+        template = self.registry.template(method_name)
+        return template.sql, template.description
 
     def _read_query(self, method_name: str):
-        """Read SQL query from query folder based on method name."""
-        file_id = self.query_map.get(method_name)
-        if not file_id:
-            raise ValueError(f"No query file found for method: {method_name}")
-
-        file_path = self.query_dir / f"{file_id}.sql"
-        if not file_path.exists():
-            raise FileNotFoundError(f"Query file not found: {file_path}")
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        """Return the SQL of a method's candidate query (parsed once by the registry)."""
+        return self.registry.query(method_name).sql
 
-        # Extract SQL (skip comment lines)
-        lines = content.split('\n')
-        sql_lines = []
-
-        for line in lines:
-            if not line.strip().startswith('--'):
-                sql_lines.append(line)
-
-        return '\n'.join(sql_lines).strip()
+    def source_files(self, method_name: str) -> List[Path]:
+        """Template and query files read by a test function (the ones that exist)."""
+        return [file.path for file in self.registry.files(method_name)]
 
     def _get_template_sql(self, method_name: str, params: dict = None):
         """Get SQL template and return it with parameters."""
         sql, description = self._read_template(method_name)
         return sql, params or {}
 
-    def find_code_by_name(self, name: str, vocab_dict: dict):
+    def find_code_by_name(self, name: str, vocab_dict: dict = None):
         """
         Given a drug/concept name (case-insensitive) and a dictionary in the form:
             {"RxNorm": {"concept_code": "concept_name", ...}, ...}
 
         Return list of [(vocabulary_id, concept_code)] for ALL matches found.
+
+        Lookups against this instance's own vocabulary (the default) go through
+        the name index and are memoized for the lifetime of the run. In lazy
+        mode, names that were not resolved yet are looked up in the database.
+        Any other dictionary is scanned linearly.
         """
+        if vocab_dict is None or vocab_dict is self._vocab_dict:
+            resolved = self._resolved_names.get(name)
+            if resolved is None:
+                key = name.lower()
+                if self.vocab_mode == "lazy" and key not in self._name_index:
+                    self.resolve_names([name])
+                resolved = list(self._name_index.get(key, ()))
+                self._resolved_names[name] = resolved
+            return resolved
+
         results = []
         for vocab_id, codes in vocab_dict.items():
             for concept_code, concept_name in codes.items():
@@ -204,11 +218,17 @@ class SqlTest:
         db_type = os.getenv("DB_TYPE", "postgresql").lower()
         return db_type == "databricks"
 
-    def _maybe_transpile(self, query: str) -> str:
-        """Transpile query from PostgreSQL to Databricks if using Databricks."""
+    def _maybe_transpile(self, query: str, format_fields: bool = False) -> str:
+        """
+        Transpile query from PostgreSQL to Databricks if using Databricks.
+
+        With format_fields, query is a str.format template (a candidate query)
+        and is returned as one, with its {fields} untouched.
+        """
         if self._is_databricks():
             try:
-                return transpile_query(query, source_dialect="postgres", target_dialect="databricks")
+                return transpile_query(query, source_dialect="postgres", target_dialect="databricks",
+                                       format_fields=format_fields)
             except Exception as e:
                 print(f"Warning: Failed to transpile query: {e}")
                 return query
@@ -216,134 +236,259 @@ class SqlTest:
 
     @contextmanager
     def _cursor(self):
-        """Context manager for database connection."""
-        conn = self.conn.connect()
+        """
+        Context manager for database connection.
+
+        Each thread checks out one pooled connection on first use and keeps it
+        for the rest of the run, so queries don't pay for connection setup.
+        The implicit transaction is rolled back after every use so the session
+        never sits idle in a transaction.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = self.conn.connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
         try:
             yield conn
         finally:
-            conn.close()
+            try:
+                conn.rollback()
+            except Exception:
+                # Broken session: drop it so the next query reconnects
+                self._local.conn = None
+                with self._connections_lock:
+                    if conn in self._connections:
+                        self._connections.remove(conn)
+                conn.invalidate()
+
+    @staticmethod
+    def _text(query: str, params=None):
+        """
+        Convert a %(param)s query to a SQLAlchemy text() clause.
+        List/tuple parameters become expanding IN parameters.
+        """
+        converted_query = re.sub(r'%\((\w+)\)s', r':\1', query)
+        clause = sql_text(converted_query)
+        expanding = [bindparam(key, expanding=True) for key, value in (params or {}).items() if isinstance(value, (list, tuple))]
+        return clause.bindparams(*expanding) if expanding else clause
 
     def _run_query(self, query: str, params=None):
         """Helper to execute a query and fetch all results."""
-        query = self._maybe_transpile(query)
-        converted_query = re.sub(r'%\((\w+)\)s', r':\1', query)
+        return self._cached_fetch(self._maybe_transpile(query), params)
 
+    def _fetch(self, query: str, params=None) -> list:
+        """Execute a %(param)s query and fetch all results."""
         with self._cursor() as cur:
-            if params:
-                result = cur.execute(sql_text(converted_query), params)
-            else:
-                result = cur.execute(sql_text(converted_query))
-            return result.fetchall()
+            return cur.execute(self._text(query, params), params or {}).fetchall()
+
+    def _cached_fetch(self, query: str, params=None) -> list:
+        """Same as _fetch, but served from the result cache when possible."""
+        key = self._result_key(query, params)
+        rows = self.result_cache.get(key) if key else None
+        if rows is None:
+            rows = self._fetch(query, params)
+            if key:
+                self.result_cache.put(key, rows)
+        return rows
+
+    def _result_key(self, query: str, params=None) -> Optional[str]:
+        """Result cache key of an (already transpiled) query, or None when caching is off."""
+        if self.result_cache is None:
+            return None
+        return ResultCache.key(query, params, self.conn.dialect.name, self.db_fingerprint())
+
+    def db_fingerprint(self) -> str:
+        """
+        Identify the database contents: the cdm_source metadata, the
+        vocabulary versions and the highest id of each FINGERPRINT_KEYS table.
+        All of them are cheap lookups, so every run can afford it. A refresh
+        that only updates or deletes rows, without touching cdm_source or the
+        highest ids, goes unnoticed. Computed once per SqlTest instance, so a
+        data refresh is picked up by the next run.
+        """
+        if self._db_fingerprint is None:
+            try:
+                source = self._fetch("SELECT * FROM cdm_source")
+            except SQLAlchemyError:
+                source = []
+            versions = self._fetch(FINGERPRINT_VOCABULARY_QUERY)
+            max_ids = self._fetch(FINGERPRINT_MAX_IDS_QUERY)[0]
+            self._db_fingerprint = self._make_fingerprint(source, versions, max_ids)
+        return self._db_fingerprint
+
+    @staticmethod
+    def _make_fingerprint(source, versions, max_ids) -> str:
+        payload = json.dumps({
+            "cdm_source": [list(row) for row in source],
+            "vocabularies": [list(row) for row in versions],
+            "max_ids": dict(zip(FINGERPRINT_KEYS, max_ids)),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
     def _process_results(self, results, text_template, template_method_name, *args):
-        """Helper to process results, format text, read template from file, and return output data."""
-        import re
-        from decimal import Decimal
+        """
+        Helper to process results, format text, read template from file, and return output data.
+
+        Parameters are bound for every candidate row first with the template's
+        BindingPlan; the template queries then run on up to row_workers
+        threads, or batch_size parameter sets per statement in batched mode
+        (for templates that can be batched, see _batchable). Output keeps the
+        candidate order, so ids are the same as in a sequential run.
+        """
+        query, _ = self._read_template(template_method_name)
+        query = self._maybe_transpile(query)
+
+        texts = [text_template.format(*row) for row in results]
+        plan = self.registry.binding_plan(template_method_name)
+        param_sets = [plan.bind(row, self.find_code_by_name, args) for row in results]
+        if self.batch_size > 1 and len(param_sets) > 1 and self._batchable(template_method_name, query):
+            executed = self._execute_template_batched(query, param_sets)
+        else:
+            executed = self._map_rows(lambda params: self._execute_template(query, params), param_sets)
+
         output = []
-        for row in results:
-            text = text_template.format(*row)
-            ids = [self.find_code_by_name(val, self.vocab_dict) for val in row if isinstance(val, str)]
-            ids_flat = [item for sublist in ids for item in sublist]
-
-            params = {}
-            if 'drug_after_condition' in template_method_name or 'drug_time_after_condition' in template_method_name:
-                if len(ids_flat) >= 2:
-                    params['v_id1'] = ids_flat[0][0]
-                    params['c_id1'] = ids_flat[0][1]
-                    params['v_id2'] = ids_flat[1][0]
-                    params['d_id1'] = ids_flat[1][1]
-            elif 'drugs' in template_method_name or 'drug' in template_method_name:
-                for idx, (vocab_id, code_id) in enumerate(ids_flat, start=1):
-                    params[f'v_id{idx}'] = vocab_id
-                    params[f'd_id{idx}'] = code_id
-            elif 'condition' in template_method_name:
-                # Special case: if method also has 'gender', 'race', 'ethnicity', or 'state'
-                # only use the LAST concept (the condition), not demographic values
-                if any(keyword in template_method_name for keyword in ['gender', 'race', 'ethnicity', 'state']):
-                    # Only use the last concept found (should be the condition)
-                    if ids_flat:
-                        vocab_id, code_id = ids_flat[-1]
-                        params['v_id1'] = vocab_id
-                        params['c_id1'] = code_id
-                else:
-                    # Normal condition processing - use all concepts
-                    for idx, (vocab_id, code_id) in enumerate(ids_flat, start=1):
-                        params[f'v_id{idx}'] = vocab_id
-                        params[f'c_id{idx}'] = code_id
-
-            if 'age' in template_method_name:
-                age_values = [val for val in row if isinstance(val, (int, float, Decimal))]
-                if age_values:
-                    params['age'] = int(age_values[-1])
-                elif args:
-                    params['age'] = args[0]
-            elif 'year' in template_method_name:
-                # Don't create year parameter for group_by methods - they GROUP BY year, not filter by it
-                if 'group_by_year' not in template_method_name:
-                    year_values = [val for val in row if isinstance(val, (int, float, Decimal))]
-                    if year_values:
-                        params['year'] = int(year_values[-1])
-                    elif args:
-                        params['year'] = args[0]
-            elif args:
-                if 'time' in template_method_name or 'days' in template_method_name:
-                    params['days'] = args[0]
-
-            string_values = [val for val in row if isinstance(val, str) and val not in [item for sublist in ids for item in sublist]]
-
-            if 'race' in template_method_name:
-                for val in row:
-                    if isinstance(val, str) and not self.find_code_by_name(val, self.vocab_dict):
-                        params['race'] = val
-                        break
-
-            if 'ethnicity' in template_method_name:
-                for val in row:
-                    if isinstance(val, str) and not self.find_code_by_name(val, self.vocab_dict):
-                        params['ethnicity'] = val
-                        break
-
-            if 'gender' in template_method_name:
-                # Extract gender value from row
-                if 'condition' in template_method_name or 'drug' in template_method_name:
-                    # For methods with gender + condition/drug, gender is the first string value
-                    gender_values = [val for val in row if isinstance(val, str)]
-                    if gender_values:
-                        params['gender'] = gender_values[0]
-                else:
-                    # For standalone gender methods, extract the gender value directly
-                    # (it may be a concept name like "MALE" or a non-concept string)
-                    for val in row:
-                        if isinstance(val, str):
-                            params['gender'] = val
-                            break
-
-            if 'state' in template_method_name or 'location' in template_method_name:
-                for val in row:
-                    if isinstance(val, str) and not self.find_code_by_name(val, self.vocab_dict):
-                        params['state'] = val
-                        params['location'] = val
-                        break
-
-            query, _ = self._read_template(template_method_name)
-            query = self._maybe_transpile(query)
-            sql_raw = self.__finalise_sql(query, params, self.conn)
-            sql = re.sub(r'\s+', ' ', sql_raw).strip()
-
-            converted_query = re.sub(r'%\((\w+)\)s', r':\1', query)
-            with self._cursor() as cur:
-                result = cur.execute(sql_text(converted_query), params)
-                query_result = result.fetchall()
+        for idx, (text, (sql, query_result)) in enumerate(zip(texts, executed)):
             output.append({
-                "id": self._id,
+                "id": self._item_id(template_method_name, idx),
                 "input": text,
                 "expected_output": sql,
                 "execution_result": query_result
             })
-            self._id += 1
         return output
 
-    def _add_result(self, text, query, params):
+    def _item_id(self, method_name: str, index: int) -> str:
+        """
+        Stable item id: the template file id plus the candidate index, e.g.
+        "F0013-2". Ids don't depend on which other functions ran or in what
+        order, so partial, parallel and sharded runs produce the same ids.
+        """
+        return f"{self.template_map[method_name]}-{index}"
+
+    def _map_rows(self, func, items) -> list:
+        """
+        Apply func to every item, concurrently when row_workers > 1.
+        Results are returned in the order of items.
+        """
+        if self.row_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+
+        with self._connections_lock:
+            if self._row_executor is None:
+                self._row_executor = ThreadPoolExecutor(max_workers=self.row_workers, thread_name_prefix="foem-row")
+        return list(self._row_executor.map(func, items))
+
+    def _execute_template(self, query: str, params: dict):
+        """
+        Execute an (already transpiled) template with parameters.
+
+        Returns:
+            Tuple of (display SQL with literal parameters, fetched rows)
+        """
+        return self._display_sql(query, params), self._cached_fetch(query, params)
+
+    def _display_sql(self, query: str, params: dict) -> str:
+        """Final SQL with literal parameters on a single line, as stored in expected_output."""
+        sql_raw = self.__finalise_sql(query, params, self.conn)
+        return re.sub(r'\s+', ' ', sql_raw).strip()
+
+    def _execute_template_batched(self, query: str, param_sets: list) -> list:
+        """
+        Execute a template for many parameter sets with one statement per
+        batch_size sets (see _batch_query), then split the rows back out.
+
+        Parameter sets found in the result cache are not sent to the database.
+
+        Returns:
+            List of (display SQL, rows) tuples in the order of param_sets
+        """
+        executed = [(self._display_sql(query, params), []) for params in param_sets]
+        keys = [self._result_key(query, params) for params in param_sets]
+        pending = self._fill_cached(executed, keys)
+
+        def run_batch(start):
+            indexes = pending[start:start + self.batch_size]
+            batch_query, batch_params = self._batch_query(query, [param_sets[idx] for idx in indexes])
+            return indexes, self._fetch(batch_query, batch_params)
+
+        batches = self._map_rows(run_batch, list(range(0, len(pending), self.batch_size)))
+        self._split_batches(executed, keys, batches)
+        return executed
+
+    def _fill_cached(self, executed: list, keys: list) -> list:
+        """
+        Fill in the rows of cached parameter sets.
+
+        Returns:
+            Indexes of the parameter sets that still have to be executed
+        """
+        pending = []
+        for idx, key in enumerate(keys):
+            rows = self.result_cache.get(key) if key else None
+            if rows is None:
+                pending.append(idx)
+            else:
+                executed[idx][1].extend(rows)
+        return pending
+
+    def _split_batches(self, executed: list, keys: list, batches) -> None:
+        """Assign the rows of batched statements back to their parameter sets and cache them."""
+        for indexes, rows in batches:
+            for row in rows:
+                executed[indexes[row[0]]][1].append(row[1:])
+            for idx in indexes:
+                if keys[idx]:
+                    self.result_cache.put(keys[idx], executed[idx][1])
+
+    def _batchable(self, method_name: str, query: str) -> bool:
+        """
+        Whether the rows of a template can be batched with _batch_query.
+
+        A batched copy runs as a subquery, and a subquery does not keep the
+        order of its rows: a template with a top-level ORDER BY (or one that
+        can't be parsed to check) runs one statement per row instead. The
+        answer is worked out once per template.
+        """
+        batchable = self._batchable_templates.get(method_name)
+        if batchable is None:
+            body = re.sub(r'%\((\w+)\)s', r':\1', query)
+            try:
+                tree = sqlglot.parse_one(body, read="databricks" if self._is_databricks() else "postgres")
+                reason = "it has a top-level ORDER BY" if tree.args.get("order") else None
+            except sqlglot.errors.SqlglotError as e:
+                reason = f"it could not be parsed ({e})"
+            if reason:
+                print(f"Warning: Not batching {self.template_map[method_name]}, {reason}")
+            batchable = self._batchable_templates[method_name] = reason is None
+        return batchable
+
+    @staticmethod
+    def _batch_query(query: str, param_sets: list):
+        """
+        Combine bound copies of a template into a single UNION ALL statement.
+
+        Each copy runs as a subquery with its parameters renamed to
+        <name>_b<index>, and its rows are tagged with that index in an extra
+        leading column so they can be assigned back to their parameter set.
+        Only templates without a top-level ORDER BY can be combined this way
+        (see _batchable).
+
+        Returns:
+            Tuple of (batched SQL with :name parameters, merged parameters)
+        """
+        body = re.sub(r'%\((\w+)\)s', r':\1', query).strip().rstrip(';').strip()
+        parts = []
+        batch_params = {}
+        for idx, params in enumerate(param_sets):
+            copy = _BIND_PARAM.sub(
+                lambda m: f":{m.group(1)}_b{idx}" if m.group(1) in params else m.group(0), body
+            )
+            parts.append(f"SELECT {idx} AS foem_batch_idx, foem_batch.* FROM ({copy}) foem_batch")
+            batch_params.update({f"{key}_b{idx}": value for key, value in params.items()})
+        return "\nUNION ALL\n".join(parts), batch_params
+
+    def _add_result(self, text, query, params, method_name):
         """
         Centralized method to execute query and add result to output.
 
@@ -351,28 +496,22 @@ class SqlTest:
             text: The description text
             query: SQL query (or template name if params provided)
             params: Parameters for the query template
+            method_name: Test function name, for the item id
 
         Returns:
             List with a single result dict
         """
         query = self._maybe_transpile(query)
-        sql_raw = self.__finalise_sql(query, params, self.conn)
-        sql = re.sub(r'\s+', ' ', sql_raw).strip()
-        converted_query = re.sub(r'%\((\w+)\)s', r':\1', query)
-
-        with self._cursor() as cur:
-            result = cur.execute(sql_text(converted_query), params)
-            query_result = result.fetchall()
+        sql, query_result = self._execute_template(query, params)
 
         # Create result dict
         result = {
-            "id": self._id,
+            "id": self._item_id(method_name, 0),
             "input": text,
             "expected_output": sql,
             "execution_result": query_result
         }
 
-        self._id += 1
         return [result]
 
     def _execute_query_and_process(self, method_name, text_template, *args):
@@ -389,11 +528,80 @@ class SqlTest:
         Returns:
             List of result dictionaries
         """
-        query = self._read_query(method_name)
-        query = query.format(self=self)
-        results = self._run_query(query)
+        # Transpiled before formatting, so the transpiled query is the same for every result_limit
+        query = self._maybe_transpile(self._read_query(method_name), format_fields=True)
+        results = self._cached_fetch(query.format(self=self))
+        if self.vocab_mode == "lazy":
+            self.resolve_names(val for row in results for val in row if isinstance(val, str))
         return self._process_results(results, text_template, method_name, *args)
 
+    def resolve_names(self, names) -> None:
+        """
+        Resolve concept names into the name index with batched lookups.
+
+        Used in lazy mode: the distinct names are matched case-insensitively
+        against the standard concepts of VOCABULARIES, RESOLVE_CHUNK_SIZE
+        names per query. Names already resolved (or known not to match) are
+        skipped, so each name hits the database at most once per run.
+
+        Args:
+            names: Iterable of concept names
+        """
+        chunks = self._pending_name_chunks(names)
+        if not chunks:
+            return
+
+        with self._cursor() as cur:
+            for chunk in chunks:
+                rows = cur.execute(*self._name_lookup(chunk)).fetchall()
+                self._index_resolved_names(chunk, rows)
+
+    def _pending_name_chunks(self, names) -> list:
+        """Lowercased names that are not in the name index yet, in RESOLVE_CHUNK_SIZE chunks."""
+        pending = sorted({name.lower() for name in names} - self._name_index.keys())
+        return [pending[start:start + RESOLVE_CHUNK_SIZE] for start in range(0, len(pending), RESOLVE_CHUNK_SIZE)]
+
+    @staticmethod
+    def _name_lookup(names):
+        """Batched, case-insensitive concept_name lookup used by resolve_names: (statement, parameters)."""
+        query = sql_text(
+            "SELECT vocabulary_id, domain_id, concept_code, concept_name "
+            "FROM concept "
+            "WHERE LOWER(concept_name) IN :names "
+            "  AND domain_id IN :domains "
+            "  AND vocabulary_id IN :vocabs "
+            "  AND standard_concept = 'S'"
+        ).bindparams(
+            bindparam("names", expanding=True),
+            bindparam("domains", expanding=True),
+            bindparam("vocabs", expanding=True),
+        )
+        return query, {"names": names, "domains": list(VOCABULARIES), "vocabs": VOCABULARY_IDS}
+
+    def _index_resolved_names(self, names, rows) -> None:
+        """
+        Add lookup rows to vocab_dict and the name index.
+
+        Matches are ordered by vocabulary as in VOCABULARIES, like the eager
+        index, and every requested name gets an entry so misses are cached too.
+        """
+        vocab_order = {}
+        for domain, vocab_list in VOCABULARIES.items():
+            for vocab in vocab_list:
+                vocab_order[(vocab, domain)] = len(vocab_order)
+
+        matches: Dict[str, List[Tuple[int, str, str]]] = {name: [] for name in names}
+        for vocab_id, domain_id, concept_code, concept_name in rows:
+            order = vocab_order.get((vocab_id, domain_id))
+            if order is None:
+                continue
+            self.vocab_dict[vocab_id][concept_code] = concept_name
+            matches.setdefault(concept_name.lower(), []).append((order, vocab_id, concept_code))
+
+        for name, found in matches.items():
+            found.sort(key=lambda match: match[0])
+            self._name_index[name] = [(vocab_id, concept_code) for _, vocab_id, concept_code in found]
+
     def __build_vocab_dict(self) -> dict:
         """
         Build a nested dict:
@@ -404,12 +612,6 @@ class SqlTest:
             }
         Only includes STANDARD concepts (standard_concept = 'S').
         """
-
-        vocabularies = {
-            "Drug": ["RxNorm", "ATC", "SPL"],
-            "Condition": ["SNOMED", "ICD10CM"],
-        }
-
         vocab_dict: Dict[str, Dict[str, str]] = {}
 
         with self._cursor() as cur:
@@ -421,14 +623,79 @@ class SqlTest:
                 "  AND standard_concept = 'S'"
             )
 
-            for domain, vocab_list in vocabularies.items():
+            for domain, vocab_list in VOCABULARIES.items():
                 for vocab in vocab_list:
                     result = cur.execute(query, {"vocab": vocab, "domain": domain})
                     rows = result.fetchall()
                     vocab_dict[vocab] = {code: name for code, name in rows}
 
         return vocab_dict
-    
+
+    def __vocab_version_key(self) -> str:
+        """
+        Identify the vocabulary content by the vocabulary.vocabulary_version
+        of each vocabulary in VOCABULARIES (and the VOCABULARIES layout itself).
+        """
+        query = sql_text(
+            "SELECT vocabulary_id, vocabulary_version "
+            "FROM vocabulary "
+            "WHERE vocabulary_id IN :vocabs "
+            "ORDER BY vocabulary_id"
+        ).bindparams(bindparam("vocabs", expanding=True))
+
+        with self._cursor() as cur:
+            rows = cur.execute(query, {"vocabs": VOCABULARY_IDS}).fetchall()
+
+        return json.dumps({
+            "vocabularies": VOCABULARIES,
+            "versions": [[vocab_id, version] for vocab_id, version in rows],
+        }, sort_keys=True)
+
+    def __load_vocab_snapshot(self) -> VocabSnapshot:
+        """
+        Memory-map the vocabulary snapshot for the current vocabulary versions.
+        Builds it from the concept table (see __build_vocab_dict) when no
+        valid snapshot exists yet, e.g. after a vocabulary update, and then
+        deletes the snapshots of other versions.
+        """
+        version_key = self.__vocab_version_key()
+        digest = hashlib.sha256(version_key.encode("utf-8")).hexdigest()[:16]
+        path = self.vocab_snapshot_dir / f"vocab-{digest}.bin"
+
+        if path.exists():
+            try:
+                snapshot = VocabSnapshot.load(path)
+                if snapshot.version_key == version_key:
+                    return snapshot
+                snapshot.close()
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable vocabulary snapshot {path}: {e}")
+
+        VocabSnapshot.save(self.__build_vocab_dict(), version_key, path)
+        for stale_path in self.vocab_snapshot_dir.glob("vocab-*.bin"):
+            if stale_path != path:
+                try:
+                    stale_path.unlink()
+                except OSError as e:
+                    # e.g. still mapped by another process on Windows; retried after the next rebuild
+                    print(f"Warning: Could not delete old vocabulary snapshot {stale_path}: {e}")
+        return VocabSnapshot.load(path)
+
+    @staticmethod
+    def __build_name_index(vocab_dict: dict) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Invert the vocabulary dict into a lowercased name index:
+            {"atorvastatin": [("ATC", "C10AA05"), ...], ...}
+
+        Matches keep the vocabulary/code order of vocab_dict, so lookups return
+        the same list a linear scan would.
+        """
+        name_index: Dict[str, List[Tuple[str, str]]] = {}
+        for vocab_id, codes in vocab_dict.items():
+            for concept_code, concept_name in codes.items():
+                name_index.setdefault(concept_name.lower(), []).append((vocab_id, concept_code))
+        return name_index
+
     def __finalise_sql(self, sql: str, params: dict, conn) -> str:
         """
         Compile SQL query with parameters for display purposes.
@@ -437,338 +704,34 @@ class SqlTest:
         # Convert %(param)s format to :param format for SQLAlchemy
         converted_sql = re.sub(r'%\((\w+)\)s', r':\1', sql)
 
-        compiled = sql_text(converted_sql).bindparams(**params)
+        compiled = sql_text(converted_sql).bindparams(*[
+            bindparam(key, value, expanding=isinstance(value, (list, tuple)))
+            for key, value in params.items()
+        ])
         compiled_query = compiled.compile(
             dialect=self.conn.dialect,
             compile_kwargs={"literal_binds": True}
         )
         return str(compiled_query)
 
-    def patients_2drugs_and_time(self):
-        return self._execute_query_and_process(
-            "patients_2drugs_and_time",
-            "Counts of patients taking drug {0} and {1} within 30 days.",
-            30
-        )
-
-    def patients_2drugs_and(self):
-        return self._execute_query_and_process(
-            "patients_2drugs_and",
-            "Counts of patients taking drug {0} and {1}."
-        )
-
-    def patients_2drugs_or(self):
-        return self._execute_query_and_process(
-            "patients_2drugs_or",
-            "Counts of patients taking drug {0} or {1}."
-        )
-
-    def patients_4drugs_and_time(self):
-        return self._execute_query_and_process(
-            "patients_4drugs_and_time",
-            "Counts of patients taking drug {0}, {1}, {2} and {3} within 30 days.",
-            30
-        )
-
-    def patients_4drugs_and(self):
-        return self._execute_query_and_process(
-            "patients_4drugs_and",
-            "Counts of patients taking drug {0}, {1}, {2} and {3}."
-        )
-
-    def patients_4drugs_or(self):
-        return self._execute_query_and_process(
-            "patients_4drugs_or",
-            "Counts of patients taking drug {0}, {1}, {2} or {3}."
-        )
-
-    def patients_3drugs_and_time(self):
-        return self._execute_query_and_process(
-            "patients_3drugs_and_time",
-            "Counts of patients taking drug {0}, {1} and {2} within 30 days.",
-            30
-        )
-
-    def patients_3drugs_and(self):
-        return self._execute_query_and_process(
-            "patients_3drugs_and",
-            "Counts of patients taking drug {0}, {1} and {2}."
-        )
-
-    def patients_3drugs_or(self):
-        return self._execute_query_and_process(
-            "patients_3drugs_or",
-            "Counts of patients taking drug {0}, {1} or {2}."
-        )
-
-    def patients_2conditions_and_time(self):
-        return self._execute_query_and_process(
-            "patients_2conditions_and_time",
-            "Counts of patients with condition {0} and {1} within 30 days.",
-            30
-        )
-
-    def patients_2conditions_and(self):
-        return self._execute_query_and_process(
-            "patients_2conditions_and",
-            "Counts of patients with condition {0} and {1}."
-        )
-
-    def patients_2conditions_or(self):
-        return self._execute_query_and_process(
-            "patients_2conditions_or",
-            "Counts of patients with condition {0} or {1}."
-        )
-
-    def patients_4conditions_and_time(self):
-        return self._execute_query_and_process(
-            "patients_4conditions_and_time",
-            "Counts of patients with condition {0}, {1}, {2} and {3} within 1000 days.",
-            1000
-        )
-
-    def patients_4conditions_and(self):
-        return self._execute_query_and_process(
-            "patients_4conditions_and",
-            "Counts of patients with condition {0}, {1}, {2} and {3}."
-        )
-
-    def patients_4conditions_or(self):
-        return self._execute_query_and_process(
-            "patients_4conditions_or",
-            "Counts of patients with condition {0}, {1}, {2} or {3}."
-        )
-
-    def patients_3conditions_and_time(self):
-        return self._execute_query_and_process(
-            "patients_3conditions_and_time",
-            "Counts of patients with condition {0}, {1} and {2} within 300 days.",
-            300
-        )
-
-    def patients_3conditions_and(self):
-        return self._execute_query_and_process(
-            "patients_3conditions_and",
-            "Counts of patients with condition {0}, {1} and {2}."
-        )
-
-    def patients_3conditions_or(self):
-        return self._execute_query_and_process(
-            "patients_3conditions_or",
-            "Counts of patients with condition {0}, {1} or {2}."
-        )
-
-    def patients_distribution_by_birth(self):
-        text = "Distribution of patients by year of birth."
-        query, params = self._get_template_sql("patients_distribution_by_birth")
-        return self._add_result(text, query, params)
-
-    def patients_condition_followed_condition(self):
-        return self._execute_query_and_process(
-            "patients_condition_followed_condition",
-            "How many people have condition {0} followed by condition {1}?"
-        )
-
-    def patients_condition_time_condition(self):
-        return self._execute_query_and_process(
-            "patients_condition_time_condition",
-            "How many people have condition {1} more than 30 days after diagnosed by condition {0}?",
-            30
-        )
-
-    def patients_condition_age(self):
-        return self._execute_query_and_process(
-            "patients_condition_age",
-            "How many people have condition {0} at age {1}?"
-        )
-
-    def patients_condition_race(self):
-        return self._execute_query_and_process(
-            "patients_condition_race",
-            "How many people have condition {0} in the cohort of race {1}?"
-        )
-
-    def patients_condition_state(self):
-        return self._execute_query_and_process(
-            "patients_condition_state",
-            "How many people have condition {0} in the state {1}?"
-        )
-
-    def patients_condition_year(self):
-        return self._execute_query_and_process(
-            "patients_condition_year",
-            "How many people were diagnosed with condition {0} in year {1}?"
-        )
-
-    def patients_drug_time_drug(self):
-        return self._execute_query_and_process(
-            "patients_drug_time_drug",
-            "How many people have treated by drug {1} after more than 30 days of starting with drug {0}?",
-            30
-        )
-
-    def patients_drug_followed_drug(self):
-        return self._execute_query_and_process(
-            "patients_drug_followed_drug",
-            "How many people have treated by drug {0} followed by drug {1}?"
-        )
-
-    def patients_condition_ethnicity(self):
-        return self._execute_query_and_process(
-            "patients_condition_ethnicity",
-            "How many people have condition {0} in the cohort of ethnicity {1}?"
-        )
-
-    def patients_drug_year(self):
-        return self._execute_query_and_process(
-            "patients_drug_year",
-            "How many people were taking drug {0} in year {1}."
-        )
-
-    def patients_drug_after_condition(self):
-        return self._execute_query_and_process(
-            "patients_drug_after_condition",
-            "How many people took drug {1} after being diagnosed with condition {0}?"
-        )
-
-    def patients_drug_time_after_condition(self):
-        return self._execute_query_and_process(
-            "patients_drug_time_after_condition",
-            "How many people were treated by drug {1} more than 30 days after being diagnosed with condition {0}?",
-            30
-        )
-
-    def patients_gender_condition(self):
-        return self._execute_query_and_process(
-            "patients_gender_condition",
-            "Number of {0} patients with {1}."
-        )
-
-    def patients_year(self):
-        return self._execute_query_and_process(
-            "patients_year",
-            "Number of patients born in year {0}."
-        )
-
-    def patients_gender_state(self):
-        text = "Number of patients by gender and state."
-        query, params = self._get_template_sql("patients_gender_state")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_ethnicity_location(self):
-        text = "Number of patients grouped by ethnicity and residence state location."
-        query, params = self._get_template_sql("patients_group_by_ethnicity_location")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_ethnicity_birth(self):
-        text = "Number of patients grouped by ethnicity and year of birth."
-        query, params = self._get_template_sql("patients_group_by_ethnicity_birth")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_ethnicity(self):
-        text = "Number of patients grouped by ethnicity."
-        query, params = self._get_template_sql("patients_group_by_ethnicity")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_gender(self):
-        text = "Number of patients grouped by gender."
-        query, params = self._get_template_sql("patients_group_by_gender")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_race_ethnicity(self):
-        text = "Number of patients grouped by race and ethnicity."
-        query, params = self._get_template_sql("patients_group_by_race_ethnicity")
-        return self._add_result(text, query, params)
-
-    def patients_grouped_by_race_gender(self):
-        text = "Number of patients grouped by race and gender."
-        query, params = self._get_template_sql("patients_grouped_by_race_gender")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_race_location(self):
-        text = "Number of patients grouped by race and residence state location."
-        query, params = self._get_template_sql("patients_group_by_race_location")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_race_birth(self):
-        text = "Number of patients grouped by race and year of birth."
-        query, params = self._get_template_sql("patients_group_by_race_birth")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_location(self):
-        text = "Number of patients grouped by residence state location."
-        query, params = self._get_template_sql("patients_group_by_location")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_birth_gender(self):
-        text = "Number of patients grouped by year of birth and gender."
-        query, params = self._get_template_sql("patients_group_by_birth_gender")
-        return self._add_result(text, query, params)
-
-    def patients_group_by_birth_location(self):
-        text = "Number of patients grouped by year of birth and residence state location."
-        query, params = self._get_template_sql("patients_group_by_birth_location")
-        return self._add_result(text, query, params)
-
-    def patients_count(self):
-        text = "Number of patients in the dataset."
-        query, params = self._get_template_sql("patients_count")
-        return self._add_result(text, query, params)
-    
-    def patients_count_by_ethnicity(self):
-        return self._execute_query_and_process(
-            "patients_count_by_ethnicity",
-            "Number of patients of ethnicity {0}."
-        )
-
-    def patients_count_by_race(self):
-        return self._execute_query_and_process(
-            "patients_count_by_race",
-            "Number of patients of race {0}."
-        )
-
-    def patients_count_by_gender(self):
-        return self._execute_query_and_process(
-            "patients_count_by_gender",
-            "Number of patients of specific gender {0}."
-        )
-
-    def patients_drug(self):
-        return self._execute_query_and_process(
-            "patients_drug",
-            "Number of patients taking {0}."
-        )
-
-    def patients_condition(self):
-        return self._execute_query_and_process(
-            "patients_condition",
-            "Number of patients with {0}."
-        )
-
-    def patients_count_by_location(self):
-        return self._execute_query_and_process(
-            "patients_count_by_location",
-            "Number of patients with residence state location at {0}."
-        )
-
-    def patients_condition_group_by_year(self):
-        return self._execute_query_and_process(
-            "patients_condition_group_by_year",
-            "Counts of patients with condition {0} grouped by year of diagnosis."
-        )
-
-    def patients_drug_group_by_year(self):
-        return self._execute_query_and_process(
-            "patients_drug_group_by_year",
-            "Counts of patients taking drug {0} grouped by year of prescription."
-        )
-
-    def patients_group_by_gender_and_ethn(self):
-        text = "Number of patients grouped by gender and ethnicity."
-        query, params = self._get_template_sql("patients_group_by_gender_and_ethn")
-        return self._add_result(text, query, params)
 
-    def patients_group_by_race(self):
-        text = "Count of patients grouped by race."
-        query, params = self._get_template_sql("patients_group_by_race")
-        return self._add_result(text, query, params)
+def _test_method(name: str, function: tuple):
+    """Build the SqlTest method of a TEST_FUNCTIONS entry."""
+    template_id, query_id, question, *args = function
+    if query_id:
+        def method(self):
+            return self._execute_query_and_process(name, question, *args)
+    else:
+        def method(self):
+            query, params = self._get_template_sql(name)
+            return self._add_result(question, query, params, name)
+    method.__name__ = name
+    method.__qualname__ = f"SqlTest.{name}"
+    method.__doc__ = question
+    # Hashed by foem.dataset.function_hashes in place of the method source
+    method.test_function = function
+    return method
+
+
+for _name, _function in TEST_FUNCTIONS.items():
+    setattr(SqlTest, _name, _test_method(_name, _function))
@@ -1,10 +1,60 @@
 """
 Transpile SQL queries from PostgreSQL to Databricks Spark SQL using sqlglot.
+
+Results are memoized in-process, and also on disk when
+FOEM_TRANSPILE_CACHE_DIR is set, keyed by the SQL text, both dialects, the
+sqlglot version and a hash of this module (its rewrite rules), so a
+template is transpiled once per sqlglot release and rule change.
+
+Pass a TranspileStats to transpile_query to see which rewrite rules fire,
+how often and at what cost; "stats" on the command line reports them for a
+whole corpus:
+
+    python -m foem.transpiler stats template query --output transpile_stats.json
+
+"batch" precompiles a corpus on a process pool, skipping files that did not
+change since the last batch. It transpiles the same SQL SqlTest does (file
+bodies without comment lines) and, when FOEM_TRANSPILE_CACHE_DIR is set,
+fills the on-disk cache with it:
+
+    python -m foem.transpiler batch template query --output-dir transpiled/databricks
 """
 
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import re
+import string
+import sys
+import threading
+import time
 import sqlglot
+from concurrent.futures import ProcessPoolExecutor
 from sqlglot import exp
 from pathlib import Path
+from .registry import split_sql_file
+
+# Transpiled queries kept in memory (least recently used ones are dropped)
+TRANSPILE_CACHE_SIZE = 1024
+
+# Upper bound on rewrite passes in _transform_date_operations
+MAX_REWRITE_PASSES = 10
+
+BATCH_MANIFEST_VERSION = 2
+
+# Hash of this module's source: part of every on-disk cache key, so a change
+# to the rewrite rules never serves queries transpiled by the old ones
+TRANSPILER_HASH = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+# Files whose SQL is a str.format template (SqlTest's candidate queries, e.g. "LIMIT {self.result_limit}")
+FORMAT_TEMPLATE_FILES = ("Q*.sql",)
+
+# Stands in for a str.format field while a format template is transpiled
+FORMAT_FIELD_SENTINEL = "foem_format_field_{}"
+_FORMAT_FIELD_SENTINEL = re.compile(r"\bfoem_format_field_(\d+)\b")
 
 
 def _create_datediff(left: exp.Expression, right: exp.Expression) -> exp.Expression:
@@ -261,9 +311,9 @@ def _create_range_overlap_condition(left_range: exp.Expression, right_range: exp
     right_range = _unwrap_paren(right_range)
 
     left_start = exp.Dot(this=left_range, expression=exp.Identifier(this="start"))
-    left_end = exp.Dot(this=left_range, expression=exp.Identifier(this="end"))
+    left_end = exp.Dot(this=left_range.copy(), expression=exp.Identifier(this="end"))
     right_start = exp.Dot(this=right_range, expression=exp.Identifier(this="start"))
-    right_end = exp.Dot(this=right_range, expression=exp.Identifier(this="end"))
+    right_end = exp.Dot(this=right_range.copy(), expression=exp.Identifier(this="end"))
 
     return exp.And(
         this=exp.LTE(this=left_start, expression=right_end),
@@ -283,9 +333,9 @@ def _create_range_intersection(left_range: exp.Expression, right_range: exp.Expr
     right_range = _unwrap_paren(right_range)
 
     left_start = exp.Dot(this=left_range, expression=exp.Identifier(this="start"))
-    left_end = exp.Dot(this=left_range, expression=exp.Identifier(this="end"))
+    left_end = exp.Dot(this=left_range.copy(), expression=exp.Identifier(this="end"))
     right_start = exp.Dot(this=right_range, expression=exp.Identifier(this="start"))
-    right_end = exp.Dot(this=right_range, expression=exp.Identifier(this="end"))
+    right_end = exp.Dot(this=right_range.copy(), expression=exp.Identifier(this="end"))
 
     greatest_start = exp.Anonymous(this="GREATEST", expressions=[left_start, right_start])
     least_end = exp.Anonymous(this="LEAST", expressions=[left_end, right_end])
@@ -343,7 +393,266 @@ def _transform_window_spec(node: exp.Expression) -> exp.Expression:
     return node
 
 
-def _transform_date_operations(tree: exp.Expression) -> exp.Expression:
+# (node types, rule) pairs, in the order rules are tried; see _rule
+_RULES = []
+
+
+def _rule(*node_types):
+    """
+    Register a rewrite rule for nodes of node_types (or subclasses).
+
+    A rule returns None if it does not apply, the node itself if it changed
+    it in place, otherwise the expression that replaces the node.
+    """
+    def register(func):
+        _RULES.append((node_types, func))
+        return func
+    return register
+
+
+@functools.lru_cache(maxsize=None)
+def _rules_for(node_type: type) -> tuple:
+    """The rules registered for a node type, in registration order."""
+    return tuple(func for node_types, func in _RULES if issubclass(node_type, node_types))
+
+
+def _is_empty_marker(expr: exp.Expression) -> bool:
+    """Check if expr is the EMPTY of "range IS EMPTY" (parsed as a Column named EMPTY)."""
+    if isinstance(expr, exp.Column):
+        identifier = expr.this
+        return isinstance(identifier, exp.Identifier) and identifier.this.upper() == "EMPTY"
+    return False
+
+
+@_rule(exp.WindowSpec)
+def _rewrite_window_spec(node: exp.WindowSpec):
+    """Window INTERVAL syntax, see _transform_window_spec."""
+    end = node.args.get("end")
+    _transform_window_spec(node)
+    return node if node.args.get("end") is not end else None
+
+
+@_rule(exp.Add)
+def _rewrite_date_add(node: exp.Add):
+    """
+    Date + integer arithmetic (PostgreSQL allows date + int for days):
+    convert to DATE_ADD(date, int) for Databricks.
+    """
+    left = node.this
+    right = node.expression
+
+    # Check if this looks like date arithmetic (date + number)
+    # We only transform if the right side is a numeric literal
+    if isinstance(right, exp.Literal) and right.is_number:
+        return exp.Anonymous(
+            this="DATE_ADD",
+            expressions=[left, right]
+        )
+    return None
+
+
+@_rule(exp.Anonymous)
+def _rewrite_daterange(node: exp.Anonymous):
+    """DATERANGE() function: convert to STRUCT(start, end)."""
+    daterange_parts = _is_daterange_call(node)
+    if daterange_parts:
+        start_date, end_date, bounds = daterange_parts
+        return _create_struct_for_range(start_date, end_date)
+    return None
+
+
+@_rule(exp.ArrayOverlaps)
+def _rewrite_range_overlap(node: exp.ArrayOverlaps):
+    """Range overlap operator (&&): convert to an overlap condition."""
+    left_range, right_range = _is_range_overlap_operator(node)
+    return _create_range_overlap_condition(left_range, right_range)
+
+
+@_rule(exp.Mul)
+def _rewrite_range_intersection(node: exp.Mul):
+    """Range intersection operator (*): convert to STRUCT with GREATEST/LEAST."""
+    intersection_parts = _is_range_intersection_operator(node)
+    if intersection_parts:
+        left_range, right_range = intersection_parts
+        return _create_range_intersection(left_range, right_range)
+    return None
+
+
+@_rule(exp.Not)
+def _rewrite_is_not_empty(node: exp.Not):
+    """
+    "IS NOT EMPTY" for ranges (PostgreSQL), which sqlglot parses as
+    NOT(IS(expr, EMPTY)). In PostgreSQL, range IS NOT EMPTY checks if the
+    range has any dates; with a Databricks STRUCT: start <= end.
+    """
+    inner = node.this
+    if isinstance(inner, exp.Is) and _is_empty_marker(inner.expression):
+        # Transform: NOT (range IS EMPTY) -> range.start <= range.end
+        range_expr = _unwrap_paren(inner.this)
+        start = exp.Dot(this=range_expr, expression=exp.Identifier(this="start"))
+        end = exp.Dot(this=range_expr.copy(), expression=exp.Identifier(this="end"))
+        return exp.LTE(this=start, expression=end)
+    return None
+
+
+@_rule(exp.Is)
+def _rewrite_is_empty(node: exp.Is):
+    """"IS EMPTY" for ranges (PostgreSQL): range.start > range.end."""
+    if _is_empty_marker(node.expression):
+        range_expr = _unwrap_paren(node.this)
+        start = exp.Dot(this=range_expr, expression=exp.Identifier(this="start"))
+        end = exp.Dot(this=range_expr.copy(), expression=exp.Identifier(this="end"))
+        return exp.GT(this=start, expression=end)
+    return None
+
+
+@_rule(exp.LTE, exp.LT, exp.GTE, exp.GT, exp.EQ, exp.NEQ)
+def _rewrite_date_comparison(node: exp.Expression):
+    """
+    Comparisons of a date difference with a number: replace the difference
+    (plain or parenthesized subtraction, ABS(...) or the epoch days pattern)
+    with DATEDIFF, in place.
+    """
+    left = node.left
+    right = node.right
+
+    # Only process if comparing to a number (literal or cast)
+    if not _is_numeric_value(right):
+        return None
+
+    # Check for ABS(date1 - date2) pattern
+    sub_expr = _is_abs_with_subtraction(left)
+    if sub_expr:
+        left_date, right_date = _extract_date_operands_from_sub(sub_expr)
+        if left_date and right_date:
+            datediff = _create_datediff(left_date, right_date)
+            # Wrap DATEDIFF in ABS
+            abs_datediff = exp.Abs(this=datediff)
+            node.set("this", abs_datediff)
+            return node
+
+    # Check for epoch days pattern: CAST(EXTRACT(epoch FROM ...) / 86400 AS BIGINT)
+    sub_expr = _is_epoch_days_pattern(left)
+    if sub_expr:
+        left_date, right_date = _extract_date_operands_from_sub(sub_expr)
+        if left_date and right_date:
+            datediff = _create_datediff(left_date, right_date)
+            node.set("this", datediff)
+            return node
+
+    # Check for parenthesized subtraction: (date1 - date2)
+    if isinstance(left, exp.Paren) and isinstance(left.this, exp.Sub):
+        left_date, right_date = _extract_date_operands_from_sub(left.this)
+        if left_date and right_date:
+            datediff = _create_datediff(left_date, right_date)
+            node.set("this", datediff)
+            return node
+
+    # Check for direct subtraction: date1 - date2
+    if isinstance(left, exp.Sub):
+        left_date, right_date = _extract_date_operands_from_sub(left)
+        if left_date and right_date:
+            datediff = _create_datediff(left_date, right_date)
+            node.set("this", datediff)
+            return node
+
+    return None
+
+
+def _rewrite_node(node: exp.Expression, stats=None):
+    """
+    Apply the first rule registered for the node's type that matches.
+
+    Returns:
+        None if no rule applies, node itself if a rule changed it in place,
+        otherwise the expression that replaces it
+    """
+    for rule in _rules_for(type(node)):
+        if stats is None:
+            result = rule(node)
+        else:
+            start = time.perf_counter()
+            result = rule(node)
+            stats.record_rule(rule.__name__, time.perf_counter() - start, result is not None)
+        if result is not None:
+            return result
+    return None
+
+
+def _may_rewrite(tree: exp.Expression) -> bool:
+    """
+    Cheap pre-scan: False if no rule can fire anywhere in tree.
+
+    Every rule needs a node of its own type, except the comparison rule,
+    which only matches around a subtraction; DATERANGE and IS EMPTY are
+    checked by name, since other functions and IS NULL are everywhere.
+    """
+    for node in tree.find_all(exp.Sub, exp.Add, exp.Mul, exp.ArrayOverlaps, exp.WindowSpec, exp.Anonymous, exp.Is):
+        if isinstance(node, exp.Anonymous):
+            if node.this.upper() == "DATERANGE":
+                return True
+        elif isinstance(node, exp.Is):
+            if _is_empty_marker(node.expression):
+                return True
+        else:
+            return True
+    return False
+
+
+def _mark_changed(node: exp.Expression, pending: set) -> None:
+    """Add node and its ancestors to pending (stopping at the first one already there)."""
+    while node is not None and id(node) not in pending:
+        pending.add(id(node))
+        node = node.parent
+
+
+def _rewrite_pass(tree: exp.Expression, visit, stats=None):
+    """
+    One pre-order pass of _rewrite_node over tree, in place. Like
+    Expression.transform, the pass does not descend into replacement
+    expressions.
+
+    Args:
+        tree: Root of the tree
+        visit: ids of the nodes to visit (None: all of them)
+        stats: TranspileStats to record rule calls and visited nodes in
+
+    Returns:
+        Tuple of (root, ids of the nodes to visit in the next pass)
+    """
+    revisit = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        parent, arg_key, index = node.parent, node.arg_key, node.index
+        if stats is not None:
+            stats.nodes_visited += 1
+        new_node = _rewrite_node(node, stats)
+
+        if new_node is not None and new_node is not node:
+            if parent is None:
+                tree = new_node
+            else:
+                parent.set(arg_key, new_node, index)
+            # Nothing in the replacement has been looked at yet
+            revisit.update(id(child) for child in new_node.dfs())
+            _mark_changed(parent, revisit)
+            continue
+
+        if new_node is node:
+            # The node's children changed and are visited below in this pass;
+            # the node and its ancestors are visited again in the next one
+            if visit is not None:
+                visit.update(id(child) for child in node.dfs())
+            _mark_changed(node, revisit)
+
+        for child in node.iter_expressions(reverse=True):
+            if visit is None or id(child) in visit:
+                stack.append(child)
+    return tree, revisit
+
+
+def _transform_date_operations(tree: exp.Expression, stats=None) -> exp.Expression:
     """
     Walk the AST and convert PostgreSQL date operations to Databricks equivalents.
 
@@ -356,139 +665,86 @@ def _transform_date_operations(tree: exp.Expression) -> exp.Expression:
     6. Range intersection operator (*): convert to STRUCT with GREATEST/LEAST
     7. Window INTERVAL syntax: CAST('N days' AS INTERVAL) -> INTERVAL N DAYS
 
-    Note: We use iterative transformation to ensure nested expressions are properly handled.
-    """
-    def transformer(node):
-        # Handle window specifications with INTERVAL casting
-        node = _transform_window_spec(node)
-
-        # Handle date + integer arithmetic (PostgreSQL allows date + int for days)
-        # Convert to DATE_ADD(date, int) for Databricks
-        if isinstance(node, exp.Add):
-            left = node.this
-            right = node.expression
-
-            # Check if this looks like date arithmetic (date + number)
-            # We only transform if the right side is a numeric literal
-            if isinstance(right, exp.Literal) and right.is_number:
-                # Create DATE_ADD(left, right) function
-                date_add = exp.Anonymous(
-                    this="DATE_ADD",
-                    expressions=[left, right]
-                )
-                return date_add
-
-        # Handle DATERANGE() function
-        daterange_parts = _is_daterange_call(node)
-        if daterange_parts:
-            start_date, end_date, bounds = daterange_parts
-            return _create_struct_for_range(start_date, end_date)
-
-        # Handle range overlap operator (&&)
-        overlap_parts = _is_range_overlap_operator(node)
-        if overlap_parts:
-            left_range, right_range = overlap_parts
-            return _create_range_overlap_condition(left_range, right_range)
-
-        # Handle range intersection operator (*)
-        intersection_parts = _is_range_intersection_operator(node)
-        if intersection_parts:
-            left_range, right_range = intersection_parts
-            return _create_range_intersection(left_range, right_range)
-
-        # Handle "IS NOT EMPTY" for ranges (PostgreSQL)
-        # Sqlglot parses "IS NOT EMPTY" as NOT(IS(expr, EMPTY))
-        # In PostgreSQL: range IS NOT EMPTY checks if range has any dates
-        # In Databricks with STRUCT: check if start <= end
-        if isinstance(node, exp.Not):
-            inner = node.this
-            if isinstance(inner, exp.Is):
-                is_empty_check = inner.expression
-                # Check if this is "IS EMPTY" (expression should be Column with name EMPTY)
-                if isinstance(is_empty_check, exp.Column):
-                    identifier = is_empty_check.this
-                    if isinstance(identifier, exp.Identifier) and identifier.this.upper() == "EMPTY":
-                        # Transform: NOT (range IS EMPTY) -> range.start <= range.end
-                        range_expr = inner.this
-                        range_expr = _unwrap_paren(range_expr)
-                        start = exp.Dot(this=range_expr, expression=exp.Identifier(this="start"))
-                        end = exp.Dot(this=range_expr, expression=exp.Identifier(this="end"))
-                        return exp.LTE(this=start, expression=end)
-
-        # Handle "IS EMPTY" for ranges (PostgreSQL)
-        if isinstance(node, exp.Is):
-            is_empty_check = node.expression
-            # Check if this is "IS EMPTY" (expression should be Column with name EMPTY)
-            if isinstance(is_empty_check, exp.Column):
-                identifier = is_empty_check.this
-                if isinstance(identifier, exp.Identifier) and identifier.this.upper() == "EMPTY":
-                    # Transform: range IS EMPTY -> range.start > range.end
-                    range_expr = node.this
-                    range_expr = _unwrap_paren(range_expr)
-                    start = exp.Dot(this=range_expr, expression=exp.Identifier(this="start"))
-                    end = exp.Dot(this=range_expr, expression=exp.Identifier(this="end"))
-                    return exp.GT(this=start, expression=end)
-
-        # Look for comparisons
-        if isinstance(node, (exp.LTE, exp.LT, exp.GTE, exp.GT, exp.EQ, exp.NEQ)):
-            left = node.left
-            right = node.right
-
-            # Only process if comparing to a number (literal or cast)
-            if not _is_numeric_value(right):
-                return node
-
-            # Check for ABS(date1 - date2) pattern
-            sub_expr = _is_abs_with_subtraction(left)
-            if sub_expr:
-                left_date, right_date = _extract_date_operands_from_sub(sub_expr)
-                if left_date and right_date:
-                    datediff = _create_datediff(left_date, right_date)
-                    # Wrap DATEDIFF in ABS
-                    abs_datediff = exp.Abs(this=datediff)
-                    node.set("this", abs_datediff)
-                    return node
-
-            # Check for epoch days pattern: CAST(EXTRACT(epoch FROM ...) / 86400 AS BIGINT)
-            sub_expr = _is_epoch_days_pattern(left)
-            if sub_expr:
-                left_date, right_date = _extract_date_operands_from_sub(sub_expr)
-                if left_date and right_date:
-                    datediff = _create_datediff(left_date, right_date)
-                    node.set("this", datediff)
-                    return node
-
-            # Check for parenthesized subtraction: (date1 - date2)
-            if isinstance(left, exp.Paren) and isinstance(left.this, exp.Sub):
-                left_date, right_date = _extract_date_operands_from_sub(left.this)
-                if left_date and right_date:
-                    datediff = _create_datediff(left_date, right_date)
-                    node.set("this", datediff)
-                    return node
-
-            # Check for direct subtraction: date1 - date2
-            if isinstance(left, exp.Sub):
-                left_date, right_date = _extract_date_operands_from_sub(left)
-                if left_date and right_date:
-                    datediff = _create_datediff(left_date, right_date)
-                    node.set("this", datediff)
-                    return node
-
-        return node
-
-    # Apply transformations iteratively until no more changes occur
-    # This ensures nested range operations are fully transformed
-    max_iterations = 10
-    for i in range(max_iterations):
-        old_sql = tree.sql()
-        tree = tree.transform(transformer)  # copy=True by default for proper transformation
-        new_sql = tree.sql()
-        if old_sql == new_sql:
+    The tree is rewritten in place, in passes until no rule fires, so that
+    nested range operations are fully transformed. Rules only look at a node
+    and its descendants, so after the first pass only two kinds of node can
+    match again: those inside replacements (which a pass does not descend
+    into) and the ancestors of a change. Later passes visit just those.
+    Queries without any construct a rule could match are left alone.
+    """
+    if not _may_rewrite(tree):
+        if stats is not None:
+            stats.skipped += 1
+        return tree
+
+    visit = None
+    for _ in range(MAX_REWRITE_PASSES):
+        tree, visit = _rewrite_pass(tree, visit, stats)
+        if stats is not None:
+            stats.passes += 1
+        if not visit:
             break
     return tree
 
 
-def transpile_query(sql: str, source_dialect: str = "postgres", target_dialect: str = "databricks") -> str:
+class TranspileStats:
+    """
+    Counters and timings collected by transpile_query(..., stats=stats).
+    One instance can collect any number of queries.
+
+    - queries, failed: Queries transpiled, and how many of them raised
+    - skipped: Queries the pre-scan found nothing to rewrite in
+    - passes, nodes_visited: Rewrite passes and the nodes they looked at
+    - seconds: Time spent parsing, transforming and generating SQL
+    - rules: Per rule name, how often it was tried (calls), how often it
+      fired (hits) and the time spent in it
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.failed = 0
+        self.skipped = 0
+        self.passes = 0
+        self.nodes_visited = 0
+        self.seconds = {"parse": 0.0, "transform": 0.0, "generate": 0.0}
+        self.rules = {func.__name__: {"calls": 0, "hits": 0, "seconds": 0.0} for _, func in _RULES}
+
+    def record_rule(self, name: str, seconds: float, fired: bool) -> None:
+        """Record one call of a rule."""
+        rule = self.rules[name]
+        rule["calls"] += 1
+        rule["hits"] += fired
+        rule["seconds"] += seconds
+
+    def merge(self, other: "TranspileStats") -> None:
+        """Add the counts and timings of other to these."""
+        for name in ("queries", "failed", "skipped", "passes", "nodes_visited"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] += seconds
+        for name, rule in other.rules.items():
+            for key, value in rule.items():
+                self.rules[name][key] += value
+
+    def to_dict(self) -> dict:
+        """The statistics as a JSON-serializable dict; unused_rules lists the rules that never fired."""
+        return {
+            "queries": self.queries,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "passes": self.passes,
+            "nodes_visited": self.nodes_visited,
+            "seconds": {phase: round(seconds, 6) for phase, seconds in self.seconds.items()},
+            "rules": {
+                name: {"calls": rule["calls"], "hits": rule["hits"], "seconds": round(rule["seconds"], 6)}
+                for name, rule in self.rules.items()
+            },
+            "unused_rules": [name for name, rule in self.rules.items() if not rule["hits"]],
+        }
+
+
+def transpile_query(sql: str, source_dialect: str = "postgres", target_dialect: str = "databricks",
+                    cache: bool = True, stats: TranspileStats = None, format_fields: bool = False) -> str:
     """
     Transpile a SQL query from one dialect to another.
 
@@ -496,23 +752,148 @@ def transpile_query(sql: str, source_dialect: str = "postgres", target_dialect:
         sql: The SQL query to transpile
         source_dialect: The source SQL dialect (default: "postgres")
         target_dialect: The target SQL dialect (default: "databricks")
+        cache: Reuse earlier results from memory and the on-disk cache (default: True)
+        stats: Record rule and phase statistics in this TranspileStats; the
+            query is then always transpiled, bypassing the caches
+        format_fields: sql is a str.format template; its {fields} are kept
+            as they are and the result is a format template as well
 
     Returns:
         The transpiled SQL query
     """
+    if format_fields:
+        protected, fields = _protect_format_fields(sql)
+        transpiled = transpile_query(protected, source_dialect, target_dialect, cache, stats)
+        return _restore_format_fields(transpiled, fields)
+    if stats is not None:
+        return _transpile(sql, source_dialect, target_dialect, stats)
+    if cache:
+        return _cached_transpile(sql, source_dialect, target_dialect)
+    return _transpile(sql, source_dialect, target_dialect)
+
+
+def _protect_format_fields(sql: str):
+    """
+    Replace the fields of a str.format template with sentinel identifiers.
+
+    Returns:
+        (sql, fields): the SQL with literal braces unescaped and field i
+        replaced by FORMAT_FIELD_SENTINEL.format(i), and the fields' markup
+    """
+    parts = []
+    fields = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(sql):
+        parts.append(literal)
+        if field_name is not None:
+            markup = field_name + (f"!{conversion}" if conversion else "") + (f":{format_spec}" if format_spec else "")
+            parts.append(FORMAT_FIELD_SENTINEL.format(len(fields)))
+            fields.append("{" + markup + "}")
+    return "".join(parts), fields
+
+
+def _restore_format_fields(sql: str, fields: list) -> str:
+    """Inverse of _protect_format_fields on transpiled SQL: escape its braces and put the fields back."""
+    restored = set()
+
+    def restore(match):
+        index = int(match.group(1))
+        restored.add(index)
+        return fields[index]
+
+    sql = _FORMAT_FIELD_SENTINEL.sub(restore, sql.replace("{", "{{").replace("}", "}}"))
+    if len(restored) != len(fields):
+        raise ValueError("Error transpiling query: a format field was dropped")
+    return sql
+
+
+def transpile_cache_key(sql: str, source_dialect: str, target_dialect: str) -> str:
+    """Key of a transpiled query in the on-disk cache."""
+    sql_hash = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+    payload = json.dumps([sql_hash, source_dialect, target_dialect, sqlglot.__version__, TRANSPILER_HASH])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _transpile_cache_dir():
+    """Directory of the on-disk cache (FOEM_TRANSPILE_CACHE_DIR), or None when disabled."""
+    directory = os.getenv("FOEM_TRANSPILE_CACHE_DIR")
+    return Path(directory).expanduser() if directory else None
+
+
+def transpile_cache_path(sql: str, source_dialect: str, target_dialect: str):
+    """File of a transpiled query in the on-disk cache, or None when the cache is disabled."""
+    directory = _transpile_cache_dir()
+    if directory is None:
+        return None
+    return directory / f"{transpile_cache_key(sql, source_dialect, target_dialect)}.sql"
+
+
+@functools.lru_cache(maxsize=TRANSPILE_CACHE_SIZE)
+def _cached_transpile(sql: str, source_dialect: str, target_dialect: str) -> str:
+    """transpile_query through the on-disk cache; memoized per process."""
+    path = transpile_cache_path(sql, source_dialect, target_dialect)
+    if path is None:
+        return _transpile(sql, source_dialect, target_dialect)
+
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        pass
+
+    transpiled = _transpile(sql, source_dialect, target_dialect)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(path, transpiled)
+    return transpiled
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write text to path through a temporary file, so readers never see a partial file."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def clear_transpile_cache() -> None:
+    """Forget the transpiled queries memoized in this process (the on-disk cache is kept)."""
+    _cached_transpile.cache_clear()
+
+
+def _transpile(sql: str, source_dialect: str, target_dialect: str, stats: TranspileStats = None) -> str:
+    """Transpile without any caching."""
+    if stats is not None:
+        stats.queries += 1
+    phase = "parse"
+    start = time.perf_counter()
     try:
         # Parse the SQL
         tree = sqlglot.parse_one(sql, read=source_dialect)
 
         # Apply custom transformations for PostgreSQL -> Databricks
         if source_dialect == "postgres" and target_dialect == "databricks":
-            tree = _transform_date_operations(tree)
+            if stats is not None:
+                start = _record_phase(stats, phase, start)
+                phase = "transform"
+            tree = _transform_date_operations(tree, stats)
 
         # Generate the target dialect SQL
+        if stats is not None:
+            start = _record_phase(stats, phase, start)
+            phase = "generate"
         transpiled = tree.sql(dialect=target_dialect)
         return transpiled
     except Exception as e:
+        if stats is not None:
+            stats.failed += 1
         raise ValueError(f"Error transpiling query: {e}") from e
+    finally:
+        if stats is not None:
+            _record_phase(stats, phase, start)
+
+
+def _record_phase(stats: TranspileStats, phase: str, start: float) -> float:
+    """Add the time since start to a phase of stats and return the current time."""
+    now = time.perf_counter()
+    stats.seconds[phase] += now - start
+    return now
 
 
 def transpile_file(input_path: str, output_path: str = None, source_dialect: str = "postgres", target_dialect: str = "databricks") -> str:
@@ -545,7 +926,204 @@ def transpile_file(input_path: str, output_path: str = None, source_dialect: str
     return transpiled
 
 
-def main():
+def _sql_files(paths) -> list:
+    """The .sql files given as files, directories or glob patterns, sorted and without duplicates."""
+    files = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.update(path.glob("*.sql"))
+        elif path.exists():
+            files.add(path)
+        elif glob.has_magic(str(path)):
+            matches = [Path(match) for match in glob.glob(str(path), recursive=True)]
+            if not matches:
+                raise FileNotFoundError(f"No files match: {path}")
+            files.update(match for match in matches if match.is_file())
+        else:
+            raise FileNotFoundError(f"Input file not found: {path}")
+    return sorted(files)
+
+
+def stats_report(paths, source_dialect: str = "postgres", target_dialect: str = "databricks") -> dict:
+    """
+    Transpile every .sql file under paths with instrumentation. Each file is
+    transpiled the way SqlTest and the batch command transpile it (see
+    _batch_sql), so the numbers match those of a real run.
+
+    Returns:
+        {"sqlglot_version", "total": TranspileStats.to_dict() over all files,
+        "files": {path: {"passes", "skipped", "seconds", "rule_hits", "error"}}}
+    """
+    total = TranspileStats()
+    files = {}
+    for path in _sql_files(paths):
+        stats = TranspileStats()
+        error = None
+        try:
+            sql, format_fields, _ = _batch_sql(path, path.read_text(encoding="utf-8"))
+            transpile_query(sql, source_dialect, target_dialect, stats=stats, format_fields=format_fields)
+        except (OSError, ValueError) as e:
+            error = str(e)
+        total.merge(stats)
+        files[str(path)] = {
+            "passes": stats.passes,
+            "skipped": bool(stats.skipped),
+            "seconds": {phase: round(seconds, 6) for phase, seconds in stats.seconds.items()},
+            "rule_hits": {name: rule["hits"] for name, rule in stats.rules.items() if rule["hits"]},
+            "error": error,
+        }
+    return {"sqlglot_version": sqlglot.__version__, "total": total.to_dict(), "files": files}
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _batch_sql(path: Path, content: str):
+    """
+    The SQL SqlTest transpiles for a file.
+
+    SqlTest transpiles file bodies without comment lines, and candidate
+    queries (FORMAT_TEMPLATE_FILES) before they are formatted.
+
+    Returns:
+        (sql, format_fields, protected): the body, whether it is a format
+        template, and the SQL actually transpiled (and cached) for it
+    """
+    sql = split_sql_file(content)[1]
+    format_fields = any(path.match(pattern) for pattern in FORMAT_TEMPLATE_FILES)
+    protected = _protect_format_fields(sql)[0] if format_fields else sql
+    return sql, format_fields, protected
+
+
+def _transpile_job(job):
+    """Process pool worker: transpile (sql, source, target, format_fields) into (transpiled, None) or (None, error)."""
+    sql, source_dialect, target_dialect, format_fields = job
+    try:
+        return transpile_query(sql, source_dialect, target_dialect, format_fields=format_fields), None
+    except Exception as e:
+        # Any failure (including writing the cache entry) is reported for this file only
+        return None, str(e) or type(e).__name__
+
+
+def _load_batch_manifest(path: Path) -> dict:
+    """Read a batch manifest, or return an empty one if there is no usable one."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"Warning: Ignoring unreadable manifest {path}: {e}")
+        return {}
+    return manifest if manifest.get("version") == BATCH_MANIFEST_VERSION else {}
+
+
+def transpile_batch(paths, output_dir, source_dialect: str = "postgres", target_dialect: str = "databricks",
+                    workers: int = None) -> dict:
+    """
+    Transpile every .sql file under paths into output_dir, on a process pool.
+
+    Each file is transpiled the way SqlTest transpiles it (see _batch_sql),
+    so candidate queries stay format templates. Outputs keep their path
+    relative to the common parent of the inputs (e.g. template/F0001.sql).
+    When FOEM_TRANSPILE_CACHE_DIR is set, the results also go to the
+    on-disk cache under the keys transpile_query uses, so a Databricks run
+    starts with every file transpiled.
+
+    output_dir/manifest.json maps each file to the hashes of its source and
+    output. A file is skipped when its source hash, the dialects, the
+    sqlglot version and TRANSPILER_HASH match the manifest, its output is
+    still intact and its cache entry (if the cache is enabled) exists.
+    Files that cannot be read, transpiled or written are reported in the
+    result and the manifest; the other files are written regardless.
+
+    Args:
+        paths: SQL files, directories or glob patterns
+        output_dir: Directory for the transpiled files and the manifest
+        source_dialect: The source SQL dialect (default: "postgres")
+        target_dialect: The target SQL dialect (default: "databricks")
+        workers: Worker processes (default: one per CPU; 1 runs in-process)
+
+    Returns:
+        {"transpiled": [paths], "skipped": [paths], "failed": {path: error}}
+    """
+    output_dir = Path(output_dir)
+    manifest_path = output_dir / "manifest.json"
+    files = _sql_files(paths)
+    base = Path(os.path.commonpath([path.resolve().parent for path in files])) if files else Path.cwd()
+
+    previous = _load_batch_manifest(manifest_path)
+    setup = (source_dialect, target_dialect, sqlglot.__version__, TRANSPILER_HASH)
+    same_setup = tuple(previous.get(key) for key in ("source", "target", "sqlglot_version", "transpiler_hash")) == setup
+    entries = previous.get("files", {}) if same_setup else {}
+    failed = previous.get("failed", {}) if same_setup else {}
+
+    result = {"transpiled": [], "skipped": [], "failed": {}}
+
+    def fail(name, error):
+        entries.pop(name, None)
+        failed[name] = error
+        result["failed"][name] = error
+
+    pending = []
+    for path in files:
+        name = path.resolve().relative_to(base).as_posix()
+        try:
+            content = path.read_text(encoding="utf-8")
+        except (OSError, ValueError) as e:
+            fail(name, f"Error reading {path}: {e}")
+            continue
+        source_hash = _sha256(content)
+        sql, format_fields, protected = _batch_sql(path, content)
+        cache_path = transpile_cache_path(protected, source_dialect, target_dialect)
+        entry = entries.get(name)
+        output_path = output_dir / name
+        if entry and entry["source_sha256"] == source_hash and output_path.exists() \
+                and _sha256(output_path.read_text(encoding="utf-8")) == entry["output_sha256"] \
+                and (cache_path is None or cache_path.exists()):
+            result["skipped"].append(name)
+            continue
+        pending.append((name, (sql, source_dialect, target_dialect, format_fields), source_hash))
+
+    jobs = [job for _, job, _ in pending]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            outcomes = list(executor.map(_transpile_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        outcomes = [_transpile_job(job) for job in jobs]
+
+    for (name, _, source_hash), (transpiled, error) in zip(pending, outcomes):
+        if error is None:
+            output_path = output_dir / name
+            try:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                _write_atomic(output_path, transpiled)
+            except OSError as e:
+                error = f"Error writing {output_path}: {e}"
+        if error is not None:
+            fail(name, error)
+            continue
+        entries[name] = {"source_sha256": source_hash, "output_sha256": _sha256(transpiled)}
+        failed.pop(name, None)
+        result["transpiled"].append(name)
+
+    manifest = {
+        "version": BATCH_MANIFEST_VERSION,
+        "source": source_dialect,
+        "target": target_dialect,
+        "sqlglot_version": sqlglot.__version__,
+        "transpiler_hash": TRANSPILER_HASH,
+        "files": dict(sorted(entries.items())),
+        "failed": dict(sorted(failed.items())),
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2))
+    return result
+
+
+def _print_example():
     """
     Example usage of the transpiler.
     """
@@ -598,5 +1176,67 @@ def main():
     print("\n")
 
 
+def main(argv=None):
+    """
+    Command line interface.
+
+    Commands:
+        example: Transpile an example query (the default)
+        file: Transpile one file
+        stats: Report rule and phase statistics for a corpus as JSON
+        batch: Transpile a corpus into a directory, skipping unchanged files
+    """
+    default_paths = [str(Path(__file__).parent.parent.parent / name) for name in ("template", "query")]
+    parser = argparse.ArgumentParser(prog="python -m foem.transpiler",
+                                     description="Transpile SQL from PostgreSQL to Databricks Spark SQL")
+    dialects = argparse.ArgumentParser(add_help=False)
+    dialects.add_argument("--source", default="postgres", help="Source dialect (default: postgres)")
+    dialects.add_argument("--target", default="databricks", help="Target dialect (default: databricks)")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("example", help="Transpile an example query")
+    file_parser = subparsers.add_parser("file", parents=[dialects], help="Transpile one SQL file")
+    file_parser.add_argument("input", help="Input SQL file")
+    file_parser.add_argument("--output", "-o", help="Write the transpiled SQL here instead of printing it")
+    stats_parser = subparsers.add_parser("stats", parents=[dialects],
+                                         help="Report per-rule and per-phase statistics for a corpus as JSON")
+    stats_parser.add_argument("paths", nargs="*", default=default_paths,
+                              help="SQL files or directories (default: the template and query directories)")
+    stats_parser.add_argument("--output", "-o", help="Write the report here instead of printing it")
+    batch_parser = subparsers.add_parser("batch", parents=[dialects],
+                                         help="Transpile all files in parallel, skipping unchanged ones")
+    batch_parser.add_argument("paths", nargs="*", default=default_paths,
+                              help="SQL files, directories or glob patterns "
+                                   "(default: the template and query directories)")
+    batch_parser.add_argument("--output-dir", help="Output directory (default: transpiled/<target>)")
+    batch_parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    if args.command == "file":
+        transpiled = transpile_file(args.input, args.output, args.source, args.target)
+        if not args.output:
+            print(transpiled)
+    elif args.command == "stats":
+        report = stats_report(args.paths, args.source, args.target)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            Path(args.output).write_text(text + "\n")
+            total = report["total"]
+            print(f"Transpiled {total['queries']} query(s) ({total['failed']} failed, {total['skipped']} without "
+                  f"rewrites), report saved to: {args.output}")
+        else:
+            print(text)
+    elif args.command == "batch":
+        output_dir = args.output_dir or os.path.join("transpiled", args.target)
+        result = transpile_batch(args.paths, output_dir, args.source, args.target, args.workers)
+        for name, error in result["failed"].items():
+            print(f"Failed: {name}: {error}")
+        print(f"Transpiled {len(result['transpiled'])} file(s), skipped {len(result['skipped'])} unchanged, "
+              f"{len(result['failed'])} failed; output in {output_dir}")
+        if result["failed"]:
+            sys.exit(1)
+    else:
+        _print_example()
+
+
 if __name__ == "__main__":
     main()
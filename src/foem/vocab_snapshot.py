@@ -0,0 +1,221 @@
+"""
+Compact, memory-mappable snapshot of the concept vocabulary used by SqlTest.
+
+File layout (native byte order, 4-byte aligned sections):
+
+    magic            8 bytes, b"FOEMVOC1"
+    header length    uint32
+    header           JSON: version key, vocabularies, record count, byte order
+    vocab indexes    uint32[count]   index into header["vocabularies"]
+    name offsets     uint32[count+1] into the names blob
+    code offsets     uint32[count+1] into the codes blob
+    names blob       UTF-8 concept names
+    codes blob       UTF-8 concept codes
+
+Records are sorted by lowercased concept name, so lookups are a binary search
+over the mapped file and nothing has to be unpacked into Python dicts.
+
+The same bytes can be published in a shared memory segment (publish/attach),
+so worker processes read one copy of the vocabulary instead of each building
+their own.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"FOEMVOC1"
+_ALIGN = 4
+
+
+def _pad(length: int) -> int:
+    """Number of padding bytes needed to align length to _ALIGN."""
+    return -length % _ALIGN
+
+
+def pack_vocab(vocab_dict: Dict[str, Dict[str, str]], version_key: str) -> bytes:
+    """
+    Pack a vocab dict ({"RxNorm": {"concept_code": "concept_name", ...}, ...})
+    into the snapshot format.
+
+    Records with the same lowercased name keep the vocabulary/code order of
+    vocab_dict, so lookups return matches in the same order as SqlTest's
+    in-memory name index.
+    """
+    vocabularies = list(vocab_dict)
+    records = [
+        (concept_name.lower(), vocab_idx, concept_name, concept_code)
+        for vocab_idx, vocab_id in enumerate(vocabularies)
+        for concept_code, concept_name in vocab_dict[vocab_id].items()
+    ]
+    records.sort(key=lambda record: record[0])
+
+    vocab_indexes = array("I")
+    name_offsets = array("I", [0])
+    code_offsets = array("I", [0])
+    names = bytearray()
+    codes = bytearray()
+    for _, vocab_idx, concept_name, concept_code in records:
+        vocab_indexes.append(vocab_idx)
+        names += concept_name.encode("utf-8")
+        codes += concept_code.encode("utf-8")
+        name_offsets.append(len(names))
+        code_offsets.append(len(codes))
+
+    header = json.dumps({
+        "version_key": version_key,
+        "vocabularies": vocabularies,
+        "count": len(records),
+        "byteorder": sys.byteorder,
+    }).encode("utf-8")
+
+    out = bytearray(MAGIC)
+    out += struct.pack("=I", len(header))
+    out += header
+    out += b"\0" * _pad(len(out))
+    for section in (vocab_indexes, name_offsets, code_offsets):
+        out += section.tobytes()
+    out += names
+    out += codes
+    return bytes(out)
+
+
+class VocabSnapshot:
+    """
+    Read-only view over a packed vocabulary.
+
+    Behaves like the name index of SqlTest: get(lowercased_name) returns the
+    list of (vocabulary_id, concept_code) matches. The buffer can be bytes, a
+    memory-mapped file or a shared memory segment; it is never copied.
+    """
+
+    def __init__(self, buffer, on_close=None):
+        self._buffer = memoryview(buffer)
+        self._on_close = on_close
+
+        if bytes(self._buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a foem vocabulary snapshot")
+        (header_len,) = struct.unpack_from("=I", self._buffer, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(bytes(self._buffer[header_start:header_start + header_len]))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError("Vocabulary snapshot was written with a different byte order")
+
+        self.version_key: str = header["version_key"]
+        self.vocabularies: List[str] = header["vocabularies"]
+        self._count: int = header["count"]
+
+        offset = header_start + header_len
+        offset += _pad(offset)
+        count = self._count
+        self._vocab_indexes = self._buffer[offset:offset + 4 * count].cast("I")
+        offset += 4 * count
+        self._name_offsets = self._buffer[offset:offset + 4 * (count + 1)].cast("I")
+        offset += 4 * (count + 1)
+        self._code_offsets = self._buffer[offset:offset + 4 * (count + 1)].cast("I")
+        offset += 4 * (count + 1)
+        self._names = self._buffer[offset:offset + self._name_offsets[count]]
+        offset += self._name_offsets[count]
+        self._codes = self._buffer[offset:offset + self._code_offsets[count]]
+
+    @classmethod
+    def load(cls, path) -> "VocabSnapshot":
+        """Memory-map a snapshot file."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, on_close=mapped.close)
+
+    @staticmethod
+    def save(vocab_dict: Dict[str, Dict[str, str]], version_key: str, path) -> None:
+        """Write a snapshot atomically, so concurrent readers never see a partial file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(pack_vocab(vocab_dict, version_key))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def attach(cls, name: str) -> "VocabSnapshot":
+        """
+        Attach to a snapshot published with publish(), without copying it.
+        Closing the snapshot detaches; the publisher owns (and unlinks) the segment.
+        """
+        shm = _open_shared_memory(name)
+        return cls(shm.buf, on_close=shm.close)
+
+    def publish(self, name: Optional[str] = None) -> shared_memory.SharedMemory:
+        """
+        Copy the snapshot into a new shared memory segment for attach().
+
+        The caller must keep the returned segment alive while workers use it,
+        then close() and unlink() it.
+        """
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(self._buffer))
+        shm.buf[:len(self._buffer)] = self._buffer
+        return shm
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _name(self, idx: int) -> str:
+        return bytes(self._names[self._name_offsets[idx]:self._name_offsets[idx + 1]]).decode("utf-8")
+
+    def _code(self, idx: int) -> str:
+        return bytes(self._codes[self._code_offsets[idx]:self._code_offsets[idx + 1]]).decode("utf-8")
+
+    def _lower_bound(self, key: str) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid).lower() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def get(self, key: str, default=None) -> Optional[List[Tuple[str, str]]]:
+        """Return [(vocabulary_id, concept_code)] for a lowercased concept name."""
+        idx = self._lower_bound(key)
+        matches = []
+        while idx < self._count and self._name(idx).lower() == key:
+            matches.append((self.vocabularies[self._vocab_indexes[idx]], self._code(idx)))
+            idx += 1
+        return matches or default
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def to_vocab_dict(self) -> Dict[str, Dict[str, str]]:
+        """Unpack the snapshot back into the nested vocab dict used by SqlTest."""
+        vocab_dict: Dict[str, Dict[str, str]] = {vocab: {} for vocab in self.vocabularies}
+        for idx in range(self._count):
+            vocab_dict[self.vocabularies[self._vocab_indexes[idx]]][self._code(idx)] = self._name(idx)
+        return vocab_dict
+
+    def close(self) -> None:
+        """Release the views and the underlying buffer."""
+        for view in (self._vocab_indexes, self._name_offsets, self._code_offsets, self._names, self._codes, self._buffer):
+            view.release()
+        if self._on_close:
+            self._on_close()
+            self._on_close = None
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Open an existing segment without registering it with this process's
+    resource tracker, which would otherwise unlink it when a worker exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
@@ -1,4 +1,4 @@
--- Number of <ARG-GENDER><O> patients with <ARG-CONDITION><O>.
+-- Number of <ARG-GENDER><0> patients with <ARG-CONDITION><0>.
 
 WITH 
 -- Get gender concepts
@@ -1,4 +1,4 @@
--- Number of patients with <ARG-CONDITION><O>.
+-- Number of patients with <ARG-CONDITION><0>.
 
 WITH 
 -- Get source concept for condition
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+# (concept_id, concept_code, concept_name, vocabulary_id, domain_id)
+CONCEPTS = [
+    (1, "44054006", "Type 2 diabetes mellitus", "SNOMED", "Condition"),
+    (2, "38341003", "Hypertensive disorder", "SNOMED", "Condition"),
+    (3, "195967001", "Asthma", "SNOMED", "Condition"),
+    (4, "E11", "Type 2 diabetes mellitus without complications", "ICD10CM", "Condition"),
+    (5, "I10", "Essential hypertension", "ICD10CM", "Condition"),
+]
+
+# (person_id, condition_concept_id) for every condition occurrence
+CONDITIONS = [(1, 1), (1, 2), (2, 1), (2, 2), (2, 3), (3, 2), (3, 3), (4, 1), (4, 3), (5, 5), (5, 1)]
+
+
+@pytest.fixture
+def omop_engine():
+    """An in-memory SQLite database with a small OMOP vocabulary and condition table."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE concept (concept_id INTEGER, concept_code TEXT, concept_name TEXT, vocabulary_id TEXT, "
+            "domain_id TEXT, standard_concept TEXT, invalid_reason TEXT)"
+        ))
+        conn.execute(text("CREATE TABLE concept_relationship (concept_id_1 INTEGER, concept_id_2 INTEGER, "
+                          "relationship_id TEXT, invalid_reason TEXT)"))
+        conn.execute(text("CREATE TABLE vocabulary (vocabulary_id TEXT, vocabulary_version TEXT)"))
+        for vocabulary in ("SNOMED", "ICD10CM"):
+            conn.execute(text("INSERT INTO vocabulary VALUES (:vocab, 'v1')"), {"vocab": vocabulary})
+        conn.execute(text("CREATE TABLE concept_ancestor (ancestor_concept_id INTEGER, descendant_concept_id INTEGER)"))
+        conn.execute(text("CREATE TABLE condition_occurrence (condition_occurrence_id INTEGER, person_id INTEGER, "
+                          "condition_concept_id INTEGER)"))
+        for concept_id, code, name, vocabulary, domain in CONCEPTS:
+            conn.execute(text("INSERT INTO concept VALUES (:id, :code, :name, :vocab, :domain, 'S', NULL)"),
+                         {"id": concept_id, "code": code, "name": name, "vocab": vocabulary, "domain": domain})
+            conn.execute(text("INSERT INTO concept_ancestor VALUES (:id, :id)"), {"id": concept_id})
+        # The ICD10CM codes map to their SNOMED equivalents
+        for source, target in ((4, 1), (5, 2)):
+            conn.execute(text("INSERT INTO concept_relationship VALUES (:source, :target, 'Maps to', NULL)"),
+                         {"source": source, "target": target})
+        for idx, (person_id, concept_id) in enumerate(CONDITIONS):
+            conn.execute(text("INSERT INTO condition_occurrence VALUES (:idx, :person, :concept)"),
+                         {"idx": idx, "person": person_id, "concept": concept_id})
+    yield engine
+    engine.dispose()
@@ -0,0 +1 @@
+WITH valid_drug_ids AS (SELECT concept_id FROM concept WHERE domain_id = 'Drug' AND standard_concept = 'S' AND invalid_reason IS NULL), unique_patient_drugs AS (SELECT DISTINCT de.person_id, de.drug_concept_id FROM drug_exposure AS de WHERE de.drug_concept_id IN (SELECT concept_id FROM valid_drug_ids)), candidates AS (SELECT person_id FROM unique_patient_drugs GROUP BY person_id HAVING COUNT(*) >= 2), drug_pairs AS (SELECT t1.drug_concept_id AS drug1_id, t2.drug_concept_id AS drug2_id, COUNT(*) AS co_prescription_count /* FAST: No need for COUNT(DISTINCT) anymore */ FROM unique_patient_drugs AS t1 INNER JOIN candidates AS c ON t1.person_id = c.person_id INNER JOIN unique_patient_drugs AS t2 ON t1.person_id = t2.person_id AND t1.drug_concept_id < t2.drug_concept_id /* Force Order (A-B) */ GROUP BY t1.drug_concept_id, t2.drug_concept_id ORDER BY co_prescription_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c1.concept_name AS drug1_name, c2.concept_name AS drug2_name FROM drug_pairs AS dp INNER JOIN concept AS c1 ON dp.drug1_id = c1.concept_id INNER JOIN concept AS c2 ON dp.drug2_id = c2.concept_id
\ No newline at end of file
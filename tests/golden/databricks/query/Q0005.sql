@@ -0,0 +1 @@
+WITH valid_drugs AS (SELECT concept_id, concept_name FROM concept WHERE domain_id = 'Drug' AND standard_concept = 'S' AND invalid_reason IS NULL), top_drugs AS (SELECT d.drug_concept_id FROM drug_exposure AS d INNER JOIN valid_drugs AS v ON d.drug_concept_id = v.concept_id GROUP BY d.drug_concept_id ORDER BY COUNT(DISTINCT d.person_id) DESC NULLS FIRST LIMIT 50 /* <--- ADJUST THIS NUMBER TO WIDEN/NARROW SEARCH */), filtered_drug_eras AS (SELECT de.person_id, de.drug_concept_id, de.drug_exposure_start_date AS start_date, COALESCE(de.drug_exposure_end_date, de.drug_exposure_start_date) AS end_date FROM drug_exposure AS de INNER JOIN top_drugs AS td ON de.drug_concept_id = td.drug_concept_id), concomitant_quads AS (SELECT d1.drug_concept_id AS d1_id, d2.drug_concept_id AS d2_id, d3.drug_concept_id AS d3_id, d4.drug_concept_id AS d4_id, COUNT(DISTINCT d1.person_id) AS patient_count FROM filtered_drug_eras AS d1 INNER JOIN filtered_drug_eras AS d2 ON d1.person_id = d2.person_id AND d2.drug_concept_id > d1.drug_concept_id AND d2.start_date <= d1.end_date AND d2.end_date >= d1.start_date INNER JOIN filtered_drug_eras AS d3 ON d1.person_id = d3.person_id AND d3.drug_concept_id > d2.drug_concept_id AND d3.start_date <= d1.end_date AND d3.end_date >= d1.start_date /* Overlap D1 */ AND d3.start_date <= d2.end_date AND d3.end_date >= d2.start_date /* Overlap D2 */ INNER JOIN filtered_drug_eras AS d4 ON d1.person_id = d4.person_id AND d4.drug_concept_id > d3.drug_concept_id AND d4.start_date <= d1.end_date AND d4.end_date >= d1.start_date /* Overlap D1 */ AND d4.start_date <= d2.end_date AND d4.end_date >= d2.start_date /* Overlap D2 */ AND d4.start_date <= d3.end_date AND d4.end_date >= d3.start_date /* Overlap D3 */ WHERE GREATEST(d1.start_date, d2.start_date, d3.start_date, d4.start_date) <= LEAST(d1.end_date, d2.end_date, d3.end_date, d4.end_date) GROUP BY d1.drug_concept_id, d2.drug_concept_id, d3.drug_concept_id, d4.drug_concept_id ORDER BY patient_count DESC NULLS FIRST LIMIT 10) SELECT v1.concept_name AS drug1_name, v2.concept_name AS drug2_name, v3.concept_name AS drug3_name, v4.concept_name AS drug4_name, q.patient_count FROM concomitant_quads AS q JOIN valid_drugs AS v1 ON q.d1_id = v1.concept_id JOIN valid_drugs AS v2 ON q.d2_id = v2.concept_id JOIN valid_drugs AS v3 ON q.d3_id = v3.concept_id JOIN valid_drugs AS v4 ON q.d4_id = v4.concept_id
\ No newline at end of file
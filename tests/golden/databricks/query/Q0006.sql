@@ -0,0 +1 @@
+WITH frequent_drugs AS (SELECT drug_concept_id FROM drug_era GROUP BY drug_concept_id ORDER BY COUNT(DISTINCT person_id) DESC NULLS FIRST LIMIT 500 /* Keep this number as low as your business logic allows */), valid_eras AS (SELECT de.person_id, de.drug_concept_id FROM drug_era AS de JOIN frequent_drugs AS fd ON de.drug_concept_id = fd.drug_concept_id JOIN concept AS c ON c.concept_id = de.drug_concept_id WHERE c.domain_id = 'Drug' AND c.standard_concept = 'S'), patient_baskets AS (SELECT person_id, COLLECT_LIST(DISTINCT drug_concept_id) AS drug_list FROM valid_eras GROUP BY person_id HAVING CARDINALITY(COLLECT_LIST(DISTINCT drug_concept_id)) >= 4), combinations AS (SELECT d1 AS drug1, d2 AS drug2, d3 AS drug3, d4 AS drug4, person_id FROM patient_baskets, EXPLODE(drug_list, d2), EXPLODE(drug_list, d3), EXPLODE(drug_list, d4) WHERE d2 > d1 AND d3 > d2 AND d4 > d3) SELECT c1.concept_name AS drug1_name, c2.concept_name AS drug2_name, c3.concept_name AS drug3_name, c4.concept_name AS drug4_name, COUNT(DISTINCT comb.person_id) AS patient_count FROM combinations AS comb JOIN concept AS c1 ON comb.drug1 = c1.concept_id JOIN concept AS c2 ON comb.drug2 = c2.concept_id JOIN concept AS c3 ON comb.drug3 = c3.concept_id JOIN concept AS c4 ON comb.drug4 = c4.concept_id GROUP BY 1, 2, 3, 4 ORDER BY patient_count DESC NULLS FIRST LIMIT {self.result_limit}
\ No newline at end of file
@@ -0,0 +1 @@
+WITH valid_drug_ids AS (SELECT concept_id FROM concept WHERE domain_id = 'Drug' AND standard_concept = 'S' AND invalid_reason IS NULL), candidates AS (SELECT person_id FROM drug_exposure WHERE drug_concept_id IN (SELECT concept_id FROM valid_drug_ids) GROUP BY person_id HAVING COUNT(DISTINCT drug_concept_id) >= 3), clean_exposures AS (SELECT de.person_id, de.drug_concept_id, de.drug_exposure_start_date AS s_date FROM drug_exposure AS de INNER JOIN candidates AS c ON de.person_id = c.person_id WHERE de.drug_concept_id IN (SELECT concept_id FROM valid_drug_ids) AND de.drug_exposure_start_date IS NOT NULL), triples AS (SELECT d1.drug_concept_id AS drug_1, d2.drug_concept_id AS drug_2, d3.drug_concept_id AS drug_3, COUNT(DISTINCT d1.person_id) AS person_count FROM clean_exposures AS d1 INNER JOIN clean_exposures AS d2 ON d1.person_id = d2.person_id AND d1.drug_concept_id < d2.drug_concept_id /* Force Concept Order */ AND d2.s_date BETWEEN (d1.s_date - 30) AND (DATE_ADD(d1.s_date, 30)) INNER JOIN clean_exposures AS d3 ON d1.person_id = d3.person_id AND d2.drug_concept_id < d3.drug_concept_id /* Force Concept Order */ AND d3.s_date BETWEEN (d1.s_date - 30) AND (DATE_ADD(d1.s_date, 30)) AND d3.s_date BETWEEN (d2.s_date - 30) AND (DATE_ADD(d2.s_date, 30)) WHERE DATEDIFF(GREATEST(d1.s_date, d2.s_date, d3.s_date), LEAST(d1.s_date, d2.s_date, d3.s_date)) <= 30 GROUP BY d1.drug_concept_id, d2.drug_concept_id, d3.drug_concept_id ORDER BY person_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c1.concept_name AS drug1_name, c2.concept_name AS drug2_name, c3.concept_name AS drug3_name FROM triples AS t INNER JOIN concept AS c1 ON t.drug_1 = c1.concept_id INNER JOIN concept AS c2 ON t.drug_2 = c2.concept_id INNER JOIN concept AS c3 ON t.drug_3 = c3.concept_id
\ No newline at end of file
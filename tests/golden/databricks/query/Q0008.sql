@@ -0,0 +1 @@
+WITH candidates AS (SELECT person_id FROM drug_exposure GROUP BY person_id HAVING COUNT(*) >= 3), exposure_ranges AS (SELECT de.person_id, de.drug_concept_id, STRUCT(de.drug_exposure_start_date AS start, de.drug_exposure_end_date AS end) AS dr FROM drug_exposure AS de INNER JOIN candidates AS c ON de.person_id = c.person_id WHERE de.drug_exposure_start_date IS NOT NULL), overlapping_triplets AS (SELECT d1.person_id, d1.drug_concept_id AS drug_1, d2.drug_concept_id AS drug_2, d3.drug_concept_id AS drug_3, (STRUCT(GREATEST(STRUCT(GREATEST(d1.dr.start, d2.dr.start) AS start, LEAST(d1.dr.end, d2.dr.end) AS end).start, d3.dr.start) AS start, LEAST(STRUCT(GREATEST(d1.dr.start, d2.dr.start) AS start, LEAST(d1.dr.end, d2.dr.end) AS end).end, d3.dr.end) AS end)) AS overlap_period FROM exposure_ranges AS d1 INNER JOIN exposure_ranges AS d2 ON d1.person_id = d2.person_id AND d1.drug_concept_id < d2.drug_concept_id INNER JOIN exposure_ranges AS d3 ON d1.person_id = d3.person_id AND d2.drug_concept_id < d3.drug_concept_id AND STRUCT(GREATEST(d1.dr.start, d2.dr.start) AS start, LEAST(d1.dr.end, d2.dr.end) AS end).start <= d3.dr.end AND d3.dr.start <= STRUCT(GREATEST(d1.dr.start, d2.dr.start) AS start, LEAST(d1.dr.end, d2.dr.end) AS end).end LIMIT {self.result_limit}) SELECT c1.concept_name AS drug_name_1, c2.concept_name AS drug_name_2, c3.concept_name AS drug_name_3 FROM overlapping_triplets AS t LEFT JOIN concept AS c1 ON t.drug_1 = c1.concept_id LEFT JOIN concept AS c2 ON t.drug_2 = c2.concept_id LEFT JOIN concept AS c3 ON t.drug_3 = c3.concept_id
\ No newline at end of file
@@ -0,0 +1 @@
+WITH valid_condition_ids AS (SELECT concept_id FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL), candidates AS (SELECT person_id FROM condition_occurrence WHERE condition_concept_id IN (SELECT concept_id FROM valid_condition_ids) GROUP BY person_id HAVING COUNT(DISTINCT condition_concept_id) >= 2), clean_conditions AS (SELECT co.person_id, co.condition_concept_id, co.condition_start_date FROM condition_occurrence AS co INNER JOIN candidates AS c ON co.person_id = c.person_id WHERE co.condition_concept_id IN (SELECT concept_id FROM valid_condition_ids) AND co.condition_start_date IS NOT NULL), pair_counts AS (SELECT c1.condition_concept_id AS cond1_id, c2.condition_concept_id AS cond2_id, COUNT(DISTINCT c1.person_id) AS patient_count FROM clean_conditions AS c1 INNER JOIN clean_conditions AS c2 ON c1.person_id = c2.person_id AND c1.condition_concept_id < c2.condition_concept_id /* Force Order (Removes duplicates & need for LEAST/GREATEST) */ AND c2.condition_start_date BETWEEN (c1.condition_start_date - 30) AND (DATE_ADD(c1.condition_start_date, 30)) GROUP BY c1.condition_concept_id, c2.condition_concept_id ORDER BY patient_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT concept1.concept_name AS condition1_name, concept2.concept_name AS condition2_name FROM pair_counts AS pc INNER JOIN concept AS concept1 ON pc.cond1_id = concept1.concept_id INNER JOIN concept AS concept2 ON pc.cond2_id = concept2.concept_id
\ No newline at end of file
@@ -0,0 +1 @@
+WITH valid_condition_ids AS (SELECT concept_id FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL), unique_patient_conditions AS (SELECT DISTINCT co.person_id, co.condition_concept_id FROM condition_occurrence AS co WHERE co.condition_concept_id IN (SELECT concept_id FROM valid_condition_ids)), candidates AS (SELECT person_id FROM unique_patient_conditions GROUP BY person_id HAVING COUNT(*) >= 2), pair_counts AS (SELECT t1.condition_concept_id AS cond1_id, t2.condition_concept_id AS cond2_id, COUNT(*) AS patient_count /* FAST: No need for COUNT(DISTINCT) anymore */ FROM unique_patient_conditions AS t1 INNER JOIN candidates AS c ON t1.person_id = c.person_id INNER JOIN unique_patient_conditions AS t2 ON t1.person_id = t2.person_id AND t1.condition_concept_id < t2.condition_concept_id /* Force Order (Removes duplicates) */ GROUP BY t1.condition_concept_id, t2.condition_concept_id ORDER BY patient_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c1.concept_name AS condition1_name, c2.concept_name AS condition2_name FROM pair_counts AS pc INNER JOIN concept AS c1 ON pc.cond1_id = c1.concept_id INNER JOIN concept AS c2 ON pc.cond2_id = c2.concept_id
\ No newline at end of file
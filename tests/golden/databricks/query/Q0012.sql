@@ -0,0 +1 @@
+WITH valid_condition_ids AS (SELECT concept_id FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL), candidates AS (SELECT person_id FROM condition_era WHERE condition_concept_id IN (SELECT concept_id FROM valid_condition_ids) GROUP BY person_id HAVING COUNT(DISTINCT condition_concept_id) >= 2), relevant_eras AS (SELECT ce.person_id, ce.condition_concept_id, ce.condition_era_start_date AS s_date, ce.condition_era_end_date AS e_date FROM condition_era AS ce INNER JOIN candidates AS c ON ce.person_id = c.person_id WHERE ce.condition_concept_id IN (SELECT concept_id FROM valid_condition_ids)), patient_pair_status AS (SELECT e1.condition_concept_id AS cond1, e2.condition_concept_id AS cond2, MAX(CASE WHEN e1.s_date <= e2.e_date AND e1.e_date >= e2.s_date THEN 1 ELSE 0 END) AS has_overlap FROM relevant_eras AS e1 INNER JOIN relevant_eras AS e2 ON e1.person_id = e2.person_id AND e1.condition_concept_id < e2.condition_concept_id /* Force Order */ GROUP BY e1.person_id, e1.condition_concept_id, e2.condition_concept_id HAVING MAX(CASE WHEN e1.s_date <= e2.e_date AND e1.e_date >= e2.s_date THEN 1 ELSE 0 END) = 0), sequential_pairs AS (SELECT cond1, cond2, COUNT(*) AS patient_count FROM patient_pair_status GROUP BY cond1, cond2 ORDER BY patient_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c1.concept_name AS condition1_name, c2.concept_name AS condition2_name FROM sequential_pairs AS sp INNER JOIN concept AS c1 ON sp.cond1 = c1.concept_id INNER JOIN concept AS c2 ON sp.cond2 = c2.concept_id
\ No newline at end of file
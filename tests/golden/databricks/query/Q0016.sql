@@ -0,0 +1 @@
+WITH valid_conditions AS (SELECT concept_id FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL), triads AS (SELECT e1.condition_concept_id AS cond1_concept_id, e2.condition_concept_id AS cond2_concept_id, e3.condition_concept_id AS cond3_concept_id, COUNT(DISTINCT e1.person_id) AS person_count FROM condition_occurrence AS e1 INNER JOIN valid_conditions AS vc1 ON e1.condition_concept_id = vc1.concept_id INNER JOIN condition_occurrence AS e2 ON e2.person_id = e1.person_id AND e2.condition_concept_id > e1.condition_concept_id INNER JOIN valid_conditions AS vc2 ON e2.condition_concept_id = vc2.concept_id INNER JOIN condition_occurrence AS e3 ON e3.person_id = e1.person_id AND e3.condition_concept_id > e2.condition_concept_id INNER JOIN valid_conditions AS vc3 ON e3.condition_concept_id = vc3.concept_id WHERE DATEDIFF(GREATEST(e1.condition_start_date, e2.condition_start_date, e3.condition_start_date), LEAST(e1.condition_start_date, e2.condition_start_date, e3.condition_start_date)) <= 300 GROUP BY e1.condition_concept_id, e2.condition_concept_id, e3.condition_concept_id ORDER BY person_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c1.concept_name AS condition1_name, c2.concept_name AS condition2_name, c3.concept_name AS condition3_name FROM triads AS t INNER JOIN concept AS c1 ON c1.concept_id = t.cond1_concept_id INNER JOIN concept AS c2 ON c2.concept_id = t.cond2_concept_id INNER JOIN concept AS c3 ON c3.concept_id = t.cond3_concept_id
\ No newline at end of file
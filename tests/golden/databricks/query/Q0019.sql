@@ -0,0 +1 @@
+WITH valid_conditions AS (SELECT concept_id FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL), condition_pairs AS (SELECT a.condition_concept_id AS cond1_id, b.condition_concept_id AS cond2_id, COUNT(DISTINCT a.person_id) AS person_count FROM condition_occurrence AS a INNER JOIN valid_conditions AS vc1 ON a.condition_concept_id = vc1.concept_id INNER JOIN condition_occurrence AS b ON b.person_id = a.person_id AND b.condition_start_date > a.condition_start_date AND a.condition_concept_id <> b.condition_concept_id INNER JOIN valid_conditions AS vc2 ON b.condition_concept_id = vc2.concept_id GROUP BY a.condition_concept_id, b.condition_concept_id ORDER BY person_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c1.concept_name AS first_condition, c2.concept_name AS second_condition FROM condition_pairs AS cp INNER JOIN concept AS c1 ON c1.concept_id = cp.cond1_id INNER JOIN concept AS c2 ON c2.concept_id = cp.cond2_id
\ No newline at end of file
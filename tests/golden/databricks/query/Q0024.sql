@@ -0,0 +1 @@
+WITH valid_conditions AS (SELECT concept_id FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL), counts AS (SELECT condition_concept_id, CAST(EXTRACT(YEAR FROM condition_start_date) AS INT) AS year, COUNT(DISTINCT person_id) AS n FROM condition_occurrence INNER JOIN valid_conditions AS vc ON vc.concept_id = condition_concept_id WHERE condition_start_date IS NOT NULL GROUP BY condition_concept_id, CAST(EXTRACT(YEAR FROM condition_start_date) AS INT)), ranked AS (SELECT c1.concept_name AS condition_name, year, n, RANK() OVER (PARTITION BY condition_concept_id ORDER BY n DESC NULLS FIRST, year NULLS LAST) AS rnk, SUM(n) OVER (PARTITION BY condition_concept_id) AS total_patients FROM counts INNER JOIN concept AS c1 ON c1.concept_id = condition_concept_id) SELECT condition_name, year AS most_common_year FROM ranked WHERE rnk = 1 ORDER BY total_patients DESC NULLS FIRST LIMIT {self.result_limit}
\ No newline at end of file
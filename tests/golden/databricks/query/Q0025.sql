@@ -0,0 +1 @@
+WITH valid_drugs AS (SELECT concept_id FROM concept WHERE domain_id = 'Drug' AND standard_concept = 'S' AND invalid_reason IS NULL), pairs AS (SELECT e1.drug_concept_id AS drug_a, e2.drug_concept_id AS drug_b, COUNT(DISTINCT e1.person_id) AS person_count FROM drug_exposure AS e1 INNER JOIN valid_drugs AS vd1 ON e1.drug_concept_id = vd1.concept_id INNER JOIN drug_exposure AS e2 ON e2.person_id = e1.person_id AND e2.drug_concept_id <> e1.drug_concept_id AND DATEDIFF(e2.drug_exposure_start_date, e1.drug_exposure_start_date) >= 30 INNER JOIN valid_drugs AS vd2 ON e2.drug_concept_id = vd2.concept_id GROUP BY e1.drug_concept_id, e2.drug_concept_id ORDER BY person_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c2.concept_name AS drug_b_name, c1.concept_name AS drug_a_name FROM pairs AS p INNER JOIN concept AS c1 ON c1.concept_id = p.drug_a INNER JOIN concept AS c2 ON c2.concept_id = p.drug_b
\ No newline at end of file
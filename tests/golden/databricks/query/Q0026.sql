@@ -0,0 +1 @@
+WITH valid_drugs AS (SELECT concept_id FROM concept WHERE domain_id = 'Drug' AND standard_concept = 'S' AND invalid_reason IS NULL), ordered AS (SELECT person_id, drug_concept_id AS drug_a, LEAD(drug_concept_id) OVER (PARTITION BY person_id ORDER BY drug_exposure_start_date NULLS LAST, drug_exposure_id NULLS LAST) AS drug_b FROM drug_exposure INNER JOIN valid_drugs AS vd ON drug_concept_id = vd.concept_id), pairs AS (SELECT drug_a, drug_b, COUNT(DISTINCT person_id) AS person_count FROM ordered WHERE drug_b IS NOT NULL AND drug_a <> drug_b GROUP BY drug_a, drug_b ORDER BY person_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c1.concept_name AS drug_a_name, c2.concept_name AS drug_b_name FROM pairs AS p INNER JOIN concept AS c1 ON c1.concept_id = p.drug_a INNER JOIN concept AS c2 ON c2.concept_id = p.drug_b
\ No newline at end of file
@@ -0,0 +1 @@
+WITH valid_drugs AS (SELECT concept_id FROM concept WHERE domain_id = 'Drug' AND standard_concept = 'S' AND invalid_reason IS NULL), yearly_counts AS (SELECT CAST(EXTRACT(YEAR FROM drug_exposure_start_date) AS INT) AS year, drug_concept_id, COUNT(DISTINCT person_id) AS patient_count FROM drug_exposure INNER JOIN valid_drugs AS vd ON vd.concept_id = drug_concept_id GROUP BY CAST(EXTRACT(YEAR FROM drug_exposure_start_date) AS INT), drug_concept_id), ranked_all AS (SELECT yc.year, yc.drug_concept_id, yc.patient_count, ROW_NUMBER() OVER (PARTITION BY yc.year ORDER BY yc.patient_count DESC NULLS FIRST, yc.drug_concept_id NULLS LAST) AS rnum FROM yearly_counts AS yc), ranked AS (SELECT year, drug_concept_id, patient_count FROM ranked_all WHERE rnum <= 20 ORDER BY year NULLS LAST, patient_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c.concept_name AS drug_name, r.year FROM ranked AS r INNER JOIN concept AS c ON c.concept_id = r.drug_concept_id
\ No newline at end of file
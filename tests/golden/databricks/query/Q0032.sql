@@ -0,0 +1 @@
+SELECT p.year_of_birth AS year FROM person AS p GROUP BY p.year_of_birth ORDER BY COUNT(*) DESC NULLS FIRST, year NULLS LAST LIMIT {self.result_limit}
\ No newline at end of file
@@ -0,0 +1 @@
+SELECT COALESCE(c.concept_name, 'Unknown') AS ethnicity FROM person AS p LEFT JOIN concept AS c ON c.concept_id = p.ethnicity_concept_id GROUP BY c.concept_name ORDER BY COUNT(*) DESC NULLS FIRST
\ No newline at end of file
@@ -0,0 +1 @@
+SELECT c.concept_name AS race FROM person AS p JOIN concept AS c ON c.concept_id = p.race_concept_id WHERE c.domain_id = 'Race' GROUP BY c.concept_name ORDER BY COUNT(*) DESC NULLS FIRST
\ No newline at end of file
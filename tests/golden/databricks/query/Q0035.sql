@@ -0,0 +1 @@
+SELECT COALESCE(c.concept_name, 'Unknown') AS gender FROM person AS p LEFT JOIN concept AS c ON c.concept_id = p.gender_concept_id AND c.domain_id = 'Gender' AND c.standard_concept = 'S' AND c.invalid_reason IS NULL GROUP BY COALESCE(c.concept_name, 'Unknown') ORDER BY COUNT(*) DESC NULLS FIRST
\ No newline at end of file
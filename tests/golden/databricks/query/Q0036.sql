@@ -0,0 +1 @@
+WITH valid_drugs AS (SELECT concept_id, concept_name FROM concept WHERE domain_id = 'Drug' AND standard_concept = 'S' AND invalid_reason IS NULL) SELECT vd.concept_name AS drug_name FROM drug_exposure AS de INNER JOIN valid_drugs AS vd ON vd.concept_id = de.drug_concept_id GROUP BY vd.concept_name ORDER BY COUNT(DISTINCT de.person_id) DESC NULLS FIRST LIMIT {self.result_limit}
\ No newline at end of file
@@ -0,0 +1 @@
+WITH valid_conditions AS (SELECT concept_id, concept_name FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL) SELECT vc.concept_name AS condition_name FROM condition_occurrence AS co INNER JOIN valid_conditions AS vc ON vc.concept_id = co.condition_concept_id GROUP BY vc.concept_name ORDER BY COUNT(DISTINCT co.person_id) DESC NULLS FIRST LIMIT {self.result_limit}
\ No newline at end of file
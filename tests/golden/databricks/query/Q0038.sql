@@ -0,0 +1 @@
+SELECT l.state AS location, COUNT(DISTINCT p.person_id) AS patient_count FROM person AS p INNER JOIN location AS l ON l.location_id = p.location_id WHERE l.state IS NOT NULL GROUP BY l.state ORDER BY patient_count DESC NULLS FIRST LIMIT {self.result_limit}
\ No newline at end of file
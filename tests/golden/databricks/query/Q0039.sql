@@ -0,0 +1 @@
+WITH valid_conditions AS (SELECT concept_id FROM concept WHERE domain_id = 'Condition' AND standard_concept = 'S' AND invalid_reason IS NULL), yearly_counts AS (SELECT CAST(EXTRACT(YEAR FROM condition_start_date) AS INT) AS year, condition_concept_id, COUNT(DISTINCT person_id) AS patient_count FROM condition_occurrence INNER JOIN valid_conditions AS vc ON vc.concept_id = condition_concept_id GROUP BY CAST(EXTRACT(YEAR FROM condition_start_date) AS INT), condition_concept_id), ranked_all AS (SELECT yc.year, yc.condition_concept_id, yc.patient_count, ROW_NUMBER() OVER (PARTITION BY yc.year ORDER BY yc.patient_count DESC NULLS FIRST, yc.condition_concept_id NULLS LAST) AS rnum FROM yearly_counts AS yc), ranked AS (SELECT year, condition_concept_id, patient_count FROM ranked_all WHERE rnum <= 20 ORDER BY year NULLS LAST, patient_count DESC NULLS FIRST LIMIT {self.result_limit}) SELECT c.concept_name AS condition_name, r.year FROM ranked AS r INNER JOIN concept AS c ON c.concept_id = r.condition_concept_id
\ No newline at end of file
@@ -0,0 +1 @@
+WITH drug1_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :d_id1), drug1_mapped AS (SELECT concept_id_2 AS concept_id FROM drug1_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug1_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug1_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug2_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id2 AND concept_code = :d_id2), drug2_mapped AS (SELECT concept_id_2 AS concept_id FROM drug2_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug2_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug2_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), combined_drug_concepts AS (SELECT concept_id FROM drug1_concepts UNION SELECT concept_id FROM drug2_concepts) SELECT COUNT(DISTINCT dr1.person_id) FROM drug_exposure AS dr1 JOIN combined_drug_concepts AS cdc ON dr1.drug_concept_id = cdc.concept_id
\ No newline at end of file
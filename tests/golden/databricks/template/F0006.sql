@@ -0,0 +1 @@
+WITH drug1_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :d_id1), drug1_mapped AS (SELECT concept_id_2 AS concept_id FROM drug1_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug1_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug1_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug2_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id2 AND concept_code = :d_id2), drug2_mapped AS (SELECT concept_id_2 AS concept_id FROM drug2_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug2_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug2_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug3_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id3 AND concept_code = :d_id3), drug3_mapped AS (SELECT concept_id_2 AS concept_id FROM drug3_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug3_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug3_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug4_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id4 AND concept_code = :d_id4), drug4_mapped AS (SELECT concept_id_2 AS concept_id FROM drug4_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug4_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug4_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug1_exposures AS (SELECT DISTINCT dr1.person_id, CAST(dr1.drug_exposure_start_date AS DATE) AS start_date, COALESCE(CAST(dr1.drug_exposure_end_date AS DATE), CAST(dr1.drug_exposure_start_date AS DATE)) AS end_date FROM drug_exposure AS dr1 JOIN drug1_concepts AS d1 ON dr1.drug_concept_id = d1.concept_id), drug2_exposures AS (SELECT DISTINCT dr2.person_id, CAST(dr2.drug_exposure_start_date AS DATE) AS start_date, COALESCE(CAST(dr2.drug_exposure_end_date AS DATE), CAST(dr2.drug_exposure_start_date AS DATE)) AS end_date FROM drug_exposure AS dr2 JOIN drug2_concepts AS d2 ON dr2.drug_concept_id = d2.concept_id), drug3_exposures AS (SELECT DISTINCT dr3.person_id, CAST(dr3.drug_exposure_start_date AS DATE) AS start_date, COALESCE(CAST(dr3.drug_exposure_end_date AS DATE), CAST(dr3.drug_exposure_start_date AS DATE)) AS end_date FROM drug_exposure AS dr3 JOIN drug3_concepts AS d3 ON dr3.drug_concept_id = d3.concept_id), drug4_exposures AS (SELECT DISTINCT dr4.person_id, CAST(dr4.drug_exposure_start_date AS DATE) AS start_date, COALESCE(CAST(dr4.drug_exposure_end_date AS DATE), CAST(dr4.drug_exposure_start_date AS DATE)) AS end_date FROM drug_exposure AS dr4 JOIN drug4_concepts AS d4 ON dr4.drug_concept_id = d4.concept_id), overlapping_quads AS (SELECT DISTINCT a.person_id, GREATEST(a.start_date, b.start_date, c.start_date, d.start_date) AS overlap_start, LEAST(a.end_date, b.end_date, c.end_date, d.end_date) AS overlap_end FROM drug1_exposures AS a JOIN drug2_exposures AS b ON a.person_id = b.person_id AND b.start_date <= a.end_date AND b.end_date >= a.start_date JOIN drug3_exposures AS c ON a.person_id = c.person_id AND c.start_date <= a.end_date AND c.end_date >= a.start_date AND c.start_date <= b.end_date AND c.end_date >= b.start_date JOIN drug4_exposures AS d ON a.person_id = d.person_id AND d.start_date <= a.end_date AND d.end_date >= a.start_date AND d.start_date <= b.end_date AND d.end_date >= b.start_date AND d.start_date <= c.end_date AND d.end_date >= c.start_date) SELECT COUNT(DISTINCT person_id) FROM overlapping_quads WHERE overlap_end >= overlap_start AND DATEDIFF(overlap_end, overlap_start) <= :days
\ No newline at end of file
@@ -0,0 +1 @@
+WITH drug1_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :d_id1), drug1_mapped AS (SELECT concept_id_2 AS concept_id FROM drug1_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug1_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug1_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug2_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id2 AND concept_code = :d_id2), drug2_mapped AS (SELECT concept_id_2 AS concept_id FROM drug2_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug2_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug2_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug3_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id3 AND concept_code = :d_id3), drug3_mapped AS (SELECT concept_id_2 AS concept_id FROM drug3_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug3_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug3_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug1_exposures AS (SELECT dr1.person_id, dr1.drug_exposure_start_date AS start_date FROM drug_exposure AS dr1 JOIN drug1_concepts AS d1 ON dr1.drug_concept_id = d1.concept_id), drug2_exposures AS (SELECT dr2.person_id, dr2.drug_exposure_start_date AS start_date FROM drug_exposure AS dr2 JOIN drug2_concepts AS d2 ON dr2.drug_concept_id = d2.concept_id), drug3_exposures AS (SELECT dr3.person_id, dr3.drug_exposure_start_date AS start_date FROM drug_exposure AS dr3 JOIN drug3_concepts AS d3 ON dr3.drug_concept_id = d3.concept_id) SELECT COUNT(DISTINCT a.person_id) FROM drug1_exposures AS a JOIN drug2_exposures AS b ON a.person_id = b.person_id JOIN drug3_exposures AS c ON b.person_id = c.person_id WHERE DATEDIFF(GREATEST(a.start_date, b.start_date, c.start_date), LEAST(a.start_date, b.start_date, c.start_date)) <= :days
\ No newline at end of file
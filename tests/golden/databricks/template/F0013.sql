@@ -0,0 +1 @@
+WITH seed_a AS (SELECT c.concept_id AS src_id FROM concept AS c WHERE c.vocabulary_id = :v_id1 AND c.concept_code = :c_id1 AND c.invalid_reason IS NULL), std_a AS (SELECT DISTINCT COALESCE(cr.concept_id_2, s.src_id) AS standard_id FROM seed_a AS s LEFT JOIN concept_relationship AS cr ON cr.concept_id_1 = s.src_id AND cr.relationship_id = 'Maps to' AND cr.invalid_reason IS NULL), desc_a AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM std_a AS sa JOIN concept_ancestor AS ca ON ca.ancestor_concept_id = sa.standard_id JOIN concept AS c ON c.concept_id = ca.descendant_concept_id AND c.standard_concept = 'S' AND c.domain_id = 'Condition' AND c.invalid_reason IS NULL), seed_b AS (SELECT c.concept_id AS src_id FROM concept AS c WHERE c.vocabulary_id = :v_id2 AND c.concept_code = :c_id2 AND c.invalid_reason IS NULL), std_b AS (SELECT DISTINCT COALESCE(cr.concept_id_2, s.src_id) AS standard_id FROM seed_b AS s LEFT JOIN concept_relationship AS cr ON cr.concept_id_1 = s.src_id AND cr.relationship_id = 'Maps to' AND cr.invalid_reason IS NULL), desc_b AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM std_b AS sb JOIN concept_ancestor AS ca ON ca.ancestor_concept_id = sb.standard_id JOIN concept AS c ON c.concept_id = ca.descendant_concept_id AND c.standard_concept = 'S' AND c.domain_id = 'Condition' AND c.invalid_reason IS NULL), persons_a AS (SELECT DISTINCT co.person_id FROM condition_occurrence AS co JOIN desc_a AS da ON co.condition_concept_id = da.concept_id), persons_b AS (SELECT DISTINCT co.person_id FROM condition_occurrence AS co JOIN desc_b AS db ON co.condition_concept_id = db.concept_id) SELECT COUNT(DISTINCT a.person_id) FROM persons_a AS a JOIN persons_b AS b USING (person_id)
\ No newline at end of file
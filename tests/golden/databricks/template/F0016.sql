@@ -0,0 +1 @@
+WITH seed_a AS (SELECT c.concept_id AS src_id FROM concept AS c WHERE c.vocabulary_id = :v_id1 AND c.concept_code = :c_id1 AND c.invalid_reason IS NULL), std_a AS (SELECT DISTINCT COALESCE(cr.concept_id_2, s.src_id) AS standard_id FROM seed_a AS s LEFT JOIN concept_relationship AS cr ON cr.concept_id_1 = s.src_id AND cr.relationship_id = 'Maps to' AND cr.invalid_reason IS NULL), desc_a AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM std_a AS sa JOIN concept_ancestor AS ca ON ca.ancestor_concept_id = sa.standard_id JOIN concept AS c ON c.concept_id = ca.descendant_concept_id AND c.standard_concept = 'S' AND c.domain_id = 'Condition' AND c.invalid_reason IS NULL), seed_b AS (SELECT c.concept_id AS src_id FROM concept AS c WHERE c.vocabulary_id = :v_id2 AND c.concept_code = :c_id2 AND c.invalid_reason IS NULL), std_b AS (SELECT DISTINCT COALESCE(cr.concept_id_2, s.src_id) AS standard_id FROM seed_b AS s LEFT JOIN concept_relationship AS cr ON cr.concept_id_1 = s.src_id AND cr.relationship_id = 'Maps to' AND cr.invalid_reason IS NULL), desc_b AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM std_b AS sb JOIN concept_ancestor AS ca ON ca.ancestor_concept_id = sb.standard_id JOIN concept AS c ON c.concept_id = ca.descendant_concept_id AND c.standard_concept = 'S' AND c.domain_id = 'Condition' AND c.invalid_reason IS NULL), seed_c AS (SELECT c.concept_id AS src_id FROM concept AS c WHERE c.vocabulary_id = :v_id3 AND c.concept_code = :c_id3 AND c.invalid_reason IS NULL), std_c AS (SELECT DISTINCT COALESCE(cr.concept_id_2, s.src_id) AS standard_id FROM seed_c AS s LEFT JOIN concept_relationship AS cr ON cr.concept_id_1 = s.src_id AND cr.relationship_id = 'Maps to' AND cr.invalid_reason IS NULL), desc_c AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM std_c AS sc JOIN concept_ancestor AS ca ON ca.ancestor_concept_id = sc.standard_id JOIN concept AS c ON c.concept_id = ca.descendant_concept_id AND c.standard_concept = 'S' AND c.domain_id = 'Condition' AND c.invalid_reason IS NULL), seed_d AS (SELECT c.concept_id AS src_id FROM concept AS c WHERE c.vocabulary_id = :v_id4 AND c.concept_code = :c_id4 AND c.invalid_reason IS NULL), std_d AS (SELECT DISTINCT COALESCE(cr.concept_id_2, s.src_id) AS standard_id FROM seed_d AS s LEFT JOIN concept_relationship AS cr ON cr.concept_id_1 = s.src_id AND cr.relationship_id = 'Maps to' AND cr.invalid_reason IS NULL), desc_d AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM std_d AS sd JOIN concept_ancestor AS ca ON ca.ancestor_concept_id = sd.standard_id JOIN concept AS c ON c.concept_id = ca.descendant_concept_id AND c.standard_concept = 'S' AND c.domain_id = 'Condition' AND c.invalid_reason IS NULL) SELECT COUNT(DISTINCT co1.person_id) FROM condition_occurrence AS co1 JOIN desc_a AS da ON co1.condition_concept_id = da.concept_id JOIN condition_occurrence AS co2 ON co1.person_id = co2.person_id JOIN desc_b AS db ON co2.condition_concept_id = db.concept_id JOIN condition_occurrence AS co3 ON co1.person_id = co3.person_id JOIN desc_c AS dc ON co3.condition_concept_id = dc.concept_id JOIN condition_occurrence AS co4 ON co1.person_id = co4.person_id JOIN desc_d AS dd ON co4.condition_concept_id = dd.concept_id
\ No newline at end of file
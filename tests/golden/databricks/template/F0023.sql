@@ -0,0 +1 @@
+WITH condition1_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :c_id1), condition1_mapped AS (SELECT concept_id_2 AS concept_id FROM condition1_source AS cs JOIN concept_relationship AS cr ON cs.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), condition1_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM condition1_mapped AS cm JOIN concept AS c ON cm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), condition2_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id2 AND concept_code = :c_id2), condition2_mapped AS (SELECT concept_id_2 AS concept_id FROM condition2_source AS cs JOIN concept_relationship AS cr ON cs.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), condition2_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM condition2_mapped AS cm JOIN concept AS c ON cm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id) SELECT COUNT(DISTINCT con1.person_id) FROM condition_occurrence AS con1 JOIN condition1_concepts AS cc1 ON con1.condition_concept_id = cc1.concept_id JOIN condition_occurrence AS con2 ON con1.person_id = con2.person_id JOIN condition2_concepts AS cc2 ON con2.condition_concept_id = cc2.concept_id WHERE DATEDIFF(con2.condition_start_date, con1.condition_start_date) >= :days
\ No newline at end of file
@@ -0,0 +1 @@
+WITH condition_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :c_id1 AND invalid_reason IS NULL), condition_mapped AS (SELECT DISTINCT COALESCE(cr.concept_id_2, cs.concept_id) AS concept_id FROM condition_source AS cs LEFT JOIN concept_relationship AS cr ON cs.concept_id = cr.concept_id_1 AND cr.relationship_id = 'Maps to' AND cr.invalid_reason IS NULL), condition_hierarchy AS (SELECT concept_id FROM condition_mapped UNION SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM condition_mapped AS cm JOIN concept_ancestor AS ca ON cm.concept_id = ca.ancestor_concept_id), condition_concepts AS (SELECT ch.concept_id FROM condition_hierarchy AS ch JOIN concept AS c ON ch.concept_id = c.concept_id WHERE c.standard_concept = 'S' AND c.domain_id = 'Condition' AND c.invalid_reason IS NULL) SELECT COUNT(DISTINCT con1.person_id) AS number_of_patients FROM condition_occurrence AS con1 JOIN condition_concepts AS cc ON con1.condition_concept_id = cc.concept_id WHERE EXTRACT(YEAR FROM con1.condition_start_date) = :year AND con1.condition_start_date IS NOT NULL
\ No newline at end of file
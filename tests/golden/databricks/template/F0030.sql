@@ -0,0 +1 @@
+WITH ethnicity_concept AS (SELECT concept_id FROM concept WHERE concept_name = :ethnicity AND domain_id = 'Ethnicity' AND standard_concept = 'S'), condition_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :c_id1), condition_mapped AS (SELECT concept_id_2 AS concept_id FROM condition_source AS cs JOIN concept_relationship AS cr ON cs.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), condition_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM condition_mapped AS cm JOIN concept AS c ON cm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id) SELECT COUNT(DISTINCT pe1.person_id) FROM person AS pe1 JOIN ethnicity_concept AS ec ON pe1.ethnicity_concept_id = ec.concept_id JOIN condition_occurrence AS con1 ON pe1.person_id = con1.person_id JOIN condition_concepts AS cc ON con1.condition_concept_id = cc.concept_id
\ No newline at end of file
@@ -0,0 +1 @@
+WITH condition_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :c_id1), condition_mapped AS (SELECT concept_id_2 AS concept_id FROM condition_source AS cs JOIN concept_relationship AS cr ON cs.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), condition_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM condition_mapped AS cm JOIN concept AS c ON cm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id2 AND concept_code = :d_id1), drug_mapped AS (SELECT concept_id_2 AS concept_id FROM drug_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug_concepts AS (SELECT concept_id FROM drug_mapped), cond_occ AS (SELECT co.person_id, co.condition_concept_id, CAST(co.condition_start_date AS DATE) AS cond_date FROM condition_occurrence AS co JOIN condition_concepts AS cc ON co.condition_concept_id = cc.concept_id), drug_exp AS (SELECT de.person_id, de.drug_concept_id, CAST(de.drug_exposure_start_date AS DATE) AS drug_date FROM drug_exposure AS de JOIN drug_concepts AS dc ON de.drug_concept_id = dc.concept_id), pairs AS (SELECT DISTINCT co.person_id, co.condition_concept_id, de.drug_concept_id FROM cond_occ AS co JOIN drug_exp AS de ON de.person_id = co.person_id AND de.drug_date > co.cond_date) SELECT COUNT(DISTINCT person_id) FROM pairs
\ No newline at end of file
@@ -0,0 +1 @@
+WITH condition_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id1 AND concept_code = :c_id1), condition_mapped AS (SELECT concept_id_2 AS concept_id FROM condition_source AS cs JOIN concept_relationship AS cr ON cs.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), condition_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM condition_mapped AS cm JOIN concept AS c ON cm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id), drug_source AS (SELECT concept_id FROM concept WHERE vocabulary_id = :v_id2 AND concept_code = :d_id1), drug_mapped AS (SELECT concept_id_2 AS concept_id FROM drug_source AS ds JOIN concept_relationship AS cr ON ds.concept_id = cr.concept_id_1 WHERE cr.relationship_id = 'Maps to'), drug_concepts AS (SELECT DISTINCT ca.descendant_concept_id AS concept_id FROM drug_mapped AS dm JOIN concept AS c ON dm.concept_id = c.concept_id JOIN concept_ancestor AS ca ON c.concept_id = ca.ancestor_concept_id) SELECT COUNT(DISTINCT con1.person_id) FROM condition_occurrence AS con1 JOIN condition_concepts AS cc ON con1.condition_concept_id = cc.concept_id JOIN drug_exposure AS dr1 ON con1.person_id = dr1.person_id JOIN drug_concepts AS dc ON dr1.drug_concept_id = dc.concept_id WHERE DATEDIFF(dr1.drug_exposure_start_date, con1.condition_start_date) > :days
\ No newline at end of file
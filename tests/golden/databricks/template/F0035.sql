@@ -0,0 +1 @@
+SELECT COUNT(DISTINCT pe1.person_id) FROM person AS pe1 WHERE year_of_birth = :year
\ No newline at end of file
@@ -0,0 +1 @@
+WITH ethnicity_concepts AS (SELECT concept_id, concept_name AS ethnicity FROM concept WHERE domain_id = 'Ethnicity' AND standard_concept = 'S'), location_states AS (SELECT location_id, state FROM location) SELECT COALESCE(et.ethnicity, 'Unknown') AS ethnicity, COALESCE(st.state, 'Unknown') AS state, COUNT(DISTINCT pe1.person_id) FROM person AS pe1 LEFT JOIN ethnicity_concepts AS et ON pe1.ethnicity_concept_id = et.concept_id LEFT JOIN location_states AS st ON pe1.location_id = st.location_id GROUP BY et.ethnicity, st.state
\ No newline at end of file
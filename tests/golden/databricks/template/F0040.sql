@@ -0,0 +1 @@
+WITH gender_concepts AS (SELECT concept_id, concept_name AS gender FROM concept WHERE domain_id = 'Gender' AND standard_concept = 'S') SELECT COALESCE(gender, 'Unknown') AS gender, COUNT(DISTINCT pe1.person_id) FROM person AS pe1 LEFT JOIN gender_concepts AS gc ON pe1.gender_concept_id = gc.concept_id GROUP BY gender
\ No newline at end of file
@@ -0,0 +1 @@
+WITH st AS (SELECT location_id, state FROM location) SELECT pe1.year_of_birth, COALESCE(st.state, 'Unknown') AS state, COUNT(DISTINCT pe1.person_id) FROM person AS pe1 LEFT JOIN st ON pe1.location_id = st.location_id GROUP BY pe1.year_of_birth, st.state
\ No newline at end of file
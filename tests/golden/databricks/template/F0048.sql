@@ -0,0 +1 @@
+SELECT COUNT(DISTINCT pe1.person_id) FROM person AS pe1
\ No newline at end of file
@@ -0,0 +1 @@
+WITH ethnicity_concepts AS (SELECT concept_id FROM concept WHERE concept_name = :ethnicity AND domain_id = 'Ethnicity' AND standard_concept = 'S') SELECT COUNT(DISTINCT pe1.person_id) FROM person AS pe1 JOIN ethnicity_concepts AS ec ON pe1.ethnicity_concept_id = ec.concept_id
\ No newline at end of file
@@ -0,0 +1 @@
+WITH race_concept AS (SELECT concept_id FROM concept WHERE concept_name = :race AND domain_id = 'Race' AND standard_concept = 'S') SELECT COUNT(DISTINCT pe1.person_id) AS number_of_patients FROM person AS pe1 JOIN race_concept AS rc ON pe1.race_concept_id = rc.concept_id
\ No newline at end of file
@@ -0,0 +1 @@
+WITH gender_concepts AS (SELECT concept_id FROM concept WHERE concept_name = :gender AND domain_id = 'Gender' AND standard_concept = 'S') SELECT COUNT(DISTINCT pe1.person_id) FROM person AS pe1 JOIN gender_concepts AS gc ON pe1.gender_concept_id = gc.concept_id
\ No newline at end of file
@@ -0,0 +1 @@
+WITH state_locations AS (SELECT location_id FROM location WHERE state = :location) SELECT COUNT(DISTINCT pe1.person_id) FROM person AS pe1 JOIN state_locations AS sl ON pe1.location_id = sl.location_id
\ No newline at end of file
@@ -0,0 +1,59 @@
+import pytest
+
+from foem.sql_test import SqlTest
+
+# Candidate rows for F0013 (patients with both conditions)
+CANDIDATES = [
+    ("Type 2 diabetes mellitus", "Hypertensive disorder"),
+    ("Type 2 diabetes mellitus", "Asthma"),
+    ("Hypertensive disorder", "Asthma"),
+    ("Asthma", "Essential hypertension"),
+    ("Essential hypertension", "Type 2 diabetes mellitus without complications"),
+]
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    monkeypatch.delenv("FOEM_RESULT_CACHE_DIR", raising=False)
+    monkeypatch.delenv("DB_TYPE", raising=False)
+
+
+def run(engine, batch_size, method_name="patients_2conditions_and"):
+    tester = SqlTest(conn=engine, vocab_mode="lazy", batch_size=batch_size)
+    try:
+        return tester._process_results(CANDIDATES, "{0} and {1}", method_name)
+    finally:
+        tester.close()
+
+
+@pytest.mark.parametrize("batch_size", [2, 3, 10])
+def test_batched_results_match_unbatched(omop_engine, batch_size):
+    expected = run(omop_engine, 1)
+    assert [item["execution_result"] for item in expected] != [[(0,)]] * len(CANDIDATES)
+    assert run(omop_engine, batch_size) == expected
+
+
+def test_batch_query_tags_rows_with_their_parameter_set():
+    query, params = SqlTest._batch_query("SELECT x FROM t WHERE a = %(a)s AND b = :b;", [{"a": 1}, {"a": 2}])
+    assert query == (
+        "SELECT 0 AS foem_batch_idx, foem_batch.* FROM (SELECT x FROM t WHERE a = :a_b0 AND b = :b) foem_batch\n"
+        "UNION ALL\n"
+        "SELECT 1 AS foem_batch_idx, foem_batch.* FROM (SELECT x FROM t WHERE a = :a_b1 AND b = :b) foem_batch"
+    )
+    assert params == {"a_b0": 1, "a_b1": 2}
+
+
+@pytest.mark.parametrize("query, batchable", [
+    ("SELECT COUNT(*) FROM person WHERE gender = %(gender)s", True),
+    ("SELECT person_id FROM person ORDER BY person_id LIMIT 5", False),
+    ("SELECT a FROM t UNION SELECT a FROM u ORDER BY a", False),
+    ("SELECT a FROM (SELECT a FROM t ORDER BY a LIMIT 1) s", True),
+    ("SELECT FROM WHERE", False),
+])
+def test_batchable(omop_engine, query, batchable, capsys):
+    tester = SqlTest(conn=omop_engine, vocab_mode="lazy", batch_size=10)
+    assert tester._batchable("patients_count", query) is batchable
+    assert ("Warning: Not batching F0048" in capsys.readouterr().out) is not batchable
+    # Decided once per template
+    assert tester._batchable("patients_count", "SELECT 1 ORDER BY 1") is batchable
+    tester.close()
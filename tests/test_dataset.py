@@ -0,0 +1,95 @@
+import pytest
+
+from foem.dataset import CheckpointJournal, DatasetManifest, assign_shards, merge_shards
+from foem.output import DatasetWriter, read_items
+
+NAMES = ["a", "b", "c", "d", "e"]
+
+
+def test_assign_shards_balances_runtimes():
+    # e has no runtime yet and counts as the median one (5.0)
+    timings = {"a": 10.0, "b": 1.0, "c": 6.0, "d": 4.0}
+    shards = assign_shards(NAMES, timings, 2)
+    assert shards == [["a", "d"], ["b", "c", "e"]]
+    assert assign_shards(NAMES, timings, 2) == shards
+    assert sorted(name for shard in assign_shards(NAMES, {}, 3) for name in shard) == NAMES
+
+
+def write_shard(directory, index, count, functions, names=NAMES, ids=None):
+    """Write the output of one shard: its dataset and manifest."""
+    directory.mkdir()
+    with DatasetWriter(directory / "dataset.jsonl", functions) as writer:
+        for name in functions:
+            writer.add(name, [{"id": (ids or {}).get(name, f"{name}-0"), "input": name}])
+    shard = {"index": index, "count": count, "functions": names}
+    entries = [{"name": name, "hashes": {}, "items": 1} for name in functions]
+    DatasetManifest(10, "fp", entries, shard).save(directory / "manifest.json")
+    return directory
+
+
+def test_merge_shards_restores_function_order(tmp_path):
+    shards = [write_shard(tmp_path / f"shard-{idx + 1}", idx + 1, 2, functions)
+              for idx, functions in enumerate(assign_shards(NAMES, {"a": 10.0, "c": 6.0}, 2))]
+    merged = merge_shards(shards, tmp_path / "merged", write_json=False)
+    assert [entry["name"] for entry in merged.functions] == NAMES
+    assert [item["id"] for item in read_items(tmp_path / "merged" / "dataset.jsonl")] == [f"{name}-0" for name in NAMES]
+
+
+def test_merge_shards_rejects_a_function_in_two_shards(tmp_path):
+    shards = [write_shard(tmp_path / "shard-1", 1, 2, ["a", "b"]),
+              write_shard(tmp_path / "shard-2", 2, 2, ["b", "c", "d", "e"])]
+    with pytest.raises(ValueError, match="b was generated by more than one shard"):
+        merge_shards(shards, tmp_path / "merged", write_json=False)
+
+
+def test_merge_shards_rejects_a_missing_function(tmp_path):
+    shards = [write_shard(tmp_path / "shard-1", 1, 2, ["a", "b"]),
+              write_shard(tmp_path / "shard-2", 2, 2, ["d", "e"])]
+    with pytest.raises(ValueError, match="Missing from all shards: c"):
+        merge_shards(shards, tmp_path / "merged", write_json=False)
+
+
+def test_merge_shards_rejects_duplicate_item_ids(tmp_path):
+    shards = [write_shard(tmp_path / "shard-1", 1, 2, ["a", "b"]),
+              write_shard(tmp_path / "shard-2", 2, 2, ["c", "d", "e"], ids={"d": "a-0"})]
+    with pytest.raises(ValueError, match="Duplicate item id a-0"):
+        merge_shards(shards, tmp_path / "merged", write_json=False)
+
+
+def test_merge_shards_rejects_a_missing_shard(tmp_path):
+    shards = [write_shard(tmp_path / "shard-1", 1, 3, ["a", "b"]),
+              write_shard(tmp_path / "shard-3", 3, 3, ["c", "d", "e"])]
+    with pytest.raises(ValueError, match=r"Expected shards 1..3, got \[1, 3\]"):
+        merge_shards(shards, tmp_path / "merged", write_json=False)
+
+
+def test_journal_resumes_completed_functions(tmp_path):
+    journal = CheckpointJournal(tmp_path / "checkpoint.jsonl")
+    journal.append("a", [{"id": "a-0"}])
+    journal.append("b", [])
+    journal.close()
+
+    assert CheckpointJournal(tmp_path / "checkpoint.jsonl").load() == {"a": [{"id": "a-0"}], "b": []}
+    assert CheckpointJournal(tmp_path / "missing.jsonl").load() == {}
+
+
+def test_journal_drops_a_torn_record(tmp_path, capsys):
+    path = tmp_path / "checkpoint.jsonl"
+    journal = CheckpointJournal(path)
+    journal.append("a", [{"id": "a-0"}])
+    journal.close()
+    complete = path.read_bytes()
+    with open(path, "ab") as f:
+        f.write(b'{"function": "b", "ite')
+
+    journal = CheckpointJournal(path)
+    assert journal.load() == {"a": [{"id": "a-0"}]}
+    assert path.read_bytes() == complete
+    assert "Dropping incomplete record" in capsys.readouterr().out
+
+    journal.append("b", [{"id": "b-0"}])
+    journal.close()
+    assert CheckpointJournal(path).load() == {"a": [{"id": "a-0"}], "b": [{"id": "b-0"}]}
+
+    journal.remove()
+    assert not path.exists()
@@ -0,0 +1,53 @@
+import json
+
+from foem.output import DatasetWriter, jsonl_to_json, read_items
+
+
+def items(name, count):
+    return [{"id": f"{name}-{idx}", "input": name} for idx in range(count)]
+
+
+class RecordingSink:
+    def __init__(self):
+        self.written = []
+        self.complete = None
+
+    def write(self, name, items):
+        self.written.append(name)
+
+    def close(self, complete=True):
+        self.complete = complete
+
+
+def test_writer_keeps_function_order(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    sink = RecordingSink()
+    with DatasetWriter(path, ["a", "b", "c"], sinks=[sink]) as writer:
+        writer.add("c", items("c", 1))
+        assert path.read_text() == ""
+        writer.add("a", items("a", 2))
+        assert [item["id"] for item in read_items(path)] == ["a-0", "a-1"]
+        writer.add("b", [])
+
+    assert [item["id"] for item in read_items(path)] == ["a-0", "a-1", "c-0"]
+    assert writer.counts == {"a": 2, "b": 0, "c": 1}
+    assert sink.written == ["a", "b", "c"]
+    assert sink.complete is True
+
+
+def test_writer_reports_missing_functions(tmp_path, capsys):
+    sink = RecordingSink()
+    with DatasetWriter(tmp_path / "dataset.jsonl", ["a", "b"], sinks=[sink]) as writer:
+        writer.add("b", items("b", 1))
+    assert writer.counts == {}
+    assert sink.complete is False
+    # b is held back behind the missing a, so neither is written
+    assert "2 test function(s) missing" in capsys.readouterr().out
+
+
+def test_jsonl_to_json(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    with DatasetWriter(path, ["a"]) as writer:
+        writer.add("a", items("a", 2))
+    assert jsonl_to_json(path, tmp_path / "dataset.json") == 2
+    assert json.loads((tmp_path / "dataset.json").read_text()) == items("a", 2)
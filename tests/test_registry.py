@@ -0,0 +1,64 @@
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from foem.registry import FUNCTION_TEMPLATES, BindingPlan, TemplateRegistry
+from foem.sql_test import SqlTest
+
+CONCEPTS = {
+    "Asthma": [("SNOMED", "195967001")],
+    "Type 2 diabetes mellitus": [("SNOMED", "44054006"), ("ICD10CM", "E11")],
+    "Aspirin": [("RxNorm", "1191")],
+    "MALE": [("SNOMED", "248153007")],
+}
+
+
+def resolve(name):
+    return CONCEPTS.get(name, [])
+
+
+def test_bind_concepts_in_row_order():
+    plan = BindingPlan(["v_id1", "c_id1", "v_id2", "c_id2"])
+    assert plan.bind(("Asthma", "Aspirin"), resolve) == {
+        "v_id1": "SNOMED", "c_id1": "195967001", "v_id2": "RxNorm", "c_id2": "1191",
+    }
+
+
+@pytest.mark.parametrize("row", [("Asthma",), ("Asthma", "Type 2 diabetes mellitus")])
+def test_bind_needs_exactly_one_concept_per_slot(row):
+    with pytest.raises(ValueError, match="Expected 2 concept"):
+        BindingPlan(["v_id1", "c_id1", "v_id2", "c_id2"]).bind(row, resolve)
+
+
+def test_bind_mixed_codes_use_the_first_concepts():
+    plan = BindingPlan(["v_id1", "c_id1", "v_id2", "d_id2"])
+    assert plan.concept_order == "first"
+    params = plan.bind(("Type 2 diabetes mellitus", "Aspirin"), resolve)
+    assert params == {"v_id1": "SNOMED", "c_id1": "44054006", "v_id2": "ICD10CM", "d_id2": "E11"}
+
+
+def test_bind_demographics_use_the_last_concepts():
+    plan = BindingPlan(["gender", "v_id1", "d_id1"])
+    assert plan.bind(("MALE", "Aspirin"), resolve) == {"gender": "MALE", "v_id1": "RxNorm", "d_id1": "1191"}
+
+    plan = BindingPlan(["v_id1", "c_id1", "state"])
+    assert plan.bind(("Texas", "Asthma"), resolve) == {"v_id1": "SNOMED", "c_id1": "195967001", "state": "Texas"}
+
+
+def test_bind_numbers_and_arguments():
+    def no_lookup(name):
+        raise AssertionError(f"unexpected lookup of {name!r}")
+
+    assert BindingPlan(["age"]).bind(("MALE", Decimal("41.0"), 65), no_lookup) == {"age": 65}
+    assert BindingPlan(["year"]).bind(("MALE",), no_lookup, (2020,)) == {"year": 2020}
+    plan = BindingPlan(["v_id1", "d_id1", "days"])
+    assert plan.bind(("Aspirin",), resolve, (30,)) == {"v_id1": "RxNorm", "d_id1": "1191", "days": 30}
+
+
+def test_registry_matches_the_template_files():
+    root = Path(__file__).parent.parent
+    registry = TemplateRegistry(root / "template", root / "query")
+    registry.check()
+    for name in FUNCTION_TEMPLATES:
+        assert callable(getattr(SqlTest, name))
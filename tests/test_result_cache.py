@@ -0,0 +1,43 @@
+import os
+
+from foem.result_cache import ResultCache
+
+
+def entry_size(tmp_path):
+    probe = ResultCache(tmp_path / "probe")
+    probe.put("00probe", [(0, "x" * 100)])
+    return next(probe._entries()).stat().st_size
+
+
+def test_get_and_put(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = ResultCache.key("SELECT 1", {"a": 1}, "postgresql", "fp")
+    assert cache.get(key) is None
+    cache.put(key, [(1, "a"), (2, "b")])
+    assert cache.get(key) == [(1, "a"), (2, "b")]
+    assert ResultCache(tmp_path).get(key) == [(1, "a"), (2, "b")]
+
+
+def test_key_depends_on_every_input():
+    key = ResultCache.key("SELECT 1", {"a": 1}, "postgresql", "fp")
+    assert key == ResultCache.key("SELECT 1", {"a": 1}, "postgresql", "fp")
+    assert key != ResultCache.key("SELECT 2", {"a": 1}, "postgresql", "fp")
+    assert key != ResultCache.key("SELECT 1", {"a": 2}, "postgresql", "fp")
+    assert key != ResultCache.key("SELECT 1", {"a": 1}, "databricks", "fp")
+    assert key != ResultCache.key("SELECT 1", {"a": 1}, "postgresql", "fp2")
+
+
+def test_evicts_least_recently_used(tmp_path):
+    size = entry_size(tmp_path)
+    cache = ResultCache(tmp_path / "cache", max_bytes=4 * size)
+    keys = [f"{idx:02d}key" for idx in range(4)]
+    for idx, key in enumerate(keys):
+        cache.put(key, [(idx, "x" * 100)])
+        os.utime(cache._path(key), (1000 + idx, 1000 + idx))
+    # Reading the oldest entry makes it the most recently used one
+    assert cache.get(keys[0]) == [(0, "x" * 100)]
+
+    # Over the bound: the least recently used entries go until 90% of it is left
+    cache.put("04key", [(4, "x" * 100)])
+    assert [cache.get(key) is not None for key in keys + ["04key"]] == [True, False, False, True, True]
+    assert cache._size == 3 * size
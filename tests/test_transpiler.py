@@ -0,0 +1,32 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from foem.transpiler import _batch_sql, transpile_query
+
+ROOT = Path(__file__).parent.parent
+# Expected Databricks SQL of every template and query file; FOEM_UPDATE_GOLDEN=1 rewrites it
+GOLDEN_DIR = Path(__file__).parent / "golden" / "databricks"
+SQL_FILES = sorted(path.relative_to(ROOT).as_posix() for directory in ("template", "query")
+                   for path in (ROOT / directory).glob("*.sql"))
+
+
+@pytest.mark.parametrize("name", SQL_FILES)
+def test_transpiled_corpus_is_unchanged(name):
+    path = ROOT / name
+    sql, format_fields, _ = _batch_sql(path, path.read_text(encoding="utf-8"))
+    transpiled = transpile_query(sql, "postgres", "databricks", cache=False, format_fields=format_fields)
+    golden = GOLDEN_DIR / name
+    if os.getenv("FOEM_UPDATE_GOLDEN"):
+        golden.parent.mkdir(parents=True, exist_ok=True)
+        golden.write_bytes(transpiled.encode("utf-8"))
+    assert transpiled.encode("utf-8") == golden.read_bytes()
+
+
+def test_format_fields_survive_transpilation():
+    sql = "SELECT '{{literal}}' AS a, x FROM t WHERE y > NOW() - INTERVAL '5 days' LIMIT {self.result_limit}"
+    transpiled = transpile_query(sql, "postgres", "databricks", cache=False, format_fields=True)
+    assert transpiled.endswith("LIMIT {self.result_limit}")
+    assert "'{{literal}}'" in transpiled
+    assert transpiled.format(self=type("Tester", (), {"result_limit": 10})).endswith("LIMIT 10")
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import text
+
+from foem.sql_test import SqlTest
+from foem.vocab_snapshot import VocabSnapshot, pack_vocab
+
+VOCAB = {
+    "RxNorm": {"1191": "Aspirin", "5640": "Ibuprofen", "6809": "Metformin"},
+    "ATC": {"B01AC06": "aspirin", "M01AE01": "Ibuprofen"},
+    "SNOMED": {"13445001": "Ménière's disease", "195967001": "Asthma"},
+}
+
+
+def test_rebuild_deletes_old_snapshots(omop_engine, tmp_path, monkeypatch):
+    monkeypatch.setenv("FOEM_VOCAB_SNAPSHOT_DIR", str(tmp_path))
+    SqlTest(conn=omop_engine, vocab_mode="snapshot").close()
+    (first,) = tmp_path.glob("vocab-*.bin")
+
+    with omop_engine.begin() as conn:
+        conn.execute(text("UPDATE vocabulary SET vocabulary_version = 'v2' WHERE vocabulary_id = 'SNOMED'"))
+    tester = SqlTest(conn=omop_engine, vocab_mode="snapshot")
+    assert tester.find_code_by_name("asthma") == [("SNOMED", "195967001")]
+    tester.close()
+
+    (second,) = tmp_path.glob("vocab-*.bin")
+    assert second != first
+
+
+
+def test_snapshot_matches_name_index():
+    snapshot = VocabSnapshot(pack_vocab(VOCAB, "v1"))
+    index = SqlTest._SqlTest__build_name_index(VOCAB)
+    assert len(snapshot) == 7
+    for name in index:
+        assert snapshot.get(name) == index[name]
+    assert snapshot.get("aspirin") == [("RxNorm", "1191"), ("ATC", "B01AC06")]
+    assert snapshot.get("ménière's disease") == [("SNOMED", "13445001")]
+    assert snapshot.get("Aspirin") is None
+    assert snapshot.get("unknown", []) == []
+    assert "asthma" in snapshot and "zzz" not in snapshot
+    assert snapshot.version_key == "v1"
+    assert snapshot.to_vocab_dict() == VOCAB
+    snapshot.close()
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "vocab.bin"
+    VocabSnapshot.save(VOCAB, "v1", path)
+    snapshot = VocabSnapshot.load(path)
+    assert snapshot.get("ibuprofen") == [("RxNorm", "5640"), ("ATC", "M01AE01")]
+    snapshot.close()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        VocabSnapshot(b"not a snapshot" * 4)